@@ -45,7 +45,15 @@ class BDD(object):
 
     Notice that only a duplicate of the internal pointer is returned,
     which must be freed by the caller!    
+
+    Results of BDD operations are wrapped with BDD._adopt, which takes
+    over the reference returned by the NuSMV wrapper instead of creating
+    a duplicate. Objects are never modified after creation: The in-place
+    operators (*=, +=, ...) return a new object, such that the ONE and
+    ZERO constants can be shared per DD manager.
     """
+
+    __slots__ = ['__ptr', '__manager', '__name']
     
 
     # Static reference to the "premium" DD Manager, i.e., the one
@@ -56,20 +64,37 @@ class BDD(object):
     # Static instance counter (for statistical/debugging reasons)
     num_instances = 0
 
-    # List of names of living instances
-    living_names_list = []
+    # Number of living instances per name. A dictionary is used instead of
+    # a list, so that creating and deleting an instance does not require a
+    # linear scan over all living instances.
+    living_names_count = {}
+
+    # Constants ONE and ZERO for each DD manager. Maps the address of a
+    # DD manager to a tuple (ONE, ZERO).
+    constants = {}
+
+    def _get_constants(manager):
+        key = int(manager)
+        if not BDD.constants.has_key(key):
+            one = BDD._adopt(dd.bdd_one(manager), manager, "one*")
+            zero = BDD._adopt(dd.bdd_zero(manager), manager, "zero*")
+            BDD.constants[key] = (one, zero)
+        return BDD.constants[key]
+    _get_constants = staticmethod(_get_constants)
+
+    def is_shared_constant(self):
+        """
+        Returns True iff self is one of the ONE and ZERO objects which are
+        shared per DD manager.
+        """
+        constants = BDD.constants.get(int(self.__manager))
+        return constants != None and (self is constants[0] or self is constants[1])
 
     def get_one(manager):
-        tmp = dd.bdd_one(manager)
-        result = BDD(tmp, manager, "one*")
-        dd.bdd_free(manager, tmp)
-        return result
+        return BDD._get_constants(manager)[0]
 
     def get_zero(manager):
-        tmp = dd.bdd_zero(manager)
-        result = BDD(tmp, manager, "zero*")
-        dd.bdd_free(manager, tmp)
-        return result
+        return BDD._get_constants(manager)[1]
         
     ONE = staticmethod(get_one)
     ZERO = staticmethod(get_zero)
@@ -82,33 +107,146 @@ class BDD(object):
         if min.__manager != max.__manager:
             raise MardukException("Operation on BDDs from different managers not possible!")
         tmp = dd.bdd_between(min.mgr, min.__ptr, max.__ptr)
-        result = BDD(tmp, min.mgr)
-        dd.bdd_free(result.mgr, tmp)
-        return result
+        return BDD._adopt(tmp, min.mgr)
 
     between = staticmethod(_between)
 
+    def _reduce_all(bdds, manager, conjunction, early_exit):
+        """
+        Reduces the given BDDs pairwise with AND (conjunction == True) or
+        OR (conjunction == False). In every step the two smallest operands
+        are combined, such that large intermediate results are created as
+        late as possible.
+        """
+        import heapq
+
+        if conjunction:
+            neutral = BDD.get_one
+            absorbing = BDD.get_zero
+        else:
+            neutral = BDD.get_zero
+            absorbing = BDD.get_one
+
+        if manager == None:
+            if len(bdds) == 0:
+                raise MardukException("Need a DD manager to reduce an empty list of BDDs!")
+            manager = bdds[0].__manager
+
+        heap = []
+        for bdd in bdds:
+            if bdd.__manager != manager:
+                raise MardukException("Operation on BDDs from different managers not possible!")
+            if early_exit and bdd == absorbing(manager):
+                return absorbing(manager)
+            if bdd == neutral(manager):
+                continue
+            heap.append((bdd.size, len(heap), bdd))
+        heapq.heapify(heap)
+
+        if len(heap) == 0:
+            return neutral(manager)
+
+        counter = len(heap)
+        while len(heap) > 1:
+            first = heapq.heappop(heap)[2]
+            second = heapq.heappop(heap)[2]
+            if conjunction:
+                result = first & second
+            else:
+                result = first | second
+            del first, second
+            if early_exit and result == absorbing(manager):
+                return result
+            heapq.heappush(heap, (result.size, counter, result))
+            counter += 1
+        return heap[0][2]
+    _reduce_all = staticmethod(_reduce_all)
+
+    def _conjoin_all(bdds, manager=None, early_exit=True):
+        """
+        Returns the conjunction of all BDDs in the given list.
+        The operands are combined in a balanced way, smallest operands
+        first. If early_exit is True, ZERO is returned as soon as it
+        occurs as an operand or as an intermediate result.
+        The manager is needed only if the list may be empty.
+        """
+        return BDD._reduce_all(bdds, manager, True, early_exit)
+    conjoin_all = staticmethod(_conjoin_all)
+
+    def _disjoin_all(bdds, manager=None, early_exit=True):
+        """
+        Returns the disjunction of all BDDs in the given list.
+        The operands are combined in a balanced way, smallest operands
+        first. If early_exit is True, ONE is returned as soon as it
+        occurs as an operand or as an intermediate result.
+        The manager is needed only if the list may be empty.
+        """
+        return BDD._reduce_all(bdds, manager, False, early_exit)
+    disjoin_all = staticmethod(_disjoin_all)
+
+    def _ite(condition, then_bdd, else_bdd):
+        """
+        Returns the BDD for 'if condition then then_bdd else else_bdd',
+        computed with a single ITE operation.
+        """
+        manager = condition.__manager
+        if then_bdd.__manager != manager or else_bdd.__manager != manager:
+            raise MardukException("Operation on BDDs from different managers not possible!")
+        tmp = dd.bdd_ite(manager, condition.__ptr, then_bdd.__ptr, else_bdd.__ptr)
+        return BDD._adopt(tmp, manager, "ite*")
+    ite = staticmethod(_ite)
+
     def get_ith_var(mgr, i):
         ptr = dd.bdd_new_var_with_index(mgr, i)
-        result = BDD(ptr, mgr, name="%d-th var" % i)
-        dd.bdd_free(mgr, ptr)
-        return result
+        return BDD._adopt(ptr, mgr, name="%d-th var" % i)
     ith_var = staticmethod(get_ith_var)
 
     def get_new_var(mgr):
         ptr = dd.bdd_new_var(mgr)
-        result = BDD(ptr, mgr, name="new var")
-        dd.bdd_free(mgr, ptr)
-        return result
+        return BDD._adopt(ptr, mgr, name="new var")
     new_var = staticmethod(get_new_var)
 
     def _living_names(delimiter="\n"):
         result = ""
-        for name in BDD.living_names_list:
-            result += name + delimiter
+        for (name, count) in BDD.living_names_count.items():
+            result += (name + delimiter) * count
         return result
     living_names = staticmethod(_living_names)
 
+    def _add_living_name(name):
+        BDD.living_names_count[name] = BDD.living_names_count.get(name, 0) + 1
+    _add_living_name = staticmethod(_add_living_name)
+
+    def _remove_living_name(name):
+        count = BDD.living_names_count[name] - 1
+        if count == 0:
+            del BDD.living_names_count[name]
+        else:
+            BDD.living_names_count[name] = count
+    _remove_living_name = staticmethod(_remove_living_name)
+
+    def _adopt(ptr, manager, name="NO NAME!!"):
+        """
+        Creates a new instance, which takes over the given bdd_ptr.
+        In contrast to the constructor, no duplicate is created. Thus
+        the given pointer must NOT be freed by the caller anymore.
+        This is meant for pointers which are returned by operations of
+        the NuSMV wrapper, and which would otherwise be freed directly
+        after wrapping them.
+        """
+        if len(name) > 100:
+            name = "long name"
+
+        BDD.num_instances += 1
+        BDD._add_living_name(name)
+
+        result = object.__new__(BDD)
+        result.__ptr = ptr
+        result.__manager = manager
+        result.__name = name
+        return result
+    _adopt = staticmethod(_adopt)
+
     def __init__(self, ptr, manager, name="NO NAME!!", dest_mgr=None):
         """
         Creates a new instance, which wraps the given bdd_ptr.
@@ -123,7 +261,7 @@ class BDD(object):
             name = "long name"
         
         BDD.num_instances += 1
-        BDD.living_names_list.append(name)
+        BDD._add_living_name(name)
 
         if dest_mgr:
             self.__manager = dest_mgr
@@ -142,12 +280,39 @@ class BDD(object):
         dereferenced in CUDD.)
         """
         BDD.num_instances -= 1
-        BDD.living_names_list.remove(self.__name)
+        BDD._remove_living_name(self.__name)
         dd.bdd_free(self.__manager, self.__ptr)
 
 
     def __str__(self):
         return(str(self.__ptr))
+
+    def __hash__(self):
+        """
+        Hashes by the DD manager, the node and the complement bit of the
+        internal pointer. Thus BDD objects can be used directly as keys
+        of dictionaries and as elements of sets.
+        """
+        return hash(self.get_key())
+
+    def get_key(self):
+        """
+        Returns a tuple (manager, node, complement bit), which identifies
+        the function represented by this object. Two BDD objects have
+        the same key iff they are equal.
+        """
+        address = int(self.__ptr)
+        return (int(self.__manager), address & ~1, address & 1)
+    key = property(get_key)
+
+    def get_is_complemented(self):
+        """
+        Returns True iff the internal pointer is a complemented edge.
+        (CUDD stores the complement bit in the least significant bit of
+        the pointer.)
+        """
+        return (int(self.__ptr) & 1) == 1
+    is_complemented = property(get_is_complemented)
         
     def get_ptr(self):
         """
@@ -165,10 +330,18 @@ class BDD(object):
     def get_name(self):
         return self.__name
     def set_name(self, new_name):
+        """
+        Renames self. The shared constants (see ONE and ZERO) are never
+        renamed, as every other user of the constant would see the new
+        name; rename a copy instead.
+        """
+        if self.is_shared_constant():
+            return
         if len(new_name) > 100:
             new_name = "long name"
         if new_name != "":
-            BDD.living_names_list[BDD.living_names_list.index(self.__name)] = new_name
+            BDD._remove_living_name(self.__name)
+            BDD._add_living_name(new_name)
             self.__name = new_name
         else:
             raise MardukException("Empty new name not allowed!")
@@ -225,19 +398,82 @@ class BDD(object):
         The resulting BDD object is returned.
         """
         result_ptr = dd.bdd_transfer(self.__manager, dest_mgr, self.__ptr)
-        result = BDD(result_ptr, dest_mgr, name='transfer of %s' % self.name)
-        dd.bdd_free(dest_mgr, result_ptr)
-        return result
+        return BDD._adopt(result_ptr, dest_mgr, name='transfer of %s' % self.name)
     
     def support(self):
         """
         Return a bdd which is build by the product of the variables of the support.
         """
         support_ptr = dd.bdd_support(self.__manager, self.__ptr)
-        support =  BDD(support_ptr, self.__manager, name="support of %s" % self.name)
-        dd.bdd_free(self.__manager, support_ptr)
-        return support
+        return BDD._adopt(support_ptr, self.__manager, name="support of %s" % self.name)
     
+    def support_indices(self):
+        """
+        Returns the list of the indices of the variables in the support.
+        """
+        indices = []
+        cube = self.support()
+        while not cube.isOne():
+            indices.append(cube.index)
+            cube = cube.THEN
+        return indices
+
+    def serialize(self):
+        """
+        Returns a representation of self which does not depend on the DD
+        manager: A tuple (nodes, root). 'nodes' is a list of tuples
+        (variable index, then, else), where then, else and root are tuples
+        (position in nodes, complement bit). Position 0 is the constant ONE
+        (and None in the list). The children of a node always precede it.
+        The result can be pickled and rebuilt with BDD.deserialize in any
+        manager with the same variable indices (e.g. in another process).
+
+        The nodes are visited on the internal pointers, without creating
+        BDD objects: They are kept alive by self. bdd_then, bdd_else and
+        bdd_index ignore the complement bit of their argument.
+        """
+        manager = self.__manager
+        positions = {BDD.ONE(manager).key[1]: 0}
+        nodes = [None]
+        stack = [self.__ptr]
+        while len(stack) > 0:
+            ptr = stack[-1]
+            address = int(ptr) & ~1
+            if positions.has_key(address):
+                stack.pop()
+                continue
+            children = (dd.bdd_then(manager, ptr), dd.bdd_else(manager, ptr))
+            pending = [child for child in children if not positions.has_key(int(child) & ~1)]
+            if len(pending) > 0:
+                stack.extend(pending)
+                continue
+            stack.pop()
+            positions[address] = len(nodes)
+            references = [(positions[int(child) & ~1], int(child) & 1) for child in children]
+            nodes.append((dd.bdd_index(manager, ptr), references[0], references[1]))
+        key = self.key
+        return (nodes, (positions[key[1]], key[2]))
+
+    def deserialize(data, manager):
+        """
+        Rebuilds a BDD in the given manager from the result of serialize.
+        Every node is rebuilt with a single ITE.
+        """
+        (nodes, root) = data
+        functions = [BDD.ONE(manager)]
+        variables = {}
+        def resolve(reference):
+            (position, complemented) = reference
+            if complemented:
+                return ~functions[position]
+            return functions[position]
+        for (index, then_ref, else_ref) in nodes[1:]:
+            if not variables.has_key(index):
+                variables[index] = BDD.ith_var(manager, index)
+            functions.append(BDD.ite(variables[index], resolve(then_ref), resolve(else_ref)))
+        return resolve(root)
+    deserialize = staticmethod(deserialize)
+
     def copy(self):
         """
         Creates and returns a copy of self.
@@ -286,17 +522,23 @@ class BDD(object):
         for var in x + y:
             if self.__manager != var.__manager:
                 raise MardukException("Operation on BDDs from different managers not possible!")
-        x_list = [var.ptr for var in x]
-        y_list = [var.ptr for var in y]
+        # The objects in x and y keep their pointers alive during the call,
+        # so no duplicates are needed.
+        x_list = [var.__ptr for var in x]
+        y_list = [var.__ptr for var in y]
         tuple = (x_list, y_list)
         result_ptr = dd.bdd_swap_variables(self.__manager, self.__ptr, tuple)
-        for ptr in x_list:
-            dd.bdd_free(self.__manager, ptr)
-        for ptr in y_list:
-            dd.bdd_free(self.__manager, ptr)
-        result = BDD(result_ptr, self.__manager, "swap_vars*")
-        dd.bdd_free(self.__manager, result_ptr)
-        return result
+        return BDD._adopt(result_ptr, self.__manager, "swap_vars*")
+
+    def permute(self, permutation):
+        """
+        Permutes the variables of self: Variable i is replaced by variable
+        permutation[i]. The permutation is a list of variable indices, which
+        must cover all variables of the DD manager. The resulting BDD is
+        returned.
+        """
+        result_ptr = dd.bdd_permute(self.__manager, self.__ptr, permutation)
+        return BDD._adopt(result_ptr, self.__manager, "permute*")
 
     def compose(self, var, func):
         """
@@ -306,9 +548,7 @@ class BDD(object):
             raise MardukException("Operation on BDDs from different managers not possible!")
         index = dd.bdd_index(self.__manager, var.__ptr)        
         result_ptr = dd.bdd_compose(self.__manager, self.__ptr, func.__ptr, index)
-        result = BDD(result_ptr, self.__manager, "compose*")
-        dd.bdd_free(self.__manager, result_ptr)
-        return result
+        return BDD._adopt(result_ptr, self.__manager, "compose*")
     
     def exists(self, vars_cube):
         """
@@ -322,9 +562,7 @@ class BDD(object):
         if self.__manager != vars_cube.__manager:
             raise MardukException("Operation on BDDs from different managers not possible!")
         result_ptr = dd.bdd_forsome(self.__manager, self.__ptr, vars_cube.__ptr)
-        result = BDD(result_ptr, self.__manager, "exists*")
-        dd.bdd_free(self.__manager, result_ptr)
-        return result
+        return BDD._adopt(result_ptr, self.__manager, "exists*")
 
     def forall(self, vars_cube):
         """
@@ -338,9 +576,7 @@ class BDD(object):
         if self.__manager != vars_cube.__manager:
             raise MardukException("Operation on BDDs from different managers not possible!")        
         result_ptr = dd.bdd_forall(self.__manager,self.__ptr,vars_cube.__ptr)
-        result = BDD(result_ptr, self.__manager, "forall*")
-        dd.bdd_free(self.__manager, result_ptr)
-        return result
+        return BDD._adopt(result_ptr, self.__manager, "forall*")
 
     def andExists(self, bdd2, vars_cube):
         """
@@ -355,9 +591,7 @@ class BDD(object):
         if self.__manager != bdd2.__manager or self.__manager != vars_cube.__manager:
             raise MardukException("Operation on BDDs from different managers not possible!")
         result_ptr = dd.bdd_and_abstract(self.__manager,self.__ptr,bdd2.__ptr,vars_cube.__ptr)
-        result = BDD(result_ptr, self.__manager,"andExists*")
-        dd.bdd_free(self.__manager, result_ptr)
-        return result
+        return BDD._adopt(result_ptr, self.__manager, "andExists*")
 
 
     def calculate_value(self, values):
@@ -489,9 +723,7 @@ class BDD(object):
         if self.__manager != other.__manager:
             raise MardukException("Operation on BDDs from different managers not possible!")
         tmp = dd.bdd_or(self.__manager, self.__ptr, other.__ptr)
-        result = BDD(tmp, self.__manager, "(" + self.name + " + " + other.name + ")")
-        dd.bdd_free(self.__manager, tmp)
-        return result
+        return BDD._adopt(tmp, self.__manager, "(" + self.name + " + " + other.name + ")")
 
     def __ior__(self, other):
         """
@@ -504,8 +736,7 @@ class BDD(object):
         if self.__manager != other.__manager:
             raise MardukException("Operation on BDDs from different managers not possible!")
         tmp = dd.bdd_or(self.__manager, self.__ptr, other.__ptr)
-        dd.bdd_free(self.__manager, self.__ptr)
-        self.__ptr = tmp
+        return BDD._adopt(tmp, self.__manager, self.__name)
 
         
     def __add__(self, other):
@@ -528,9 +759,7 @@ class BDD(object):
         if self.__manager != other.__manager:
             raise MardukException("Operation on BDDs from different managers not possible!")
         tmp = dd.bdd_or(self.__manager, self.__ptr, other.__ptr)
-        dd.bdd_free(self.__manager, self.__ptr)
-        self.__ptr = tmp
-        return self
+        return BDD._adopt(tmp, self.__manager, self.__name)
 
     #-------------------------------------------------------------
     
@@ -544,9 +773,7 @@ class BDD(object):
         if self.__manager != other.__manager:
             raise MardukException("Operation on BDDs from different managers not possible!")
         tmp = dd.bdd_and(self.__manager, self.__ptr, other.__ptr)
-        result = BDD(tmp, self.__manager, "(" + self.name + " * " + other.name + ")")
-        dd.bdd_free(self.__manager, tmp)
-        return result
+        return BDD._adopt(tmp, self.__manager, "(" + self.name + " * " + other.name + ")")
 
     def __iand__(self, other):
         """
@@ -559,9 +786,7 @@ class BDD(object):
         if self.__manager != other.__manager:
             raise MardukException("Operation on BDDs from different managers not possible!")
         tmp = dd.bdd_and(self.__manager, self.__ptr, other.__ptr)
-        dd.bdd_free(self.__manager, self.__ptr)
-        self.__ptr = tmp
-        return self
+        return BDD._adopt(tmp, self.__manager, self.__name)
 
     def __mul__(self, other):
         """
@@ -583,9 +808,7 @@ class BDD(object):
         if self.__manager != other.__manager:
             raise MardukException("Operation on BDDs from different managers not possible!")
         tmp = dd.bdd_and(self.__manager, self.__ptr, other.__ptr)
-        dd.bdd_free(self.__manager,self.__ptr)
-        self.__ptr = tmp
-        return self
+        return BDD._adopt(tmp, self.__manager, self.__name)
 
     
     #-------------------------------------------------------------
@@ -600,9 +823,7 @@ class BDD(object):
         if self.__manager != other.__manager:
             raise MardukException("Operation on BDDs from different managers not possible!")
         tmp = dd.bdd_xor(self.__manager, self.__ptr, other.__ptr)
-        result = BDD(tmp, self.__manager, "xor*")
-        dd.bdd_free(self.__manager, tmp)
-        return result
+        return BDD._adopt(tmp, self.__manager, "xor*")
 
     def __ixor__(self, other):
         """
@@ -615,9 +836,7 @@ class BDD(object):
         if self.__manager != other.__manager:
             raise MardukException("Operation on BDDs from different managers not possible!")
         tmp = dd.bdd_xor(self.__manager, self.__ptr, other.__ptr)
-        dd.bdd_free(self.__manager, self.__ptr)
-        self.__ptr = tmp
-        return self
+        return BDD._adopt(tmp, self.__manager, self.__name)
     
 
     #-------------------------------------------------------------
@@ -628,9 +847,7 @@ class BDD(object):
         Returns the result of the NOT operation of self.
         """
         tmp = dd.bdd_not(self.__manager, self.__ptr)
-        result = BDD(tmp, self.__manager, "!" + self.name)
-        dd.bdd_free(self.__manager, tmp)
-        return result
+        return BDD._adopt(tmp, self.__manager, "!" + self.name)
 
     #-------------------------------------------------------------
     
@@ -645,9 +862,7 @@ class BDD(object):
         if self.__manager != other.__manager:
             raise MardukException("Operation on BDDs from different managers not possible!")
         tmp = dd.bdd_cofactor(self.__manager, self.__ptr, other.__ptr)
-        result = BDD(tmp, self.__manager, "cof*")
-        dd.bdd_free(self.__manager, tmp)
-        return result
+        return BDD._adopt(tmp, self.__manager, "cof*")
 
     def __idiv__(self, other):
         """
@@ -660,9 +875,7 @@ class BDD(object):
         if self.__manager != other.__manager:
             raise MardukException("Operation on BDDs from different managers not possible!")
         tmp = dd.bdd_cofactor(self.__manager, self.__ptr, other.__ptr)
-        dd.bdd_free(self.__manager, self.__ptr)
-        self.__ptr = tmp
-        return self
+        return BDD._adopt(tmp, self.__manager, self.__name)
     
 
     
@@ -676,9 +889,7 @@ class BDD(object):
         if self.__manager != other.__manager:
             raise MardukException("Operation on BDDs from different managers not possible!")
         tmp = dd.bdd_minimize(self.__manager, self.__ptr, other.__ptr)
-        result = BDD(tmp, self.__manager, "restrict*")
-        dd.bdd_free(self.__manager, tmp)
-        return result
+        return BDD._adopt(tmp, self.__manager, "restrict*")
 
     def __ifloordiv__(self, other):
         """
@@ -691,9 +902,42 @@ class BDD(object):
         if self.__manager != other.__manager:
             raise MardukException("Operation on BDDs from different managers not possible!")
         tmp = dd.bdd_minimize(self.__manager, self.__ptr, other.__ptr)
-        dd.bdd_free(self.__manager, self.__ptr)
-        self.__ptr = tmp
-        return self
+        return BDD._adopt(tmp, self.__manager, self.__name)
+
+    def squeeze(self, care):
+        """
+        Returns a small BDD which agrees with self on the care set, i.e.,
+        a BDD between (self * care) and (self + ~care) (cf. Cudd_bddSqueeze).
+        """
+        return BDD.between(self * care, self + ~care)
+
+    def _li_compaction_function():
+        """
+        Returns the function for LI-compaction of the NuSMV wrapper, or None
+        if the wrapper does not provide it.
+        Only the bdd_* level function is accepted: Like all bdd_* functions
+        it returns a referenced node, which can be adopted. The raw
+        Cudd_bddLICompaction returns an unreferenced node.
+        """
+        return getattr(dd, "bdd_li_compaction", None)
+    _li_compaction_function = staticmethod(_li_compaction_function)
+
+    def has_li_compaction():
+        return BDD._li_compaction_function() != None
+    has_li_compaction = staticmethod(has_li_compaction)
+
+    def li_compaction(self, care):
+        """
+        Returns the result of the LI-compaction of self with respect to the
+        care set (cf. Hong et al., Cudd_bddLICompaction).
+        """
+        function = BDD._li_compaction_function()
+        if function == None:
+            raise MardukException("The NuSMV wrapper does not provide LI-compaction!")
+        if self.__manager != care.__manager:
+            raise MardukException("Operation on BDDs from different managers not possible!")
+        tmp = function(self.__manager, self.__ptr, care.__ptr)
+        return BDD._adopt(tmp, self.__manager, "licompaction*")
 
 
     #--------------------------------------------------------------
@@ -0,0 +1,192 @@
+##  ===========================================================================
+##  Author: Georg Hofferek <georg.hofferek@iaik.tugraz.at>
+##
+##  Copyright (c) 2009, 2010 by Graz University of Technology
+##
+##  This is free software; you can redistribute it and/or
+##  modify it under the terms of the GNU Lesser General Public
+##  License as published by the Free Software Foundation; either
+##  version 2 of the License, or (at your option) any later version.
+##
+##  This software is distributed in the hope that it will be useful,
+##  but WITHOUT ANY WARRANTY; without even the implied warranty of
+##  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+##  Lesser General Public License for more details.
+##
+##  You should have received a copy of the GNU Lesser General Public
+##  License along with this library; if not, write to the Free Software
+##  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307  USA.
+##
+##  For more information about this software see <http://rat.fbk.eu/ratsy>
+##  or email to the RATSY Team <ratsy@list.fbk.eu>.
+##  Please report bugs to <ratsy@list.fbk.eu>.
+##
+##  ===========================================================================
+
+
+
+"""
+This module contains checkpoints of the winning region computation.
+"""
+
+import os
+import time
+
+
+class Checkpoint(object):
+    """
+    Stores the state of a long fixpoint computation in a directory, such
+    that it can be resumed after a crash.
+
+    Every checkpoint consists of a set of named BDDs (stored in DDDMP
+    format, see dddmp), a dictionary with further (JSON serializable)
+    state, such as loop indices, and the variable ordering (in the format
+    of marduk_utils.print_variable_ordering). A checkpoint is written into
+    a new subdirectory. Only after it is complete, the file LATEST is
+    replaced to point to it, and the previous checkpoint is removed. Thus
+    a crash while writing leaves the previous checkpoint intact.
+
+    A checkpoint is due (see due()) if 'interval' seconds of wall clock
+    time or 'iterations' calls of due() have passed since the last
+    checkpoint. A value of 0 disables the respective criterion.
+    """
+
+    LATEST = "LATEST"
+    STATE = "state.json"
+    ORDER = "order"
+    SUFFIX = ".dddmp"
+
+    def __init__(self, directory, interval=0, iterations=0):
+        self.__directory = directory
+        self.__interval = interval
+        self.__iterations = iterations
+        self.__count = 0
+        self.__last_time = self.__wall_time()
+
+
+    def get_directory(self):
+        return self.__directory
+    directory = property(get_directory)
+
+
+    def __wall_time(self):
+        # Not CPU time: With worker processes (--jobs), most of the work is
+        # not done in this process.
+        return time.time()
+
+
+    def due(self):
+        """
+        Counts an iteration and returns True if a checkpoint should be
+        written now.
+        """
+        self.__count += 1
+        if self.__iterations > 0 and self.__count >= self.__iterations:
+            return True
+        if self.__interval > 0 and self.__wall_time() - self.__last_time >= self.__interval:
+            return True
+        return False
+
+
+    def __latest_name(self):
+        path = os.path.join(self.__directory, Checkpoint.LATEST)
+        if not os.path.isfile(path):
+            return None
+        file = open(path, 'r')
+        try:
+            return file.read().strip()
+        finally:
+            file.close()
+
+
+    def save(self, state, bdds, ordering, var_names):
+        """
+        Writes a checkpoint. 'state' is a dictionary, 'bdds' maps names to
+        BDDs, 'ordering' is the variable ordering as a string, and
+        'var_names' maps variable indices to names (for the DDDMP files).
+        """
+        import json
+        import shutil
+        import dddmp
+
+        if not os.path.isdir(self.__directory):
+            os.makedirs(self.__directory)
+        previous = self.__latest_name()
+        sequence = 0
+        if previous != None:
+            sequence = int(previous.split("-")[-1]) + 1
+        name = "checkpoint-%06d" % sequence
+        path = os.path.join(self.__directory, name)
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+        os.makedirs(path)
+
+        for (bdd_name, bdd) in bdds.items():
+            dddmp.store_bdd(os.path.join(path, bdd_name + Checkpoint.SUFFIX), bdd, var_names, bdd_name)
+        file = open(os.path.join(path, Checkpoint.ORDER), 'w')
+        try:
+            file.write(ordering + "\n")
+        finally:
+            file.close()
+        state = dict(state)
+        state['bdds'] = bdds.keys()
+        file = open(os.path.join(path, Checkpoint.STATE), 'w')
+        try:
+            json.dump(state, file, sort_keys=True, indent=1)
+        finally:
+            file.close()
+
+        latest = os.path.join(self.__directory, Checkpoint.LATEST)
+        tmp_latest = "%s.%d.tmp" % (latest, os.getpid())
+        file = open(tmp_latest, 'w')
+        try:
+            file.write(name + "\n")
+        finally:
+            file.close()
+        os.rename(tmp_latest, latest)
+
+        if previous != None:
+            shutil.rmtree(os.path.join(self.__directory, previous), True)
+        self.__count = 0
+        self.__last_time = self.__wall_time()
+
+
+    def load_ordering(self):
+        """
+        Returns the variable ordering (string) of the latest checkpoint, or
+        None if there is no checkpoint.
+        """
+        name = self.__latest_name()
+        if name == None:
+            return None
+        file = open(os.path.join(self.__directory, name, Checkpoint.ORDER), 'r')
+        try:
+            return file.read().strip()
+        finally:
+            file.close()
+
+
+    def load(self, manager, var_names):
+        """
+        Loads the latest checkpoint into the given manager. Returns a tuple
+        (state, bdds) as given to save, or None if there is no checkpoint.
+        The names of the variables in the DDDMP files must match
+        'var_names'.
+        """
+        import json
+        import dddmp
+
+        name = self.__latest_name()
+        if name == None:
+            return None
+        path = os.path.join(self.__directory, name)
+        file = open(os.path.join(path, Checkpoint.STATE), 'r')
+        try:
+            state = json.load(file)
+        finally:
+            file.close()
+        bdds = {}
+        for bdd_name in state.pop('bdds'):
+            bdds[str(bdd_name)] = dddmp.load_bdd(os.path.join(path, bdd_name + Checkpoint.SUFFIX),
+                                                 manager, var_names)
+        return (state, bdds)
@@ -355,7 +355,7 @@ class CodeGenerator(object):
             #print ("Input: %s Index: %s" % (var.name, var.get_ps_bdd_ptr().get_index()))
             input_names.append(var.name)
             self.add_input(var.name)
-            wires[str(var.ns)] = var.name
+            wires[var.ns] = var.name
             initial = marduk_utils.get_init_value_from_bdd(var, self.__marduk.winning_region.init12 * self.__marduk.winning_region.initjx)
             self.add_flipflop(var.name + "_ps", var.name, initial)
             indices[var.ps.get_index()] = var.name +"_ps"
@@ -368,7 +368,7 @@ class CodeGenerator(object):
                 continue
             #print ("Type: %s \t Name: %s Index: %s" % (var.type, var.name, var.get_ps_bdd_ptr().get_index()))
             output_names.append(var.name)
-            wires[str(var.ps)] = var.name + "_ps"
+            wires[var.ps] = var.name + "_ps"
             initial  = marduk_utils.get_init_value_from_bdd(var, marduk.winning_region.init12 * marduk.winning_region.initjx)
             self.add_flipflop(var.name + "_ps", None, initial)
             indices[var.ps.get_index()] = var.name +"_ps"
@@ -380,7 +380,7 @@ class CodeGenerator(object):
             before = resource.getrusage(resource.RUSAGE_SELF).ru_utime + resource.getrusage(resource.RUSAGE_SELF).ru_stime
             functions = {}
             from nusmv import dd
-            self.__dd_mgr = dd.create_dd_manager(0,0,251,131071,0)  # Values from PerlDD
+            self.__dd_mgr = marduk.create_dd_manager()
             if marduk.dyn_reorder:
                 dd.dd_autodyn_enable(self.__dd_mgr, marduk.dyn_reorder_method)
 
@@ -422,20 +422,18 @@ class CodeGenerator(object):
 
   
     def isOneOrZero(self, bdd_object, manager):
-        if(str(bdd_object) == str(bdd_object.ONE(bdd_object.mgr))):
+        if(bdd_object.isOne()):
             return "one"; 
-        elif(str(bdd_object) == str(bdd_object.ZERO(bdd_object.mgr))):
+        elif(bdd_object.isZero()):
             return "zero"; 
         else:
             return 0;
     
-    ##FIX ME:
     """
-    deteting if edge is an inverse by checking the 3rd sign in the Pointer, 
-    edge is inverse isf the signe is 1
+    detecting if edge is an inverse by checking the complement bit of the pointer
     """        
     def detect_inverse_edge(self, function):
-        if(str(function)[2] == '1'):
+        if(function.is_complemented):
             return 1
         else:
             return 0
@@ -454,11 +452,12 @@ class CodeGenerator(object):
         Check if function or the inverse of the function is already calulated
         if inverse is handled, just inverse it
         """
-        if(str(function) in handled_functions):
-            return handled_functions[str(function)]
-        elif(str(~function) in handled_functions):
-            res = self.add_not(handled_functions[str(~function)])
-            handled_functions[str(function)] = res
+        if(function in handled_functions):
+            return handled_functions[function]
+        inverse = ~function
+        if(inverse in handled_functions):
+            res = self.add_not(handled_functions[inverse])
+            handled_functions[function] = res
             
             return res
             
@@ -469,11 +468,11 @@ class CodeGenerator(object):
         
         if(is_inverse == 1):
             inv_res = self.add_not(res)
-            handled_functions[str(function)] = inv_res
-            handled_functions[str(~function)] = res
+            handled_functions[function] = inv_res
+            handled_functions[inverse] = res
             return inv_res
         else:
-            handled_functions[str(function)] = res        
+            handled_functions[function] = res        
                         
         return res
         
@@ -727,7 +726,7 @@ class BlifGenerator(CodeGenerator):
 
         if marduk.transfer_functions:
             from nusmv import dd
-            self.__dd_mgr = dd.create_dd_manager(0,0,251,131071,0)  # Values from PerlDD
+            self.__dd_mgr = marduk.create_dd_manager()
             if marduk.dyn_reorder:
                 dd.dd_autodyn_enable(self.__dd_mgr, marduk.dyn_reorder_method)
 
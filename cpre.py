@@ -0,0 +1,237 @@
+##  ===========================================================================
+##  Author: Georg Hofferek <georg.hofferek@iaik.tugraz.at>
+##
+##  Copyright (c) 2009, 2010 by Graz University of Technology
+##
+##  This is free software; you can redistribute it and/or
+##  modify it under the terms of the GNU Lesser General Public
+##  License as published by the Free Software Foundation; either
+##  version 2 of the License, or (at your option) any later version.
+##
+##  This software is distributed in the hope that it will be useful,
+##  but WITHOUT ANY WARRANTY; without even the implied warranty of
+##  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+##  Lesser General Public License for more details.
+##
+##  You should have received a copy of the GNU Lesser General Public
+##  License along with this library; if not, write to the Free Software
+##  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307  USA.
+##
+##  For more information about this software see <http://rat.fbk.eu/ratsy>
+##  or email to the RATSY Team <ratsy@list.fbk.eu>.
+##  Please report bugs to <ratsy@list.fbk.eu>.
+##
+##  ===========================================================================
+
+
+"""
+This module contains the engine for controllable predecessors (mixed
+preimages) of the system and of the environment.
+"""
+
+from partitioned_relation import PartitionedRelation
+
+
+class CPreEngine(object):
+    """
+    Computes mixed preimages for a game given by the transition relations
+    of the environment and of the system:
+
+    system(S)            = forall i': (trans1 -> exists o': trans2 * S')
+    environment(S)       = exists i': (trans1 * forall o': (trans2 -> S'))
+    environment_moves(S) = trans1 * forall o': (trans2 -> S')
+
+    where i' and o' are the next state inputs and outputs and S' is S with
+    present and next state variables swapped. The transition relations are
+    either BDDs or PartitionedRelations. For BDDs, their negations are
+    computed once and kept.
+
+    Results are memoized in a bounded table per kind of preimage. The key
+    is the node of the given set of states, which is kept alive by the
+    table, such that it can not be reused for another set meanwhile. If the
+    table is full, the oldest entry is dropped.
+
+    Call update() whenever the transition relations or the cubes may have
+    changed. It clears the tables only if they did change.
+    """
+
+    DEFAULT_MEMO_SIZE = 32
+
+    SYSTEM = "system"
+    ENVIRONMENT = "environment"
+    ENVIRONMENT_MOVES = "environment_moves"
+
+    def __init__(self, env_trans, sys_trans, input_cube, output_cube, swap, memo_size=DEFAULT_MEMO_SIZE):
+        """
+        'swap' is a function, which swaps present and next state variables
+        of a BDD (e.g. VariableRegistry.swap).
+        """
+        self.__swap = swap
+        self.__memo_size = memo_size
+        self.__hits = {}
+        self.__misses = {}
+        for kind in (CPreEngine.SYSTEM, CPreEngine.ENVIRONMENT, CPreEngine.ENVIRONMENT_MOVES):
+            self.__hits[kind] = 0
+            self.__misses[kind] = 0
+        self.__env_trans = None
+        self.__sys_trans = None
+        self.__input_cube = None
+        self.__output_cube = None
+        self.__not_env_trans = None
+        self.__not_sys_trans = None
+        self.clear()
+        self.update(env_trans, sys_trans, input_cube, output_cube)
+
+
+    def __identity(self, operand):
+        if operand == None or isinstance(operand, PartitionedRelation):
+            return id(operand)
+        return operand.key
+
+
+    def update(self, env_trans, sys_trans, input_cube, output_cube):
+        """
+        Sets the transition relations and cubes. If any of them differs from
+        the current one, the memo tables are cleared.
+        """
+        new = [env_trans, sys_trans, input_cube, output_cube]
+        old = [self.__env_trans, self.__sys_trans, self.__input_cube, self.__output_cube]
+        if [self.__identity(operand) for operand in new] == [self.__identity(operand) for operand in old]:
+            return
+
+        self.__env_trans = env_trans
+        self.__sys_trans = sys_trans
+        self.__input_cube = input_cube
+        self.__output_cube = output_cube
+        self.__not_env_trans = None
+        self.__not_sys_trans = None
+        if env_trans != None and not isinstance(env_trans, PartitionedRelation):
+            self.__not_env_trans = ~env_trans
+        if sys_trans != None and not isinstance(sys_trans, PartitionedRelation):
+            self.__not_sys_trans = ~sys_trans
+        self.clear()
+
+
+    def clear(self):
+        """
+        Clears the memo tables (but not the statistics).
+        """
+        self.__memo = {}
+        self.__memo_order = {}
+        for kind in self.__hits.keys():
+            self.__memo[kind] = {}
+            self.__memo_order[kind] = []
+
+
+    def __lookup(self, kind, states):
+        entry = self.__memo[kind].get(states.key)
+        if entry == None:
+            self.__misses[kind] += 1
+            return None
+        self.__hits[kind] += 1
+        return entry[1]
+
+    def __store(self, kind, states, result):
+        if self.__memo_size <= 0:
+            return
+        order = self.__memo_order[kind]
+        if len(order) >= self.__memo_size:
+            del self.__memo[kind][order.pop(0)]
+        self.__memo[kind][states.key] = (states, result)
+        order.append(states.key)
+
+
+    def system(self, states):
+        """
+        Returns all states from which the system can force the play into
+        'states' in one step.
+        """
+        result = self.__lookup(CPreEngine.SYSTEM, states)
+        if result != None:
+            return result
+
+        swapped_states = self.__swap(states)
+        if isinstance(self.__sys_trans, PartitionedRelation):
+            sys_moves_to_target = self.__sys_trans.and_exists(swapped_states, self.__output_cube)
+        else:
+            sys_moves_to_target = swapped_states.andExists(self.__sys_trans, self.__output_cube)
+
+        if isinstance(self.__env_trans, PartitionedRelation):
+            result = ~(self.__env_trans.and_exists(~sys_moves_to_target, self.__input_cube))
+        else:
+            result = (sys_moves_to_target + self.__not_env_trans).forall(self.__input_cube)
+
+        self.__store(CPreEngine.SYSTEM, states, result)
+        return result
+
+
+    def __env_moves_to_target(self, states):
+        swapped_states = self.__swap(states)
+        if isinstance(self.__sys_trans, PartitionedRelation):
+            return ~(self.__sys_trans.and_exists(~swapped_states, self.__output_cube))
+        return (self.__not_sys_trans + swapped_states).forall(self.__output_cube)
+
+
+    def environment(self, states):
+        """
+        Returns all states from which the environment can force the play
+        into 'states' in one step.
+        """
+        result = self.__lookup(CPreEngine.ENVIRONMENT, states)
+        if result != None:
+            return result
+
+        env_moves_to_target = self.__env_moves_to_target(states)
+        if isinstance(self.__env_trans, PartitionedRelation):
+            result = self.__env_trans.and_exists(env_moves_to_target, self.__input_cube)
+        else:
+            result = env_moves_to_target.andExists(self.__env_trans, self.__input_cube)
+
+        self.__store(CPreEngine.ENVIRONMENT, states, result)
+        return result
+
+
+    def environment_moves(self, states):
+        """
+        Returns all pairs (state, next input), such that the environment can
+        force the play from the state into 'states' with the next input.
+        """
+        result = self.__lookup(CPreEngine.ENVIRONMENT_MOVES, states)
+        if result != None:
+            return result
+
+        env_moves_to_target = self.__env_moves_to_target(states)
+        if isinstance(self.__env_trans, PartitionedRelation):
+            result = self.__env_trans.conjoin(env_moves_to_target)
+        else:
+            result = env_moves_to_target * self.__env_trans
+
+        self.__store(CPreEngine.ENVIRONMENT_MOVES, states, result)
+        return result
+
+
+    def get_stats(self):
+        """
+        Returns a dictionary, which maps every kind of preimage to a tuple
+        (hits, misses) of the memo table.
+        """
+        result = {}
+        for kind in self.__hits.keys():
+            result[kind] = (self.__hits[kind], self.__misses[kind])
+        return result
+    stats = property(get_stats)
+
+
+    def format_stats(self):
+        """
+        Returns a list of lines, which summarize the hits and misses of the
+        memo tables of all kinds of preimages that were used.
+        """
+        lines = []
+        for kind in (CPreEngine.SYSTEM, CPreEngine.ENVIRONMENT, CPreEngine.ENVIRONMENT_MOVES):
+            (hits, misses) = (self.__hits[kind], self.__misses[kind])
+            if hits + misses == 0:
+                continue
+            lines.append("%s preimages: %d computed, %d from memo (hit rate %.3f)" % \
+                         (kind, misses, hits, float(hits) / (hits + misses)))
+        return lines
@@ -0,0 +1,145 @@
+##  ===========================================================================
+##  Author: Georg Hofferek <georg.hofferek@iaik.tugraz.at>
+##
+##  Copyright (c) 2009, 2010 by Graz University of Technology
+##
+##  This is free software; you can redistribute it and/or
+##  modify it under the terms of the GNU Lesser General Public
+##  License as published by the Free Software Foundation; either
+##  version 2 of the License, or (at your option) any later version.
+##
+##  This software is distributed in the hope that it will be useful,
+##  but WITHOUT ANY WARRANTY; without even the implied warranty of
+##  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+##  Lesser General Public License for more details.
+##
+##  You should have received a copy of the GNU Lesser General Public
+##  License along with this library; if not, write to the Free Software
+##  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307  USA.
+##
+##  For more information about this software see <http://rat.fbk.eu/ratsy>
+##  or email to the RATSY Team <ratsy@list.fbk.eu>.
+##  Please report bugs to <ratsy@list.fbk.eu>.
+##
+##  ===========================================================================
+
+
+
+"""
+This module contains the don't care minimizers for BDDs, i.e., functions
+which return a small BDD that agrees with a given one on a care set.
+"""
+
+import resource
+
+
+RESTRICT = "restrict"
+CONSTRAIN = "constrain"
+LICOMPACTION = "licompaction"
+SQUEEZE = "squeeze"
+
+# All minimizers, in the order in which they are tried.
+ALL = [RESTRICT, CONSTRAIN, LICOMPACTION, SQUEEZE]
+
+# Selects the best of all minimizers (see minimize_best).
+AUTO = "auto"
+
+
+def _cpu_time():
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+
+def parse(names):
+    """
+    Parses a comma separated list of minimizers ("all" for all available
+    ones), and returns the list of names. Raises a MardukException for
+    unknown minimizers and for minimizers which are not available.
+    """
+    from marduk_utils import MardukException
+    if names.strip() == "all":
+        return [name for name in ALL if available(name)]
+    result = [name.strip() for name in names.split(",") if name.strip() != ""]
+    for name in result:
+        if not name in ALL:
+            raise MardukException("Unknown don't care minimizer '%s'. Allowed values: %s, all" % \
+                                  (name, ", ".join(ALL)))
+        if not available(name):
+            raise MardukException("Don't care minimizer '%s' is not available in the NuSMV wrapper" % name)
+    return result
+
+
+def check(name):
+    """
+    Raises a MardukException if the given minimizer (or auto) is unknown or
+    not available, and returns it otherwise.
+    """
+    from marduk_utils import MardukException
+    if name != AUTO and not name in ALL:
+        raise MardukException("Unknown don't care minimizer '%s'. Allowed values: %s, %s" % \
+                              (name, ", ".join(ALL), AUTO))
+    if name != AUTO and not available(name):
+        raise MardukException("Don't care minimizer '%s' is not available in the NuSMV wrapper" % name)
+    return name
+
+
+def available(name):
+    """
+    Returns True if the given minimizer can be used with the NuSMV wrapper.
+    """
+    from bddwrap import BDD
+    if name == LICOMPACTION:
+        return BDD.has_li_compaction()
+    return True
+
+
+def minimize(name, bdd, care):
+    """
+    Returns the result of the given minimizer for bdd with respect to the
+    care set. The result agrees with bdd on care. Constrain is not defined
+    for an empty care set, restrict is used instead.
+    """
+    if name == CONSTRAIN and care.isZero():
+        return bdd // care
+    if name == RESTRICT:
+        return bdd // care
+    if name == CONSTRAIN:
+        return bdd / care
+    if name == LICOMPACTION:
+        return bdd.li_compaction(care)
+    if name == SQUEEZE:
+        return bdd.squeeze(care)
+    from marduk_utils import MardukException
+    raise MardukException("Unknown don't care minimizer '%s'" % name)
+
+
+def minimize_best(bdd, care, names, budget=None):
+    """
+    Tries all given (and available) minimizers and returns a tuple
+    (result, name, report): The smallest result (bdd itself, if no
+    minimizer makes it smaller), the name of the minimizer which produced
+    it (None for bdd itself), and a list of tuples (name, size, time) for
+    all tried minimizers. If a budget (CPU time in seconds) is given, no
+    further minimizer is tried once it is exceeded.
+    """
+    if care.isZero():
+        # Constrain is not defined for an empty care set.
+        return (bdd, None, [])
+    best = bdd
+    best_name = None
+    best_size = bdd.size
+    report = []
+    start = _cpu_time()
+    for name in names:
+        if not available(name):
+            continue
+        if budget != None and len(report) > 0 and _cpu_time() - start > budget:
+            break
+        before = _cpu_time()
+        result = minimize(name, bdd, care)
+        size = result.size
+        report.append((name, size, _cpu_time() - before))
+        if size < best_size:
+            (best, best_name, best_size) = (result, name, size)
+        del result
+    return (best, best_name, report)
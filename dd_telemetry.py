@@ -0,0 +1,269 @@
+##  ===========================================================================
+##  Author: Georg Hofferek <georg.hofferek@iaik.tugraz.at>
+##
+##  Copyright (c) 2009, 2010 by Graz University of Technology
+##
+##  This is free software; you can redistribute it and/or
+##  modify it under the terms of the GNU Lesser General Public
+##  License as published by the Free Software Foundation; either
+##  version 2 of the License, or (at your option) any later version.
+##
+##  This software is distributed in the hope that it will be useful,
+##  but WITHOUT ANY WARRANTY; without even the implied warranty of
+##  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+##  Lesser General Public License for more details.
+##
+##  You should have received a copy of the GNU Lesser General Public
+##  License along with this library; if not, write to the Free Software
+##  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307  USA.
+##
+##  For more information about this software see <http://rat.fbk.eu/ratsy>
+##  or email to the RATSY Team <ratsy@list.fbk.eu>.
+##  Please report bugs to <ratsy@list.fbk.eu>.
+##
+##  ===========================================================================
+
+
+"""
+This module collects statistics of DD managers for the single phases
+of synthesis.
+"""
+
+from nusmv import dd
+import resource
+
+
+# Counters of CUDD which are read at the beginning and at the end of a
+# phase. The statistics of a phase contain the difference.
+# Maps the name of the counter to the name of the reading function.
+CUMULATIVE_COUNTERS = {
+    'cache_lookups'     : 'Cudd_ReadCacheLookUps',
+    'cache_hits'        : 'Cudd_ReadCacheHits',
+    'unique_lookups'    : 'Cudd_ReadUniqueLookUps',
+    'unique_links'      : 'Cudd_ReadUniqueLinks',
+    'gc_runs'           : 'Cudd_ReadGarbageCollections',
+    'gc_time_ms'        : 'Cudd_ReadGarbageCollectionTime',
+    'reorderings'       : 'Cudd_ReadReorderings',
+    'reordering_time_ms': 'Cudd_ReadReorderingTime',
+    }
+
+# Values of CUDD which are read at the end of a phase. The peak number of
+# live nodes is counted since the creation of the manager; it is read at
+# the beginning of a phase as well to derive the peak of the phase.
+ABSOLUTE_VALUES = {
+    'peak_live_nodes_since_start': 'Cudd_ReadPeakLiveNodeCount',
+    'live_nodes'        : 'Cudd_ReadNodeCount',
+    'memory_in_use'     : 'Cudd_ReadMemoryInUse',
+    }
+
+
+# Names of the reading functions which are missing in the NuSMV wrapper
+# and for which a warning was printed already.
+_missing_functions = set()
+
+
+def read_dd_value(manager, function_name):
+    """
+    Reads a value from the given DD manager with the given function of the
+    NuSMV wrapper. Returns None if the wrapper does not provide the function.
+    A warning is printed the first time a function is missing.
+    """
+    function = getattr(dd, function_name, None)
+    if function == None:
+        if function_name not in _missing_functions:
+            _missing_functions.add(function_name)
+            print "WARNING: The NuSMV wrapper does not provide '%s'. The corresponding DD statistics are not available." % \
+                  function_name
+        return None
+    return function(manager)
+
+
+def read_dd_counters(manager):
+    """
+    Returns a dictionary with the current values of all cumulative counters
+    of the given DD manager.
+    """
+    result = {}
+    for (name, function_name) in CUMULATIVE_COUNTERS.items():
+        result[name] = read_dd_value(manager, function_name)
+    return result
+
+
+def _ratio(numerator, denominator):
+    if numerator == None or denominator == None or denominator == 0:
+        return None
+    return float(numerator) / denominator
+
+
+class DDTelemetry(object):
+    """
+    Collects statistics of one or more DD managers for a sequence of
+    phases. Call begin(name) at the start of every phase, and end() after
+    the last one. Beginning a new phase ends the current one.
+
+    For every phase and every manager, the following values are recorded:
+    The differences of the cumulative counters of CUDD (computed table and
+    unique table lookups, garbage collections, reorderings), the computed
+    table hit rate, the number of unique table links per lookup, the peak
+    number of live nodes of the phase, the current number of live nodes at
+    the end of the phase, and the larger of the memory in use at the
+    beginning and at the end of the phase. Values which can not be read
+    from the NuSMV wrapper are None.
+
+    CUDD neither resets its peaks nor counts unique table misses. The peak
+    of a phase is derived from the peak since the start, which is read at
+    the beginning and at the end of the phase: If it grew, the phase
+    reached the new peak, which is exact ('peak_live_nodes_exact'). If not,
+    the peak of the phase is only bounded by it. The same holds for the
+    peak resident set size of the process ('max_rss_kb'). There is no peak
+    of the memory in use of a manager, and no unique table hit rate.
+    """
+
+    def __init__(self, managers):
+        """
+        'managers' is a list of tuples (name, DD manager).
+        """
+        self.__managers = managers[:]
+        self.__phases = []
+        self.__current = None
+        self.__begin_counters = None
+        self.__begin_memory = None
+        self.__begin_peak = None
+        self.__begin_rss = None
+        self.__begin_time = None
+
+
+    def add_manager(self, name, manager):
+        """
+        Adds a DD manager, which is created after the telemetry, e.g. during
+        a phase. Its counters are assumed to start from zero.
+        """
+        self.__managers.append((name, manager))
+        if self.__current != None:
+            self.__begin_counters[name] = {}
+            for counter in CUMULATIVE_COUNTERS.keys():
+                self.__begin_counters[name][counter] = 0
+            self.__begin_memory[name] = None
+            self.__begin_peak[name] = 0
+
+
+    def __cpu_time(self):
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+        return usage.ru_utime + usage.ru_stime
+
+
+    def begin(self, phase):
+        """
+        Ends the current phase (if any) and begins the given one.
+        """
+        self.end()
+        self.__current = phase
+        self.__begin_counters = {}
+        self.__begin_memory = {}
+        self.__begin_peak = {}
+        for (name, manager) in self.__managers:
+            self.__begin_counters[name] = read_dd_counters(manager)
+            self.__begin_memory[name] = read_dd_value(manager, ABSOLUTE_VALUES['memory_in_use'])
+            self.__begin_peak[name] = read_dd_value(manager, ABSOLUTE_VALUES['peak_live_nodes_since_start'])
+        self.__begin_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        self.__begin_time = self.__cpu_time()
+
+
+    def end(self):
+        """
+        Ends the current phase and stores its statistics.
+        """
+        if self.__current == None:
+            return
+
+        max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        phase = {'name': self.__current,
+                 'cpu_time': self.__cpu_time() - self.__begin_time,
+                 'max_rss_kb': max_rss,
+                 'max_rss_exact': max_rss > self.__begin_rss,
+                 'managers': {}}
+
+        for (name, manager) in self.__managers:
+            stats = {}
+            counters = read_dd_counters(manager)
+            for counter in CUMULATIVE_COUNTERS.keys():
+                before = self.__begin_counters[name][counter]
+                after = counters[counter]
+                if before == None or after == None:
+                    stats[counter] = None
+                else:
+                    stats[counter] = after - before
+            for (value, function_name) in ABSOLUTE_VALUES.items():
+                stats[value] = read_dd_value(manager, function_name)
+
+            stats['peak_live_nodes'] = stats['peak_live_nodes_since_start']
+            stats['peak_live_nodes_exact'] = self.__begin_peak[name] != None and stats['peak_live_nodes'] != None and \
+                                             stats['peak_live_nodes'] > self.__begin_peak[name]
+            stats['memory_in_use_max_endpoints'] = stats['memory_in_use']
+            if self.__begin_memory[name] > stats['memory_in_use_max_endpoints']:
+                stats['memory_in_use_max_endpoints'] = self.__begin_memory[name]
+            stats['cache_hit_rate'] = _ratio(stats['cache_hits'], stats['cache_lookups'])
+            stats['unique_links_per_lookup'] = _ratio(stats['unique_links'], stats['unique_lookups'])
+            phase['managers'][name] = stats
+
+        self.__phases.append(phase)
+        self.__current = None
+
+
+    def get_phases(self):
+        """
+        Returns the list of statistics of all finished phases. Every entry is
+        a dictionary with the keys 'name', 'cpu_time', 'max_rss_kb' and
+        'managers'. The latter maps the name of a manager to a dictionary
+        with its statistics.
+        """
+        return self.__phases[:]
+    phases = property(get_phases)
+
+
+    def as_dict(self):
+        """
+        Returns the statistics as a dictionary, which maps the name of a
+        phase to its statistics (see get_phases).
+        """
+        result = {}
+        for phase in self.__phases:
+            result[phase['name']] = phase
+        return result
+
+
+    def format_lines(self):
+        """
+        Returns a list of lines, which summarize the statistics of all
+        finished phases.
+        """
+        def fmt(value, format):
+            if value == None:
+                return "n/a"
+            return format % value
+
+        def bound(value, exact):
+            if value == None:
+                return "n/a"
+            if exact:
+                return "%d" % value
+            return "<= %d" % value
+
+        lines = []
+        for phase in self.__phases:
+            lines.append("   %s (%.2f seconds, peak RSS %s KB)" % \
+                         (phase['name'], phase['cpu_time'], bound(phase['max_rss_kb'], phase['max_rss_exact'])))
+            for (name, manager) in self.__managers:
+                if not phase['managers'].has_key(name):
+                    # The manager was created after this phase.
+                    continue
+                stats = phase['managers'][name]
+                lines.append("     %-8s peak nodes %s, live nodes %s, memory in use (max of begin/end) %s bytes" % \
+                             (name, bound(stats['peak_live_nodes'], stats['peak_live_nodes_exact']),
+                              fmt(stats['live_nodes'], "%d"), fmt(stats['memory_in_use_max_endpoints'], "%d")))
+                lines.append("     %-8s cache hit rate %s, unique links/lookup %s" % \
+                             ("", fmt(stats['cache_hit_rate'], "%.3f"), fmt(stats['unique_links_per_lookup'], "%.3f")))
+                lines.append("     %-8s GC runs %s (%s ms), reorderings %s (%s ms)" % \
+                             ("", fmt(stats['gc_runs'], "%d"), fmt(stats['gc_time_ms'], "%d"),
+                              fmt(stats['reorderings'], "%d"), fmt(stats['reordering_time_ms'], "%d")))
+        return lines
@@ -0,0 +1,157 @@
+##  ===========================================================================
+##  Author: Georg Hofferek <georg.hofferek@iaik.tugraz.at>
+##
+##  Copyright (c) 2009, 2010 by Graz University of Technology
+##
+##  This is free software; you can redistribute it and/or
+##  modify it under the terms of the GNU Lesser General Public
+##  License as published by the Free Software Foundation; either
+##  version 2 of the License, or (at your option) any later version.
+##
+##  This software is distributed in the hope that it will be useful,
+##  but WITHOUT ANY WARRANTY; without even the implied warranty of
+##  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+##  Lesser General Public License for more details.
+##
+##  You should have received a copy of the GNU Lesser General Public
+##  License along with this library; if not, write to the Free Software
+##  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307  USA.
+##
+##  For more information about this software see <http://rat.fbk.eu/ratsy>
+##  or email to the RATSY Team <ratsy@list.fbk.eu>.
+##  Please report bugs to <ratsy@list.fbk.eu>.
+##
+##  ===========================================================================
+
+
+
+"""
+This module stores BDDs in files in the ASCII format of DDDMP (the
+decision diagram dump package of CUDD), and loads them again.
+"""
+
+import os
+
+
+def _support_of(nodes):
+    indices = list(set([node[0] for node in nodes[1:]]))
+    indices.sort()
+    return indices
+
+
+def _file_id(reference):
+    # In DDDMP, the constant is node 1, and complemented edges are
+    # negative ids.
+    (position, complemented) = reference
+    if complemented:
+        return -(position + 1)
+    return position + 1
+
+
+def store_bdd(file_name, bdd, var_names, dd_name="bdd"):
+    """
+    Stores the given BDD in the given file (DDDMP-2.0, mode A, variable ids
+    as node information). 'var_names' maps variable indices to names. Only
+    the names of the variables in the support are written.
+    The file is written to a temporary file first, and then renamed, such
+    that a crash never leaves a partially written file behind.
+    """
+    from bddwrap import BDD
+
+    (nodes, root) = bdd.serialize()
+    support = _support_of(nodes)
+    compact = {}
+    for position in range(0, len(support)):
+        compact[support[position]] = position
+    names = [var_names.get(index, "v%d" % index) for index in support]
+    levels = [BDD.ith_var(bdd.mgr, index).level for index in support]
+
+    tmp_file_name = "%s.%d.tmp" % (file_name, os.getpid())
+    file = open(tmp_file_name, 'w')
+    try:
+        file.write(".ver DDDMP-2.0\n")
+        file.write(".mode A\n")
+        file.write(".varinfo 0\n")
+        file.write(".dd %s\n" % dd_name)
+        file.write(".nnodes %d\n" % len(nodes))
+        file.write(".nvars %d\n" % (max([0] + support) + 1))
+        file.write(".nsuppvars %d\n" % len(support))
+        file.write(".suppvarnames %s\n" % " ".join(names))
+        file.write(".ids %s\n" % " ".join([str(index) for index in support]))
+        file.write(".permids %s\n" % " ".join([str(level) for level in levels]))
+        file.write(".nroots 1\n")
+        file.write(".rootids %d\n" % _file_id(root))
+        file.write(".nodes\n")
+        file.write("1 T 1 0 0\n")
+        for position in range(1, len(nodes)):
+            (index, then_ref, else_ref) = nodes[position]
+            file.write("%d %d %d %d %d\n" % (position + 1, index, compact[index],
+                                             _file_id(then_ref), _file_id(else_ref)))
+        file.write(".end\n")
+    finally:
+        file.close()
+    os.rename(tmp_file_name, file_name)
+
+
+def load_bdd(file_name, manager, var_names=None):
+    """
+    Loads a BDD from a file in the format written by store_bdd (DDDMP, mode
+    A, variable ids as node information) into the given manager. If
+    'var_names' (a map from variable indices to names) is given, the names
+    of the support variables in the file must match.
+    """
+    from bddwrap import BDD
+    from marduk_utils import MardukException
+
+    file = open(file_name, 'r')
+    try:
+        header = {}
+        for line in file:
+            line = line.strip()
+            if line == ".nodes":
+                break
+            if line.startswith("."):
+                fields = line.split(None, 1)
+                header[fields[0]] = (fields[1:] + [""])[0]
+
+        if header.get(".mode") != "A" or header.get(".varinfo") != "0":
+            raise MardukException("%s: Only DDDMP files in mode A with variable ids are supported" % file_name)
+        if var_names != None and header.has_key(".suppvarnames"):
+            ids = [int(index) for index in header[".ids"].split()]
+            names = header[".suppvarnames"].split()
+            for (index, name) in zip(ids, names):
+                if var_names.get(index, "v%d" % index) != name:
+                    raise MardukException("%s: Variable %d is %s in the file, but %s in the manager" % \
+                                          (file_name, index, name, var_names.get(index)))
+
+        functions = {}
+        variables = {}
+        def resolve(file_id):
+            if file_id < 0:
+                return ~functions[-file_id]
+            return functions[file_id]
+
+        for line in file:
+            fields = line.split()
+            if fields == [".end"]:
+                break
+            node_id = int(fields[0])
+            if fields[1] == "T":
+                if fields[2] == "0":
+                    functions[node_id] = BDD.ZERO(manager)
+                else:
+                    functions[node_id] = BDD.ONE(manager)
+                continue
+            index = int(fields[1])
+            if not variables.has_key(index):
+                variables[index] = BDD.ith_var(manager, index)
+            functions[node_id] = BDD.ite(variables[index], resolve(int(fields[-2])), resolve(int(fields[-1])))
+    finally:
+        file.close()
+
+    result = resolve(int(header[".rootids"].split()[0]))
+    if result.isOne() or result.isZero():
+        # Do not rename the shared constants.
+        result = result.copy()
+    result.name = header.get(".dd", "NO NAME!!")
+    return result
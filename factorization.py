@@ -34,7 +34,7 @@ class FactorizationGenerator(FunctionGenerator):
 
     def __init__(self, var_wires, dd_mgr, code_generator=None, marduk_vars=None, num_class_vectors=1024, strat_dc=None ):
         """
-        'var_wires' is supposed to be a dictionary which maps the string representation of a BDD object
+        'var_wires' is supposed to be a dictionary which maps a BDD object (of a literal)
         to the corresponding signal in the code generator, for all inputs (and their negations) on which the function(s) to be
         handled by this Generator depend.
         """
@@ -103,8 +103,8 @@ class FactorizationGenerator(FunctionGenerator):
             assert(self._function_cache.cacheSize == 0)  # If the cache is non-empty, there should be close functions
             print "[DBG]: No close_functions found. Using top literal of (f, fd) as fallback."
             literal = marduk_utils.top_variable(f, fd)
-            self._function_cache.update(literal, self._wires[str(literal)])
-            divisors = [self._wires[str(literal)]]
+            self._function_cache.update(literal, self._wires[literal])
+            divisors = [self._wires[literal]]
         else:
             print "[DBG]: Close functions:", close_functions
             divisors = close_functions
@@ -201,7 +201,7 @@ class FactorizationGenerator(FunctionGenerator):
 
         x = marduk_utils.top_variable(f, fd)
 
-        print "[DBG]: Chose literal", self._wires[str(x)]
+        print "[DBG]: Chose literal", self._wires[x]
 
         (f0, f1) = self.decompose_bdd(f, x)
         (fd0, fd1) = self.decompose_bdd(fd, x)
@@ -209,7 +209,7 @@ class FactorizationGenerator(FunctionGenerator):
         r0 = self.factor_interval(f0, fd0, cube*(~x))
         del f0, fd0
 
-        neg_wire = self._code_generator.add_and((r0[1], self._wires[str(~x)]))
+        neg_wire = self._code_generator.add_and((r0[1], self._wires[~x]))
         neg_bdd = r0[0] * ~x
         del r0
         self._function_cache.update(neg_bdd, neg_wire)
@@ -217,7 +217,7 @@ class FactorizationGenerator(FunctionGenerator):
         r1 = self.factor_interval(f1, fd1, cube*x)
         del f1, fd1
 
-        pos_wire = self._code_generator.add_and((r1[1], self._wires[str(x)]))
+        pos_wire = self._code_generator.add_and((r1[1], self._wires[x]))
         pos_bdd = r1[0] * x
         del r1
         self._function_cache.update(pos_bdd, pos_wire)
@@ -0,0 +1,170 @@
+#!/usr/bin/env python
+
+##  ===========================================================================
+##  Author: Georg Hofferek <georg.hofferek@iaik.tugraz.at>
+##
+##  Copyright (c) 2009, 2010 by Graz University of Technology
+##
+##  This is free software; you can redistribute it and/or
+##  modify it under the terms of the GNU Lesser General Public
+##  License as published by the Free Software Foundation; either
+##  version 2 of the License, or (at your option) any later version.
+##
+##  This software is distributed in the hope that it will be useful,
+##  but WITHOUT ANY WARRANTY; without even the implied warranty of
+##  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+##  Lesser General Public License for more details.
+##
+##  You should have received a copy of the GNU Lesser General Public
+##  License along with this library; if not, write to the Free Software
+##  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307  USA.
+##
+##  For more information about this software see <http://rat.fbk.eu/ratsy>
+##  or email to the RATSY Team <ratsy@list.fbk.eu>.
+##  Please report bugs to <ratsy@list.fbk.eu>.
+##
+##  ===========================================================================
+
+
+"""
+This module contains the tracing of fixpoint iterations as a stream of
+JSON events (one per line), and a summariser for such traces.
+"""
+
+from optparse import OptionParser
+import sys
+import time
+
+
+def _wall_time():
+    return time.time()
+
+
+class FixpointTracer(object):
+    """
+    Writes one event per fixpoint iteration to a file, as a JSON object per
+    line. Every event has the keys
+
+    computation  the fixpoint computation, e.g. "winning_region"
+    loop         the loop level, e.g. "z", "y" or "x"
+    iteration    the number of the iteration within the current loop
+    size         the number of BDD nodes of the iterate
+    live_nodes   the number of live nodes of the DD manager of the iterate
+    time         the wall clock time since the tracer was created
+    step         the wall clock time since the previous event
+
+    and additionally the indices of the enclosing loops (e.g. "j", "r",
+    "i"). The step time of an event is spent in the loop of the event
+    (not counting any nested loop which emits events itself), so the
+    step times can be summed up per loop (see summarize).
+
+    If no file name is given, the tracer is disabled, and event() returns
+    immediately. Thus the fixpoint computations can call it
+    unconditionally.
+
+    Worker processes (see worker_pool) inherit the open file and the start
+    time, and their events are appended to the same trace. Wall clock time
+    is used, since the CPU time of a forked worker starts from zero again.
+    With workers, the steps of an enclosing loop contain the time it waits
+    for them, which overlaps with the steps of the workers' events.
+    """
+
+    def __init__(self, file_name=None):
+        self.__file = None
+        if file_name != None:
+            self.__file = open(file_name, 'w')
+        self.__start = _wall_time()
+        self.__last = self.__start
+
+
+    def get_enabled(self):
+        return self.__file != None
+    enabled = property(get_enabled)
+
+
+    def event(self, computation, loop, iteration, iterate, **indices):
+        """
+        Writes the event for an iteration of the given loop of the given
+        computation, which computed 'iterate' (a BDD).
+        """
+        if self.__file == None:
+            return
+        import json
+        from dd_telemetry import read_dd_value, ABSOLUTE_VALUES
+
+        now = _wall_time()
+        event = {'computation': computation,
+                 'loop': loop,
+                 'iteration': iteration,
+                 'size': iterate.size,
+                 'live_nodes': read_dd_value(iterate.mgr, ABSOLUTE_VALUES['live_nodes']),
+                 'time': now - self.__start,
+                 'step': now - self.__last}
+        event.update(indices)
+        self.__file.write(json.dumps(event, sort_keys=True) + "\n")
+        self.__file.flush()
+        # Do not count the time for writing the event.
+        self.__last = _wall_time()
+
+
+    def close(self):
+        if self.__file != None:
+            self.__file.close()
+            self.__file = None
+
+
+def summarize(lines):
+    """
+    Summarizes the events given as JSON lines. Returns a list of tuples
+    (computation, loop, iterations, time, max size, max live nodes), sorted
+    by decreasing time. The max live nodes are None, if unknown.
+    """
+    import json
+    totals = {}
+    for line in lines:
+        line = line.strip()
+        if line == "":
+            continue
+        event = json.loads(line)
+        key = (event['computation'], event['loop'])
+        (iterations, time, max_size, max_live) = totals.get(key, (0, 0.0, 0, None))
+        # The live nodes are None, if they can not be read from the NuSMV
+        # wrapper.
+        if event['live_nodes'] != None and (max_live == None or event['live_nodes'] > max_live):
+            max_live = event['live_nodes']
+        totals[key] = (iterations + 1, time + event['step'], max(max_size, event['size']), max_live)
+
+    result = [key + value for (key, value) in totals.items()]
+    result.sort(key=lambda entry: entry[3], reverse=True)
+    return result
+
+
+def main():
+    parser = OptionParser(usage="usage: %prog TRACE\n\n"
+                          "Shows where the time of the fixpoint computations in the given trace "
+                          "(written with marduk --trace-fixpoints) goes.")
+    (options, args) = parser.parse_args()
+    if len(args) != 1:
+        parser.print_help()
+        sys.exit(-1)
+
+    file = open(args[0], 'r')
+    try:
+        entries = summarize(file)
+    finally:
+        file.close()
+
+    overall = sum([entry[3] for entry in entries])
+    print "Computation           Loop   Iterations   Time [s]   Share   Max size   Max live nodes"
+    for (computation, loop, iterations, time, max_size, max_live) in entries:
+        share = 0.0
+        if overall > 0:
+            share = time / overall
+        if max_live == None:
+            max_live = "n/a"
+        print "%-20s  %4s   %10d   %8.2f   %5.1f%%   %8d   %14s" % \
+              (computation, loop, iterations, time, share * 100, max_size, max_live)
+
+
+if __name__ == "__main__":
+    main()
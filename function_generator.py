@@ -64,7 +64,7 @@ class FunctionGenerator(object):
 
     def __init__(self, var_wires, dd_mgr, code_generator=None, marduk_vars=None, num_class_vectors=1024, strat_dc=None):
         """
-        'var_wires' is supposed to be a dictionary which maps the string representation of a BDD object
+        'var_wires' is supposed to be a dictionary which maps a BDD object (of a literal)
         to the corresponding signal in the code generator, for all inputs (and their negations) on which the function(s) to be
         handled by this IrrsopGenerator depend.
         """
@@ -114,8 +114,8 @@ class FunctionGenerator(object):
         
         if len(self._wires) > 0 or self._code_generator != None:
             gen = self._code_generator
-            pos_x_wire = self._wires[str(x)]
-            neg_x_wire = self._wires[str(~x)]
+            pos_x_wire = self._wires[x]
+            neg_x_wire = self._wires[~x]
             pos = gen.add_and((pos_x_wire, r1[1]))
             self._function_cache.update(x * r1[0], pos)
             neg = gen.add_and((neg_x_wire, r0[1]))
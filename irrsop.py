@@ -53,7 +53,7 @@ class IrrsopGenerator(FunctionGenerator):
     #----------------------------------------------------------------------
     def __init__(self, var_wires, dd_mgr, code_generator=None, marduk_vars=None, num_class_vectors=1024, strat_dc=None):
         """
-        'var_wires' is supposed to be a dictionary which maps the string representation of a BDD object
+        'var_wires' is supposed to be a dictionary which maps a BDD object (of a literal)
         to the corresponding signal in the code generator, for all inputs (and their negations) on which the function(s) to be
         handled by this IrrsopGenerator depend.
         """
@@ -40,6 +40,11 @@ from code_generator import BlifGenerator
 from code_generator import HifGenerator
 from code_generator import BlifFromGatesGenerator
 from bddwrap import BDD
+from variable_registry import VariableRegistry
+from dd_telemetry import DDTelemetry
+from order_cache import OrderCache
+from checkpoint import Checkpoint
+from fixpoint_trace import FixpointTracer
 import marduk_utils
 from marduk_utils import MardukException
 from nusmv import dd
@@ -53,14 +58,20 @@ class MardukOptions(object):
         self.mode = None
         self.language = None
         self.partition = None
+        self.cluster_threshold = 1000
         self.dyn_reorder = False
         self.reorder1 = False
         self.reorder2 = False
         self.kill = False
         self.one_hot = False
+        self.warm_start = False
+        self.jobs = 1
+        self.check_realizability = False
         self.verbose = 0
-        self.reorder_method = "SIFT_CONV"
-        self.dyn_reorder_method = "SIFT"
+        self.reorder_method = "GROUP_SIFT_CONV"
+        self.dyn_reorder_method = "GROUP_SIFT"
+        self.no_var_groups = False
+        self.var_order = ""
         self.dac04 = False
         self.dac_search_mode = None
         self.dac_recur_limit = None
@@ -72,6 +83,21 @@ class MardukOptions(object):
         self.dont_care_upper_bound = False
         self.check_combinations = False
         self.transfer_functions = False
+        self.memory_limit = None
+        self.order_cache = None
+        self.cache_size_ratio = None
+        self.trace_fixpoints = None
+        self.checkpoint_dir = None
+        self.checkpoint_interval = 600
+        self.checkpoint_iterations = 0
+        self.resume = None
+        self.spill_arrays = False
+        self.spill_dir = None
+        self.compact_strategy = None
+        self.output_order = "default"
+        self.output_order_budget = 60.0
+        self.dc_minimizer = "restrict"
+        self.dc_minimizer_budget = 10.0
 
 class Marduk(object):
     """
@@ -89,9 +115,13 @@ class Marduk(object):
         self.__options = options
         self.__args = args
 
-         # Initialize DD manager for synthesis.
-        from nusmv import dd
-        self.__dd_manager = dd.create_dd_manager(0,0,251,131071,0)  # Values from PerlDD
+        # The DD manager for synthesis is created on first access (see
+        # get_dd_manager), i.e., after the specification has been read.
+        # Thus its tables can be sized according to the number of variables.
+        self.__dd_manager = None
+        self.__dd_telemetry = DDTelemetry([("nusmv", dd.cvar.dd_manager)])
+        self.__fixpoint_tracer = FixpointTracer(options.trace_fixpoints)
+        self.__checkpoint = None
 
 
         self.__printed_lines = ["This file was automatically synthesized with Marduk.",
@@ -257,6 +287,17 @@ class Marduk(object):
             if self.__dac_search_mode == 'bfs' and self.__dac_call_limit == None:
                 self.println("WARNING: Using DAC'04 in BFS mode without a call limit!")
                 self.println("         Run time and memory consumption might become very high!")                
+
+        # Parsed here, such that invalid minimizers are reported before
+        # the synthesis starts.
+        import dc_minimizers
+        if options.compact_strategy == None:
+            self.__compact_strategy = []
+        else:
+            self.__compact_strategy = dc_minimizers.parse(options.compact_strategy)
+        import output_order
+        self.__output_order = output_order.check(options.output_order)
+        self.__dc_minimizer = dc_minimizers.check(options.dc_minimizer)
                 
                          
             
@@ -385,10 +426,12 @@ class Marduk(object):
             
         if options.dyn_reorder:
             dd.dd_autodyn_enable(dd.cvar.dd_manager, self.__dyn_reorder_method)
-            dd.dd_autodyn_enable(self.__dd_manager, self.__dyn_reorder_method)
         else:
             dd.dd_autodyn_disable(dd.cvar.dd_manager)
-            dd.dd_autodyn_disable(self.__dd_manager)
+
+        if options.cache_size_ratio != None and not (0 < options.cache_size_ratio < 1):
+            self.println("WARNING: Cache size ratio must be between 0 and 1! Using default instead.")
+            options.cache_size_ratio = None
         
 
         if self.__verbose > 0:
@@ -402,6 +445,7 @@ class Marduk(object):
         self.__strategy = None
         self.__output_functions = None
         self.__code_generator = None
+        self.__realizable = None
         self.__variables = []
 
        
@@ -450,6 +494,10 @@ class Marduk(object):
         return self.__partition
     partition = property(get_partition)
 
+    def get_cluster_threshold(self):
+        return self.__options.cluster_threshold
+    cluster_threshold = property(get_cluster_threshold)
+
     def get_var_order(self):
         return self.__options.var_order
     var_order = property(get_var_order)
@@ -504,7 +552,15 @@ class Marduk(object):
         return self.__variables[:]
     def set_variables(self, variables):
         self.__variables = variables[:]
+        registry = self.var_registry
+        for type in (marduk_utils.VariableType.INPUT, marduk_utils.VariableType.OUTPUT,
+                     marduk_utils.VariableType.STATE):
+            registry.set_variables(type, [var for var in self.__variables if var.type == type])
     vars = property(get_variables, set_variables)
+
+    def get_var_registry(self):
+        return VariableRegistry.get(self.dd_mgr)
+    var_registry = property(get_var_registry)
     
     def get_input_variables(self):
         return [var for var in self.__variables if var.type == marduk_utils.VariableType.INPUT]
@@ -544,9 +600,186 @@ class Marduk(object):
     specification = property(get_specification, set_specification)
 
     def get_dd_manager(self):
+        if self.__dd_manager == None:
+            self.__dd_manager = self.create_dd_manager()
+            if self.dyn_reorder:
+                dd.dd_autodyn_enable(self.__dd_manager, self.__dyn_reorder_method)
+            else:
+                dd.dd_autodyn_disable(self.__dd_manager)
+            self.__dd_telemetry.add_manager("marduk", self.__dd_manager)
         return self.__dd_manager
     dd_mgr = property(get_dd_manager)
 
+    def get_check_realizability(self):
+        return self.__options.check_realizability
+    check_realizability = property(get_check_realizability)
+
+    def get_realizable(self):
+        """
+        Returns True or False after the winning region was computed (or
+        realizability was checked), and None before.
+        """
+        return self.__realizable
+    realizable = property(get_realizable)
+
+    def get_jobs(self):
+        return self.__options.jobs
+    jobs = property(get_jobs)
+
+    def get_spill_arrays(self):
+        return self.__options.spill_arrays
+    spill_arrays = property(get_spill_arrays)
+
+    def get_spill_dir(self):
+        return self.__options.spill_dir
+    spill_dir = property(get_spill_dir)
+
+    def get_compact_strategy(self):
+        """
+        Returns the list of don't care minimizers for the compaction of the
+        strategy (empty, if the strategy is not compacted).
+        """
+        return self.__compact_strategy[:]
+    compact_strategy = property(get_compact_strategy)
+
+    def get_output_order(self):
+        """
+        Returns the heuristic for the order of the outputs (see output_order).
+        """
+        return self.__output_order
+    output_order = property(get_output_order)
+
+    def get_output_order_budget(self):
+        return self.__options.output_order_budget
+    output_order_budget = property(get_output_order_budget)
+
+    def get_dc_minimizer(self):
+        """
+        Returns the don't care minimizer for the output functions in cofactor
+        mode (see dc_minimizers).
+        """
+        return self.__dc_minimizer
+    dc_minimizer = property(get_dc_minimizer)
+
+    def get_dc_minimizer_budget(self):
+        return self.__options.dc_minimizer_budget
+    dc_minimizer_budget = property(get_dc_minimizer_budget)
+
+    def get_warm_start(self):
+        return self.__options.warm_start
+    warm_start = property(get_warm_start)
+
+    def get_var_groups(self):
+        return not self.__options.no_var_groups
+    var_groups = property(get_var_groups)
+
+    def get_order_cache(self):
+        if self.__options.order_cache == None:
+            return None
+        return OrderCache(self.__options.order_cache)
+    order_cache = property(get_order_cache)
+
+    def get_checkpoint(self):
+        """
+        Returns the Checkpoint for the winning region computation, or None
+        if neither --checkpoint-dir nor --resume is given. Without
+        --checkpoint-dir, the checkpoints are written to the directory
+        given with --resume.
+        """
+        if self.__checkpoint == None:
+            directory = self.__options.checkpoint_dir
+            if directory == None:
+                directory = self.__options.resume
+            if directory == None:
+                return None
+            self.__checkpoint = Checkpoint(directory, self.__options.checkpoint_interval,
+                                           self.__options.checkpoint_iterations)
+        return self.__checkpoint
+    checkpoint = property(get_checkpoint)
+
+    def get_resume(self):
+        """
+        Returns True iff the winning region computation should be resumed
+        from the latest checkpoint (--resume).
+        """
+        return self.__options.resume != None
+    resume = property(get_resume)
+
+    def apply_cached_order(self):
+        """
+        Looks up the current set of variables in the order cache (if
+        --order-cache is given) and applies the stored ordering.
+        Returns True iff an ordering for exactly this set of variables was
+        found. (If only an ordering for a similar set of variables was
+        found, it is merged with the current ordering and applied, but
+        False is returned.)
+        """
+        cache = self.order_cache
+        if cache == None:
+            return False
+        current = OrderCache.split(marduk_utils.print_variable_ordering(self.vars))
+        (ordering, exact) = cache.lookup(current)
+        if ordering == None:
+            self.println("   No cached variable ordering found in '%s'" % cache.directory)
+            return False
+        marduk_utils.set_variable_ordering(" -> ".join(ordering), self.vars, self.dd_mgr)
+        if exact:
+            self.println("   Applied cached variable ordering")
+        else:
+            self.println("   Applied cached variable ordering of a similar specification")
+        return exact
+
+    def store_order(self):
+        """
+        Stores the current variable ordering in the order cache (if
+        --order-cache is given).
+        """
+        cache = self.order_cache
+        if cache == None:
+            return
+        current = OrderCache.split(marduk_utils.print_variable_ordering(self.vars))
+        try:
+            cache.store(current)
+        except (IOError, OSError), error:
+            self.println("WARNING: Could not store variable ordering in '%s': %s" % (cache.directory, error))
+
+    def get_memory_limit(self):
+        return self.__options.memory_limit
+    memory_limit = property(get_memory_limit)
+
+    def get_cache_size_ratio(self):
+        return self.__options.cache_size_ratio
+    cache_size_ratio = property(get_cache_size_ratio)
+
+    def create_dd_manager(self):
+        """
+        Creates and returns a new DD manager. The unique table, the
+        computed table and the maximum memory of CUDD are chosen according
+        to the options --memory-limit and --cache-size-ratio, and to the
+        number of variables of the specification.
+        """
+        num_vars = dd.dd_get_size(dd.cvar.dd_manager)
+        (unique_slots, cache_size, max_memory) = \
+            marduk_utils.dd_manager_parameters(self.memory_limit, self.cache_size_ratio, num_vars)
+        return dd.create_dd_manager(0, 0, unique_slots, cache_size, max_memory)
+
+    def get_dd_telemetry(self):
+        """
+        Returns the statistics of both DD managers for all finished phases
+        of synthesis, as a dictionary which maps the name of a phase to
+        its statistics. (See DDTelemetry for details.)
+        """
+        return self.__dd_telemetry.as_dict()
+    dd_telemetry = property(get_dd_telemetry)
+
+    def get_fixpoint_tracer(self):
+        """
+        Returns the tracer for fixpoint iterations (see FixpointTracer). It
+        is disabled, unless --trace-fixpoints is given.
+        """
+        return self.__fixpoint_tracer
+    fixpoint_tracer = property(get_fixpoint_tracer)
+
 
     def add_variable(self, var):
         """
@@ -560,6 +793,7 @@ class Marduk(object):
         if var.name in [variable.name for variable in self.__variables]:
             raise MardukException(("Error: A variable with name '%s' already exists!" % var.name)) 
         self.__variables.append(var)
+        self.var_registry.add_variable(var.type, var)
 
     def print_welcome_message():
         print "------------------------------------------------------"
@@ -591,10 +825,21 @@ class Marduk(object):
         self.println(" Reordering method for dynamic reordering \t\t" + marduk_utils.reorder_method_to_string(self.dyn_reorder_method))
         self.println(" Reordering method for forced reordering \t\t" + marduk_utils.reorder_method_to_string(self.reorder_method))
         self.println(" Reorder BDD after reading configuration \t\t" + str(self.r1))
+        self.println(" Group ps/ns variables for reordering \t\t\t" + str(self.var_groups))
         self.println(" Reorder BDD after generating output functions  \t" + str(self.r2))
         self.println(" Kill strategy and reorder afterwards   \t\t" + str(self.kill))
         self.println(" One-hot encoding of jx vars\t\t\t\t" + str(self.one_hot))
+        self.println(" Warm start of x fixpoints \t\t\t\t" + str(self.warm_start))
+        self.println(" Worker processes (x fixpoints, rho2/rho3) \t\t" + str(self.jobs))
+        self.println(" Spill x/y arrays to disk \t\t\t\t" + str(self.spill_arrays))
+        self.println(" Partition method for transition relations \t\t" + str(self.partition))
+        if self.partition in ("Threshold", "Iwls95CP"):
+            self.println(" Cluster threshold \t\t\t\t\t" + str(self.cluster_threshold))
         self.println(" Transfer functions to new DD manager and reorder \t" + str(self.transfer_functions))
+        if self.memory_limit != None:
+            self.println(" Memory limit for DD managers \t\t\t\t" + str(self.memory_limit) + " MB")
+            if self.cache_size_ratio != None:
+                self.println(" Share of memory limit for computed table \t\t" + str(self.cache_size_ratio))
         self.println(" Generate functions according to\n Baneres, Cortadella, Kishinevsky (DAC'04)\t\t" + str(self.dac04))
         if self.dac04:
             if self.dac_search_mode == 'dfs':
@@ -619,13 +864,14 @@ class Marduk(object):
         self.println("\n Timing Information:")
         
         # Load specification from input file
+        self.__dd_telemetry.begin("specification")
         self.__specification = Specification(self)
         self.__specification.readSpecification()
         self._specificationtime = resource.getrusage(resource.RUSAGE_SELF).ru_utime + resource.getrusage(resource.RUSAGE_SELF).ru_stime 
         self.println("   Specification read within\t\t\t %7.2f seconds" %(self._specificationtime-self._starttime))
 
         # Create list of variables and store it here in main class, for central access
-        self.__variables = self.__specification.create_variable_list()
+        self.vars = self.__specification.create_variable_list()
 
         if self.verbose > 1:
             print "Length of variables list: ", len(self.__variables)
@@ -643,15 +889,23 @@ class Marduk(object):
         if self.verbose > 1:
             print "Current Ordering:"
             print marduk_utils.print_variable_ordering(self.vars)
+
+        if self.check_realizability:
+            self.do_check_realizability()
+            return
         
         # Compute winning region
         import sys    
+        self.__dd_telemetry.begin("winning region")
         self.__winning_region = WinningRegion(self, self.__specification)
         self.__winning_region.calcWinningRegion()
         self._winningregiontime = resource.getrusage(resource.RUSAGE_SELF).ru_utime + resource.getrusage(resource.RUSAGE_SELF).ru_stime
 
         self.println("   Compute winning region within \t\t %7.2f seconds" %(self._winningregiontime - self._reorder1time))
-        if(not(self.__winning_region.isRealizable())):
+        self._print_worker_times()
+        self.__realizable = self.__winning_region.isRealizable()
+        if(not(self.__realizable)):
+            self.__dd_telemetry.end()
             self.println("The given specification is NOT REALIZABLE!\n")
             if not self.debug_mode:
                 self.println("Use the argument --dm to debug unrealizability\n")
@@ -664,18 +918,24 @@ class Marduk(object):
 
         
         # Compute strategy
+        self.__dd_telemetry.begin("strategy")
         self.__strategy = Strategy(self)
         self.__strategy.calcStrategy()
         self._strategytime = resource.getrusage(resource.RUSAGE_SELF).ru_utime + resource.getrusage(resource.RUSAGE_SELF).ru_stime 
         self.println("   Compute strategy within \t\t\t %7.2f seconds" %(self._strategytime-self._winningregiontime))
 
         from marduk_utils import VariableType
+        from relation_analysis import RelationAnalysis
 
+        self.__dd_telemetry.begin("characterization")
         self.println("\nStrategy Characterization:")
         input_vars = [var.ns for var in self.input_vars] + [var.ps for var in self.vars]
         output_vars = [var.ns for var in self.vars if var.type != VariableType.INPUT]
         begin = resource.getrusage(resource.RUSAGE_SELF).ru_utime + resource.getrusage(resource.RUSAGE_SELF).ru_stime 
-        strat_char = marduk_utils.characterize_relation(self.__strategy.strategy_bdd, input_vars, output_vars, return_bdds=True)
+        # The analysis keeps the bounds of the outputs, which are reused for
+        # the output functions in function-generator mode.
+        analysis = RelationAnalysis(self.__strategy.strategy_bdd, input_vars, output_vars)
+        strat_char = analysis.characterize(return_bdds=True)
         char_time = resource.getrusage(resource.RUSAGE_SELF).ru_utime + resource.getrusage(resource.RUSAGE_SELF).ru_stime - begin
         self.println("(computed in %7.2f seconds)" % char_time)
         total = 2 ** strat_char['num_inputs']
@@ -692,9 +952,12 @@ class Marduk(object):
         del strat_char
         
         if self.__mode in (marduk_utils.Modes.COFACTOR, marduk_utils.Modes.OLD):
+            analysis.release()
             self.do_cofactor_mode()
         else:
-            self.do_function_generator_mode(strat_dc=strat_dc)
+            self.do_function_generator_mode(strat_dc=strat_dc, analysis=analysis)
+        del analysis
+        self.__dd_telemetry.end()
 
 
         if self.transfer_functions:
@@ -711,6 +974,10 @@ class Marduk(object):
         self.println("   Size of rho2 is \t\t\t %10d bdd-nodes" %self.__strategy.rho2_size)
         self.println("   Size of rho3 is \t\t\t %10d bdd-nodes" %self.__strategy.rho3_size)
 
+        self.println("\n DD Manager Statistics:")
+        for line in self.__dd_telemetry.format_lines():
+            self.println(line)
+
         self.println("------------------------------------------------------")
         self.println("                FINISHED synthesis!"            )
         self.println("------------------------------------------------------")
@@ -730,9 +997,51 @@ class Marduk(object):
         self.__code_generator = None
         
 
+#-------------------------------------------------------------------------------------------------------------------
+    def _print_worker_times(self):
+        """
+        Prints the CPU time of the worker processes for the x fixpoints,
+        which is not contained in the CPU time of this process, and the
+        wall clock time during which they ran (only with --jobs).
+        """
+        if self.jobs <= 1:
+            return
+        times = self.__winning_region.worker_times
+        self.println("   ... plus x fixpoints in workers \t\t %7.2f seconds (CPU), %7.2f seconds (wall)" % \
+                     (times['cpu'], times['wall']))
+
+    def do_check_realizability(self):
+        """
+        Only checks realizability: Neither the intermediate results of the
+        winning region, nor a strategy or circuit are computed. The verdict
+        is printed as the last line (REALIZABLE or UNREALIZABLE), and main
+        exits with the corresponding code of marduk_utils.ExitCodes.
+        """
+        self.__dd_telemetry.begin("realizability check")
+        self.__winning_region = WinningRegion(self, self.__specification)
+        self.__realizable = self.__winning_region.checkRealizability()
+        self._winningregiontime = resource.getrusage(resource.RUSAGE_SELF).ru_utime + resource.getrusage(resource.RUSAGE_SELF).ru_stime
+        self.__dd_telemetry.end()
+        self.println("   Check realizability within \t\t\t %7.2f seconds" %(self._winningregiontime - self._reorder1time))
+        self._print_worker_times()
+        self.println("   Overall time \t\t\t\t %7.2f seconds" %(self._winningregiontime - self._starttime))
+
+        self.println("\n DD Manager Statistics:")
+        for line in self.__dd_telemetry.format_lines():
+            self.println(line)
+        self.println("------------------------------------------------------")
+
+        self.__specification = None
+        self.__winning_region = None
+        if self.__realizable:
+            self.println("REALIZABLE")
+        else:
+            self.println("UNREALIZABLE")
+
 #-------------------------------------------------------------------------------------------------------------------
     def do_cofactor_mode(self):
         # Compute output functions
+        self.__dd_telemetry.begin("output functions")
         self.__output_functions = OutputFunctions(self, self.__winning_region, self.__strategy)
 
         if not self.dac04:
@@ -748,17 +1057,18 @@ class Marduk(object):
         self._killingtime = self._outputfcttime
         self.println("   Compute output functions within \t\t %7.2f seconds" %(self._outputfcttime - self._strategytime))
         if self.reorder2:
-            result = dd.dd_reorder(self.__dd_manager, self.reorder_method,0)
+            result = dd.dd_reorder(self.dd_mgr, self.reorder_method,0)
             self._reorder2time = resource.getrusage(resource.RUSAGE_SELF).ru_utime + resource.getrusage(resource.RUSAGE_SELF).ru_stime 
             self.println("   Second reordering of bdd takes \t\t %7.2f seconds" %(self._reorder2time - self._outputfcttime))
 
         if self.kill:
             self.__strategy.killStrategy()
-            dd.dd_reorder(self.__dd_manager, self.reorder_method,0)
+            dd.dd_reorder(self.dd_mgr, self.reorder_method,0)
             self._killingtime = resource.getrusage(resource.RUSAGE_SELF).ru_utime + resource.getrusage(resource.RUSAGE_SELF).ru_stime
             self.println("   Killing strat and reordering takes\t\t %7.2f seconds" %(self._killingtime - self._reorder2time))
 
         before_code_gen = resource.getrusage(resource.RUSAGE_SELF).ru_utime + resource.getrusage(resource.RUSAGE_SELF).ru_stime
+        self.__dd_telemetry.begin("code generation")
        
         if not self.mode == marduk_utils.Modes.OLD:    
             if self.language == marduk_utils.Languages.BLIF:
@@ -770,8 +1080,8 @@ class Marduk(object):
 	
 	
             dd.dd_autodyn_disable(dd.cvar.dd_manager)
-            dd.dd_autodyn_disable(self.__dd_manager)
-            self.__code_generator.convert_functions_to_gates(self, self.__output_functions, self.__dd_manager) 
+            dd.dd_autodyn_disable(self.dd_mgr)
+            self.__code_generator.convert_functions_to_gates(self, self.__output_functions, self.dd_mgr) 
         else:
             self.__code_generator = BlifGenerator(self, self.__output_functions)   
         
@@ -781,31 +1091,33 @@ class Marduk(object):
         return
 
 #---------------------------------------------------------------------------------------------------------------------
-    def do_function_generator_mode(self, strat_dc=None):
+    def do_function_generator_mode(self, strat_dc=None, analysis=None):
 
         if self.dac04:
             raise MardukException("ERROR! DAC'04 function generation is not implemented (yet) for function-generator mode!")
         
         # Compute output functions
         import sys
+        self.__dd_telemetry.begin("output functions")
         self.__output_functions = OutputFunctions(self, self.__winning_region, self.__strategy)
-        self.__code_generator = self.__output_functions.constructFunctionsUsingGenerator(strat_dc=strat_dc)
+        self.__code_generator = self.__output_functions.constructFunctionsUsingGenerator(strat_dc=strat_dc, analysis=analysis)
         
         self._outputfcttime = resource.getrusage(resource.RUSAGE_SELF).ru_utime + resource.getrusage(resource.RUSAGE_SELF).ru_stime 
         self.println("   Compute output functions within \t\t %7.2f seconds" %(self._outputfcttime - self._strategytime))
         if self.reorder2:
             self.println("WARNING: Using --reorder2 in IrrSOP mode just takes time and has no merit.")
-            result = dd.dd_reorder(self.__dd_manager, self.reorder_method,0)
+            result = dd.dd_reorder(self.dd_mgr, self.reorder_method,0)
             self._reorder2time = resource.getrusage(resource.RUSAGE_SELF).ru_utime + resource.getrusage(resource.RUSAGE_SELF).ru_stime 
             self.println("   Second reordering of bdd takes \t\t %7.2f seconds" %(self._reorder2time - self._outputfcttime))
         self._reorder2time = resource.getrusage(resource.RUSAGE_SELF).ru_utime + resource.getrusage(resource.RUSAGE_SELF).ru_stime 
         if self.kill:
             self.println("WARNING: Using --kill in IrrSOP mode just takes time and has no merit."            )
             self.__strategy.killStrategy()
-            dd.dd_reorder(self.__dd_manager, self.reorder_method,0)
+            dd.dd_reorder(self.dd_mgr, self.reorder_method,0)
             self._killingtime = resource.getrusage(resource.RUSAGE_SELF).ru_utime + resource.getrusage(resource.RUSAGE_SELF).ru_stime
             self.println("   Killing strat and reordering takes\t\t %7.2f seconds" %(self._killingtime - self._reorder2time))
         
+        self.__dd_telemetry.begin("code generation")
         self.__code_generator.write_code_to_file()
         self._codegentime = resource.getrusage(resource.RUSAGE_SELF).ru_utime + resource.getrusage(resource.RUSAGE_SELF).ru_stime
 
@@ -831,7 +1143,9 @@ def parse_options():
                         help="Language for output file. Allowed values: blif (default), verilog, hif")
 
     parser.add_option("-p", "--partition", dest="partition", #default="Threshold",
-                        help="Specifies the partition method to use. Allowed values: Threshold, Monolithic, Iwls95CP")
+                        help="Specifies the partition method to use for the transition relations. Allowed values: Threshold, Monolithic, Iwls95CP. With Threshold and Iwls95CP the clusters built by NuSMV are kept, the monolithic transition relations are not built, and images/preimages are computed with early quantification. Iwls95CP additionally orders the parts for early quantification before clustering.")
+    parser.add_option("--cluster-threshold", dest="cluster_threshold", type="int", default=1000,
+                        help="Maximal size (in BDD nodes) of a cluster of a partitioned transition relation (default: 1000). Only used together with --partition Threshold or Iwls95CP.")
     parser.add_option("-d", "--dyn", dest="dyn_reorder", action="store_true",
                         default=False, help="Enable dynamic reordering of DDs")
     parser.add_option("--r1", "--reorder1", dest="reorder1", action="store_true",
@@ -842,16 +1156,54 @@ def parse_options():
                         default=False, help="Kill strategy when no longer needed and reorder BDD afterwards")
     parser.add_option("--oh", "--one_hot", dest="one_hot", action="store_true",
                         default=False, help="encodes the jx state variables in one-hot encoding instead of binary.")
+    parser.add_option("--check-realizability", dest="check_realizability", action="store_true", default=False,
+                        help="Only check realizability. The intermediate results of the winning region are not stored, the computation is aborted as soon as the initial states are not winning anymore, and no strategy or circuit is computed. The last line of output is REALIZABLE or UNREALIZABLE, and the exit code is 10 or 20, respectively.")
+    parser.add_option("--jobs", dest="jobs", type="int", default=1,
+                        help="The number of worker processes, which compute the x fixpoints of the winning region (one per assumption) and the parts of the strategies rho2 and rho3 (one per guarantee) concurrently. Every worker works on its own copy of the DD manager. Default: 1, i.e., no worker processes.")
+    parser.add_option("--trace-fixpoints", dest="trace_fixpoints", default=None, metavar="FILE",
+                        help="Write one event per fixpoint iteration (loop, indices, BDD size, live nodes, time) as JSON lines to FILE. Use fixpoint_trace.py to summarize the trace.")
+    parser.add_option("--checkpoint-dir", dest="checkpoint_dir", default=None, metavar="DIR",
+                        help="Periodically write checkpoints of the winning region computation (z, the completed entries of the x and y arrays, the loop indices, and the variable ordering) to DIR. The BDDs are stored in DDDMP format.")
+    parser.add_option("--checkpoint-interval", dest="checkpoint_interval", type="int", default=600, metavar="SECONDS",
+                        help="Write a checkpoint if at least SECONDS of wall clock time passed since the last one. 0 disables this criterion. Default: 600")
+    parser.add_option("--checkpoint-iterations", dest="checkpoint_iterations", type="int", default=0, metavar="N",
+                        help="Write a checkpoint after every N y fixpoints (one per z iteration and guarantee). Default: 0, i.e., disabled")
+    parser.add_option("--resume", dest="resume", default=None, metavar="DIR",
+                        help="Resume the winning region computation from the latest checkpoint in DIR. Unless --checkpoint-dir is given, new checkpoints are written to DIR as well.")
+    parser.add_option("--spill-arrays", dest="spill_arrays", action="store_true", default=False,
+                        help="Write the intermediate results of the winning region computation (x and y arrays) to disk in DDDMP format as soon as they are computed, and free them in the DD manager. The strategy computation reads them back one by one.")
+    parser.add_option("--spill-dir", dest="spill_dir", default=None, metavar="DIR",
+                        help="Create the temporary directory for --spill-arrays in DIR. Default: the system's temporary directory.")
+    parser.add_option("--compact-strategy", dest="compact_strategy", default=None, metavar="MINIMIZERS",
+                        help="Compact the strategy before the output functions are computed: The given don't care minimizers are tried on the strategy with respect to its care set. The smallest result is kept. MINIMIZERS is a comma separated list of restrict, constrain, licompaction and squeeze, or all. The size and time of every minimizer is printed.")
+    parser.add_option("--output-order", dest="output_order", default="default", metavar="HEURISTIC",
+                        help="Order in which the output functions are extracted (every function is substituted into the strategy before the next output): default, support (fewest variables in the projection first), dependency (fewest interacting outputs first), probe (smallest bounds first), or auto (try all of them within the budget with a quick extraction, and keep the order with the smallest functions). The size and time of every output are printed.")
+    parser.add_option("--output-order-budget", dest="output_order_budget", type="float", default=60.0, metavar="SECONDS",
+                        help="CPU time budget of --output-order auto (in seconds). Default: 60")
+    parser.add_option("--dc-minimizer", dest="dc_minimizer", default="restrict", metavar="MINIMIZER",
+                        help="Don't care minimizer for the output functions in cofactor mode: restrict (default), constrain, licompaction, squeeze, or auto (try all of them per output and keep the smallest function). With auto, the number of functions per minimizer is printed.")
+    parser.add_option("--dc-minimizer-budget", dest="dc_minimizer_budget", type="float", default=10.0, metavar="SECONDS",
+                        help="CPU time budget per output of --dc-minimizer auto (in seconds). Once it is exceeded, no further minimizer is tried for this output. Default: 10")
+    parser.add_option("--warm-start", dest="warm_start", action="store_true", default=False,
+                        help="Seed the x fixpoints of the winning region computation with their results from the previous z iteration instead of z.")
     parser.add_option("-t", "--transfer-functions", dest="transfer_functions", action="store_true", default=False,
                         help="Transfer output functions to new DD manager and reorder before dumping.")
+    parser.add_option("--order-cache", dest="order_cache", default=None,
+                        help="Directory for caching variable orderings across runs. The ordering after reordering is stored there, and is applied automatically to later runs with the same (or a similar) set of variables.")
+    parser.add_option("--memory-limit", dest="memory_limit", type="int", default=None,
+                        help="Memory budget (in MB) for each DD manager. The unique table, the computed table, and the maximum memory of CUDD are sized accordingly. Without this option, the (small) default values from PerlDD are used.")
+    parser.add_option("--cache-size-ratio", dest="cache_size_ratio", type="float", default=None,
+                        help="Share of the memory limit which is used for the computed table (cache) of CUDD, e.g. 0.25 (default). Only used together with --memory-limit.")
     parser.add_option("-v", "--verbose", dest="verbose", default="0",
                         help="Set verbose level")
     parser.add_option("--var-order", dest="var_order", default="",
                         help="Forces the given variable ordering after reading the spec. Format like this: 'var1_ns -> var2_ps -> ...'")
-    parser.add_option("--reorder_method", dest="reorder_method", default="SIFT_CONV",
-                        help="Specifies the reorder method to use for 'forced' reordering, i.e., the reorderings forced with options --r1, --r2, and --kill. See CUDD documentation for details. Specify name of method as STRING_IN_UPPER_CASE, e.g. SIFT_CONV (default).")
-    parser.add_option("--dyn_reorder_method", dest="dyn_reorder_method", default="SIFT",
-                        help="Specifies the reorder method to use for automatic (=dynamic) reordering, i.e., the reorderings that are triggered automatically by the CUDD package, based on memory usage. See CUDD documentation for details. Specify name of method as STRING_IN_UPPER_CASE, e.g. SIFT (default).")
+    parser.add_option("--reorder_method", dest="reorder_method", default="GROUP_SIFT_CONV",
+                        help="Specifies the reorder method to use for 'forced' reordering, i.e., the reorderings forced with options --r1, --r2, and --kill. See CUDD documentation for details. Specify name of method as STRING_IN_UPPER_CASE, e.g. GROUP_SIFT_CONV (default).")
+    parser.add_option("--dyn_reorder_method", dest="dyn_reorder_method", default="GROUP_SIFT",
+                        help="Specifies the reorder method to use for automatic (=dynamic) reordering, i.e., the reorderings that are triggered automatically by the CUDD package, based on memory usage. See CUDD documentation for details. Specify name of method as STRING_IN_UPPER_CASE, e.g. GROUP_SIFT (default).")
+    parser.add_option("--no-var-groups", dest="no_var_groups", action="store_true", default=False,
+                        help="Do not group the present and next state of each variable (and the jx/ix counters) for reordering.")
     parser.add_option("--dm", "--debug-mode", dest="debug_mode",
                         help="The mode for debugging unrealizable specifications. " + \
                         "It is a string where each substring activates " + \
@@ -910,10 +1262,21 @@ def main():
         sys.setrecursionlimit(10000)
         (cmd_line_options, args) = parse_options()
         marduk = Marduk(cmd_line_options, args)
-        marduk.run()
+        try:
+            marduk.run()
+        finally:
+            # Also flush the trace if the run failed.
+            marduk.fixpoint_tracer.close()
         from nusmv import dd
         from bddwrap import BDD
         manager = marduk.dd_mgr
+        if marduk.check_realizability:
+            if marduk.realizable:
+                exit_code = marduk_utils.ExitCodes.REALIZABLE
+            else:
+                exit_code = marduk_utils.ExitCodes.UNREALIZABLE
+            marduk = None
+            exit(exit_code)
         marduk = None
         exit(0)
     except (MardukException), exc:
@@ -0,0 +1,325 @@
+#!/usr/bin/env python
+
+##  ===========================================================================
+##  Author: Georg Hofferek <georg.hofferek@iaik.tugraz.at>
+##
+##  Copyright (c) 2009, 2010 by Graz University of Technology
+##
+##  This is free software; you can redistribute it and/or
+##  modify it under the terms of the GNU Lesser General Public
+##  License as published by the Free Software Foundation; either
+##  version 2 of the License, or (at your option) any later version.
+##
+##  This software is distributed in the hope that it will be useful,
+##  but WITHOUT ANY WARRANTY; without even the implied warranty of
+##  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+##  Lesser General Public License for more details.
+##
+##  You should have received a copy of the GNU Lesser General Public
+##  License along with this library; if not, write to the Free Software
+##  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307  USA.
+##
+##  For more information about this software see <http://rat.fbk.eu/ratsy>
+##  or email to the RATSY Team <ratsy@list.fbk.eu>.
+##  Please report bugs to <ratsy@list.fbk.eu>.
+##
+##  ===========================================================================
+
+
+
+# This file contains a utility program to benchmark single phases of
+# Marduk on a given specification. Every benchmark prints its timings
+# to stdout.
+
+
+
+from optparse import OptionParser
+import resource
+import sys
+
+
+def cpu_time():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_utime + resource.getrusage(resource.RUSAGE_SELF).ru_stime
+
+
+def create_marduk(input_file, options=None):
+    """
+    Creates a Marduk object for the given input file, reads the specification
+    and builds the variable list. Returns the Marduk object.
+    """
+    from marduk import Marduk
+    from marduk import MardukOptions
+    from specification import Specification
+
+    if options == None:
+        options = MardukOptions()
+    options.input_file = input_file
+
+    marduk = Marduk(options, [])
+    marduk.specification = Specification(marduk)
+    marduk.specification.readSpecification()
+    marduk.vars = marduk.specification.create_variable_list()
+    marduk._reorder1time = cpu_time()
+    return marduk
+
+
+def run_winning_region(marduk):
+    """
+    Computes the winning region for the given Marduk object and returns
+    the needed CPU time.
+    """
+    from winning_region import WinningRegion
+
+    marduk.winning_region = WinningRegion(marduk, marduk.specification)
+    before = cpu_time()
+    marduk.winning_region.calcWinningRegion()
+    return cpu_time() - before
+
+
+def use_list_registry():
+    """
+    Replaces the bookkeeping of living BDD names by the list-based registry
+    of the baseline, which scans all living names when an object is
+    dropped. Must only be called in a child process (see run_forked), as
+    the objects alive before the call are not in the list.
+    """
+    from bddwrap import BDD
+
+    living_names_list = []
+
+    def add_living_name(name):
+        living_names_list.append(name)
+
+    def remove_living_name(name):
+        try:
+            living_names_list.remove(name)
+        except ValueError:
+            pass
+
+    BDD._add_living_name = staticmethod(add_living_name)
+    BDD._remove_living_name = staticmethod(remove_living_name)
+
+
+def bench_bookkeeping(input_file, num_cycles):
+    """
+    Measures the cost of creating and dropping a BDD object while a growing
+    number of other BDD objects is alive, and the time for calcWinningRegion.
+    Both are measured with the current registry of living names and with
+    the list-based registry of the baseline. Every registry is run in a
+    child process. With constant-time bookkeeping the cost per cycle does
+    not depend on the number of living objects.
+    """
+    from bddwrap import BDD
+    from nusmv import dd
+
+    def run(registry):
+        if registry == "list":
+            use_list_registry()
+        marduk = create_marduk(input_file)
+        mgr = marduk.dd_mgr
+        var = marduk.vars[0].ps
+        ptr = var.ptr
+        for num_living in (0, 1000, 10000, 50000):
+            # Distinct objects, such that every one is registered.
+            living = [var.copy() for count in range(0, num_living)]
+            before = cpu_time()
+            for count in range(0, num_cycles):
+                tmp = BDD(ptr, mgr, "tmp")
+                del tmp
+            cost = (cpu_time() - before) / num_cycles * 1e6
+            print "%-8s   %11d   %10.3f" % (registry, num_living, cost)
+            del living
+        dd.bdd_free(mgr, ptr)
+        del var
+        print "%-8s   winreg within %7.2f seconds" % (registry, run_winning_region(marduk))
+
+    print "Registry   Living BDDs   [us/cycle]"
+    for registry in ("dict", "list"):
+        run_forked(run, registry)
+
+
+def bench_winning_region(marduk):
+    """
+    Measures the time needed for calcWinningRegion.
+    """
+    from bddwrap import BDD
+
+    time = run_winning_region(marduk)
+    print "Compute winning region within %7.2f seconds" % time
+    print "BDD objects alive afterwards: %d" % BDD.num_instances
+    print "Distinct names of living BDD objects: %d" % len(BDD.living_names_count)
+
+
+def run_forked(function, *args):
+    """
+    Runs the given function in a child process and waits for it. Thus
+    every configuration of a benchmark starts from fresh DD managers.
+    """
+    import os
+    sys.stdout.flush()
+    pid = os.fork()
+    if pid != 0:
+        os.waitpid(pid, 0)
+        return
+    function(*args)
+    sys.stdout.flush()
+    os._exit(0)
+
+
+def bench_reorder(input_file):
+    """
+    Compares forced and dynamic reordering with ungrouped variables and
+    SIFT against grouped ps/ns variables and GROUP_SIFT. Every configuration
+    is run in a child process, such that both start from a fresh DD manager.
+    """
+    from marduk import MardukOptions
+    from nusmv import dd
+    from dd_telemetry import read_dd_value, ABSOLUTE_VALUES
+
+    configurations = [("SIFT, no groups", "SIFT_CONV", "SIFT", True),
+                      ("GROUP_SIFT, groups", "GROUP_SIFT_CONV", "GROUP_SIFT", False)]
+
+    def run(name, reorder_method, dyn_reorder_method, no_var_groups):
+        options = MardukOptions()
+        options.reorder_method = reorder_method
+        options.dyn_reorder_method = dyn_reorder_method
+        options.no_var_groups = no_var_groups
+        marduk = create_marduk(input_file, options)
+
+        before = cpu_time()
+        dd.dd_reorder(marduk.dd_mgr, marduk.reorder_method, 0)
+        reorder_time = cpu_time() - before
+        nodes = read_dd_value(marduk.dd_mgr, ABSOLUTE_VALUES['live_nodes'])
+
+        winreg_time = run_winning_region(marduk)
+        print "%-20s   %11.2f   %10.2f   %19s" % (name, reorder_time, winreg_time, nodes)
+
+    print "Configuration          reorder [s]   winreg [s]   nodes after reorder"
+    for configuration in configurations:
+        run_forked(run, *configuration)
+
+
+def bench_fixpoints(input_file):
+    """
+    Compares the number of fixpoint iterations and the time for the winning
+    region with and without warm start of the x fixpoints.
+    """
+    from marduk import MardukOptions
+
+    def run(warm_start):
+        options = MardukOptions()
+        options.warm_start = warm_start
+        marduk = create_marduk(input_file, options)
+        time = run_winning_region(marduk)
+        counts = marduk.winning_region.iteration_counts
+        print "%-10s   %12d   %12d   %12d   %10.2f" % (warm_start, counts['z'], counts['y'], counts['x'], time)
+
+    print "Warm start   z iterations   y iterations   x iterations   winreg [s]"
+    for warm_start in (False, True):
+        run_forked(run, warm_start)
+
+
+def bench_spill(input_file):
+    """
+    Compares the peak number of live nodes and the times for the winning
+    region and the strategy with the x and y arrays kept in memory and
+    spilled to disk.
+    """
+    from marduk import MardukOptions
+    from strategy import Strategy
+    from dd_telemetry import read_dd_value, ABSOLUTE_VALUES
+
+    def run(spill_arrays):
+        options = MardukOptions()
+        options.spill_arrays = spill_arrays
+        marduk = create_marduk(input_file, options)
+        winreg_time = run_winning_region(marduk)
+        winreg_peak = read_dd_value(marduk.dd_mgr, ABSOLUTE_VALUES['peak_live_nodes_since_start'])
+        before = cpu_time()
+        Strategy(marduk).calcStrategy()
+        strategy_time = cpu_time() - before
+        peak = read_dd_value(marduk.dd_mgr, ABSOLUTE_VALUES['peak_live_nodes_since_start'])
+        print "%-9s   %10.2f   %12.2f   %17s   %10s" % \
+              (spill_arrays and "spilled" or "in memory", winreg_time, strategy_time, winreg_peak, peak)
+
+    print "Arrays      winreg [s]   strategy [s]   peak nodes winreg   peak nodes"
+    for spill_arrays in (False, True):
+        run_forked(run, spill_arrays)
+
+
+def bench_jobs(input_file, max_jobs):
+    """
+    Measures the scaling of the winning region computation with the number
+    of worker processes for the x fixpoints. As the work is done in child
+    processes, the wall clock time is measured.
+    """
+    import time
+    from marduk import MardukOptions
+
+    def run(jobs):
+        options = MardukOptions()
+        options.jobs = jobs
+        marduk = create_marduk(input_file, options)
+        before = time.time()
+        run_winning_region(marduk)
+        wall_time = time.time() - before
+        print "%4d   %11d   %15.2f" % (jobs, len(marduk.winning_region.assumptions), wall_time)
+
+    print "Jobs   assumptions   winreg wall [s]"
+    jobs = 1
+    while jobs <= max_jobs:
+        run_forked(run, jobs)
+        jobs *= 2
+
+
+
+def parse_options():
+    parser = OptionParser(usage="usage: %prog [options] -i SPEC")
+
+    parser.add_option("-i", "--in", dest="input_file",
+                      help="Input File, Specification in GR(1) (XML format)")
+    parser.add_option("-b", "--bench", dest="bench", default="winreg",
+                      help="The benchmark to run. Allowed values: winreg (default), bookkeeping, reorder, fixpoints, jobs, spill")
+    parser.add_option("-n", "--cycles", dest="cycles", type="int", default=100000,
+                      help="Number of create/drop cycles for the 'bookkeeping' benchmark.")
+    parser.add_option("-j", "--max-jobs", dest="max_jobs", type="int", default=8,
+                      help="Maximal number of worker processes for the 'jobs' benchmark (powers of 2 up to this number are measured).")
+
+    return parser.parse_args()
+
+
+def main():
+    (options, args) = parse_options()
+
+    if not options.input_file:
+        print "ERROR: No input file given!"
+        sys.exit(-1)
+
+    if options.bench == "reorder":
+        bench_reorder(options.input_file)
+        sys.exit(0)
+    elif options.bench == "fixpoints":
+        bench_fixpoints(options.input_file)
+        sys.exit(0)
+    elif options.bench == "spill":
+        bench_spill(options.input_file)
+        sys.exit(0)
+    elif options.bench == "jobs":
+        bench_jobs(options.input_file, options.max_jobs)
+        sys.exit(0)
+    elif options.bench == "bookkeeping":
+        bench_bookkeeping(options.input_file, options.cycles)
+        sys.exit(0)
+
+    marduk = create_marduk(options.input_file)
+
+    if options.bench == "winreg":
+        bench_winning_region(marduk)
+    else:
+        print "ERROR: Unknown benchmark '%s'!" % options.bench
+        sys.exit(-1)
+
+    sys.exit(0)
+
+if __name__ == "__main__":
+    main()
@@ -96,6 +96,11 @@ class Languages(object):
     VERILOG         = 2
     HIF             = 3
 
+class ExitCodes(object):
+    """Enum for the exit codes of a realizability check (as in SYNTCOMP)"""
+    REALIZABLE      = 10
+    UNREALIZABLE    = 20
+
 class MardukException(Exception):
     """
     Base class for all Marduk exceptions
@@ -286,102 +291,94 @@ def characterize_relation(relation, input_vars, output_vars, return_bdds=False):
     written as a DC term), num_non_dc (number of input vertices for which the output is
     not fixed and cannot be written as a DC term).
 
-    REMARK: The loops for computing the constant vertices and the DC vertices can possibly
-            be merged.
-
     If return_bdds is True, also BDDs representing the set of fixed/dc/non-dc vertices will
     be returned.
-    """
-    from bddwrap import BDD
-    result = {}
-    
-    num_inputs = len(input_vars)
-    result['num_inputs'] = num_inputs
-    result['num_outputs'] = len(output_vars)
 
-    output_product = BDD.ONE(relation.mgr)
-    for output in output_vars:
-        output_product *= output
-
-    # Compute number of defined vertices
-    
-    defined = relation
-    for output in output_vars:
-        defined = defined.exists(output)
-        
-    result['num_defined'] = defined.count_minterm(num_inputs)
+    See relation_analysis.RelationAnalysis, which computes the bounds of every output once.
+    """
+    from relation_analysis import RelationAnalysis
+    return RelationAnalysis(relation, input_vars, output_vars).characterize(return_bdds)
 
 
-    # compute constants vertices
+# Approximate sizes (in bytes) of the data structures of CUDD, on 64 bit
+# machines. Used for computing the sizes of the tables of a DD manager.
+DD_NODE_BYTES = 32
+DD_CACHE_ENTRY_BYTES = 32
+DD_UNIQUE_SLOT_BYTES = 8
+# Number of nodes per slot of the unique table, above which CUDD resizes
+# the table (DD_MAX_SUBTABLE_DENSITY).
+DD_SUBTABLE_DENSITY = 4
 
-    fixed_vertices = BDD.ONE(relation.mgr)
-    
-    for output in output_vars:
-        (lower, upper) = get_lower_upper(output, relation, input_vars, output_vars)
-        
-        fixed_vertices *= ~(lower ^ upper)
-        del lower, upper
+def dd_manager_parameters(memory_limit, cache_size_ratio=None, num_vars=0):
+    """
+    Returns the tuple (unique_slots, cache_size, max_memory) for creating
+    a DD manager with dd.create_dd_manager.
 
-    result['num_fixed'] = fixed_vertices.count_minterm(num_inputs)
-    if not return_bdds:
-        del fixed_vertices
-    
-    # compute non DC vertices
+    'memory_limit' is the memory budget of the manager in MB, and
+    'cache_size_ratio' is the share of the budget which is used for the
+    computed table (default: 0.25). The rest of the budget is used for
+    nodes and the unique table, which is distributed among the 'num_vars'
+    variables. If no memory limit is given, the values from PerlDD are
+    returned. The returned values are never smaller than these.
+    """
+    unique_slots = 251       # Values from PerlDD
+    cache_size = 131071
+    max_memory = 0
+    if memory_limit == None:
+        return (unique_slots, cache_size, max_memory)
 
-    non_dc_vertices = BDD.ZERO(relation.mgr)
+    if cache_size_ratio == None:
+        cache_size_ratio = 0.25
 
-    for output in output_vars:
-        (lower, upper) = get_lower_upper(output, relation, input_vars, output_vars)
-        tmp_rel = relation * (lower ^ upper)   # Cut off constant vertices
-        
-        rel_lower = tmp_rel.compose(output, lower)
-        rel_upper = tmp_rel.compose(output, upper)
+    max_memory = memory_limit * 1024 * 1024
+    cache_bytes = int(max_memory * cache_size_ratio)
+    cache_size = max(cache_size, cache_bytes / DD_CACHE_ENTRY_BYTES)
 
+    node_bytes = DD_NODE_BYTES + DD_UNIQUE_SLOT_BYTES / float(DD_SUBTABLE_DENSITY)
+    num_nodes = int((max_memory - cache_bytes) / node_bytes)
+    slots_per_var = num_nodes / DD_SUBTABLE_DENSITY / max(num_vars, 1)
+    unique_slots = max(unique_slots, slots_per_var)
 
-        tmp_non_dc = ((~rel_lower)*tmp_rel).exists(output_product)
+    return (unique_slots, cache_size, max_memory)
 
-        tmp_non_dc += ((~rel_upper)*tmp_rel).exists(output_product)
 
-        
-        
-        non_dc_vertices += tmp_non_dc
-        del tmp_non_dc, tmp_rel, rel_lower, rel_upper, lower, upper
-
-    result['num_non_dc'] = non_dc_vertices.count_minterm(num_inputs)
+def get_lower_upper(output, relation, input_vars, output_vars, memo=None):
+    """
+    Computes the lower and the upper bound for output in relation.
+    The projection of the relation onto output is computed with
+    output_projection.project_outputs over output_vars (in their order).
+    If the bounds of several outputs of the same relation are needed, pass
+    the same dictionary as 'memo' to every call, such that the
+    quantifications are shared between them.
+    """
+    import output_projection
+    from bddwrap import BDD
 
+    projections = []
+    def solve(var, projection):
+        if var == output:
+            projections.append(projection)
+        return None
+    output_projection.project_outputs(relation, [(var, var) for var in output_vars], solve, memo)
+    if len(projections) == 0:
+        # output is not among output_vars: All of them are quantified.
+        projections.append(relation.exists(BDD.conjoin_all(output_vars, relation.mgr)))
 
-    if not return_bdds:
-        del non_dc_vertices
-    else:
-        dc_vertices = relation
-        for output in output_vars:
-            dc_vertices = dc_vertices.exists(output)
-        dc_vertices *= ~(fixed_vertices + non_dc_vertices)
-        result['fixed_bdd'] = fixed_vertices
-        result['non_dc_bdd'] = non_dc_vertices
-        result['dc_bdd'] = dc_vertices
-
-    result['num_dc'] = (2 ** num_inputs) - (result['num_fixed'] + result['num_non_dc'])
-    return result
+    return get_projection_lower_upper(output, projections[0])
 
 
-def get_lower_upper(output, relation, input_vars, output_vars):
+def get_projection_lower_upper(output, projection):
     """
-    Computes the lower and the upper bound for output in relation.
+    Computes the lower and the upper bound for output from the projection of
+    a relation onto output (i.e., all other outputs are quantified).
     """
-    rel_prime = relation
-    for other in output_vars:
-        if other != output:
-            rel_prime = rel_prime.exists(other)
-
-    pos = rel_prime / output
-    neg = rel_prime / ~output
+    pos = projection / output
+    neg = projection / ~output
 
     lower = pos * ~neg
     upper = ~neg + pos
     
     return (lower, upper)
-    
 
 
 def reorder_method_to_string(method):
@@ -502,6 +499,34 @@ def set_variable_ordering(order_string, marduk_vars, dd_mgr):
     
 
 
+def group_variables(bdd_vars):
+    """
+    Creates a CUDD variable group for the given variables (a list of BDD
+    objects of single variables), such that reordering moves them as one
+    block. The variables must occupy consecutive levels. Groups may be
+    nested, e.g. the pairs of present and next state variables of a counter
+    can be grouped first, and the whole counter afterwards.
+
+    Returns True if the group was created, and False if the levels are not
+    consecutive, or if the NuSMV wrapper does not provide dd_new_var_block.
+    """
+    from nusmv import dd
+    new_var_block = getattr(dd, "dd_new_var_block", None)
+    if new_var_block == None or len(bdd_vars) < 2:
+        return False
+
+    levels = [var.level for var in bdd_vars]
+    low = min(levels)
+    sorted_levels = levels[:]
+    sorted_levels.sort()
+    if sorted_levels != range(low, low + len(levels)):
+        return False
+
+    first = bdd_vars[levels.index(low)]
+    new_var_block(first.mgr, first.index, len(bdd_vars))
+    return True
+
+
 def top_variable(f, fd):
     """
     Takes two BDD objects and returns the projection function (as BDD object) of the
@@ -0,0 +1,177 @@
+##  ===========================================================================
+##  Author: Georg Hofferek <georg.hofferek@iaik.tugraz.at>
+##
+##  Copyright (c) 2009, 2010 by Graz University of Technology
+##
+##  This is free software; you can redistribute it and/or
+##  modify it under the terms of the GNU Lesser General Public
+##  License as published by the Free Software Foundation; either
+##  version 2 of the License, or (at your option) any later version.
+##
+##  This software is distributed in the hope that it will be useful,
+##  but WITHOUT ANY WARRANTY; without even the implied warranty of
+##  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+##  Lesser General Public License for more details.
+##
+##  You should have received a copy of the GNU Lesser General Public
+##  License along with this library; if not, write to the Free Software
+##  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307  USA.
+##
+##  For more information about this software see <http://rat.fbk.eu/ratsy>
+##  or email to the RATSY Team <ratsy@list.fbk.eu>.
+##  Please report bugs to <ratsy@list.fbk.eu>.
+##
+##  ===========================================================================
+
+
+"""
+This module contains an on-disk cache for variable orderings.
+"""
+
+import os
+import re
+
+
+class OrderCache(object):
+    """
+    Stores variable orderings in a directory, such that an ordering found
+    (e.g. by reordering) in one run can be reused in later runs.
+
+    Orderings are stored in the format of marduk_utils.print_variable_ordering,
+    i.e. "var1_ps -> var3_ns -> ...". Every ordering is stored in its own
+    file, whose name is a hash of the set of variable names.
+
+    If no ordering for exactly the same set of variables exists, the stored
+    ordering with the largest overlap is merged with the current ordering
+    (see merge_orderings).
+    """
+
+    SUFFIX = ".order"
+
+    # Minimal share of common variables (relative to the union of both
+    # sets) for using a stored ordering of a different set of variables.
+    MIN_OVERLAP = 0.5
+
+    def __init__(self, directory):
+        self.__directory = directory
+
+
+    def get_directory(self):
+        return self.__directory
+    directory = property(get_directory)
+
+
+    def key(names):
+        """
+        Returns the key for the given list of variable names, which is a hash
+        of the set of names.
+        """
+        import hashlib
+        sorted_names = list(set(names))
+        sorted_names.sort()
+        return hashlib.sha1("\n".join(sorted_names)).hexdigest()
+    key = staticmethod(key)
+
+
+    def split(order_string):
+        """
+        Splits an ordering string into the list of variable names.
+        """
+        order_string = re.sub(r'\s', '', order_string)
+        if order_string == "":
+            return []
+        return order_string.split('->')
+    split = staticmethod(split)
+
+
+    def merge_orderings(stored, current):
+        """
+        Merges the stored ordering (list of names) into the current one.
+        Variables which are not contained in the current ordering are
+        dropped. Variables which are not contained in the stored ordering are
+        inserted directly behind the variable which precedes them in the
+        current ordering. Returns the merged list of names.
+        """
+        current_names = set(current)
+        result = [name for name in stored if name in current_names]
+        known = set(result)
+
+        predecessor = None
+        for name in current:
+            if not name in known:
+                if predecessor == None:
+                    position = 0
+                else:
+                    position = result.index(predecessor) + 1
+                result.insert(position, name)
+                known.add(name)
+            predecessor = name
+        return result
+    merge_orderings = staticmethod(merge_orderings)
+
+
+    def __path(self, key):
+        return os.path.join(self.__directory, key + OrderCache.SUFFIX)
+
+
+    def __read(self, path):
+        file = open(path, 'r')
+        try:
+            return OrderCache.split(file.read())
+        finally:
+            file.close()
+
+
+    def lookup(self, current):
+        """
+        Looks up an ordering for the variables of the current ordering
+        (list of names). Returns a tuple (ordering, exact), where 'ordering'
+        is a list of names (or None, if no suitable ordering is stored), and
+        'exact' is True iff the ordering was stored for exactly the same set
+        of variables.
+        """
+        if not os.path.isdir(self.__directory):
+            return (None, False)
+
+        path = self.__path(OrderCache.key(current))
+        if os.path.isfile(path):
+            stored = self.__read(path)
+            if set(stored) == set(current):
+                return (stored, True)
+
+        current_names = set(current)
+        best = None
+        best_overlap = OrderCache.MIN_OVERLAP
+        for file_name in os.listdir(self.__directory):
+            if not file_name.endswith(OrderCache.SUFFIX):
+                continue
+            stored = self.__read(os.path.join(self.__directory, file_name))
+            stored_names = set(stored)
+            if len(stored_names | current_names) == 0:
+                continue
+            overlap = float(len(stored_names & current_names)) / len(stored_names | current_names)
+            if overlap >= best_overlap:
+                best = stored
+                best_overlap = overlap
+
+        if best == None:
+            return (None, False)
+        return (OrderCache.merge_orderings(best, current), False)
+
+
+    def store(self, ordering):
+        """
+        Stores the given ordering (list of names).
+        """
+        if not os.path.isdir(self.__directory):
+            os.makedirs(self.__directory)
+        # Write to a temporary file first, such that concurrent runs never
+        # read a partially written ordering.
+        path = self.__path(OrderCache.key(ordering))
+        tmp_path = "%s.%d.tmp" % (path, os.getpid())
+        file = open(tmp_path, 'w')
+        try:
+            file.write(" -> ".join(ordering) + "\n")
+        finally:
+            file.close()
+        os.rename(tmp_path, path)
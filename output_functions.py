@@ -32,6 +32,10 @@ class OutputFunctions(object):
     from irrsop import IrrsopGenerator
     import marduk_utils
     from marduk_utils import MardukException
+
+    # Number of variables which the simplification of constructFunctions
+    # tries to quantify at once, before it falls back to halves of a block.
+    SIMPLIFY_BLOCK_SIZE = 8
     
     def __init__(self, marduk, winning_region, strategy):
         self.__marduk = marduk
@@ -81,10 +85,10 @@ class OutputFunctions(object):
         [Copied (and modified) from Anzu.]
         """
         from bddwrap import BDD
+        import output_order
         marduk_mgr = self.__marduk.dd_mgr
         
         strat = self.__strategy.strategy_bdd
-        init = self.__winning_region.init12 * self.__winning_region.initjx
 
         # input_vars is a list of BDDs of all combinational inputs.
         # These are: x, x', y, jx
@@ -101,8 +105,7 @@ class OutputFunctions(object):
         for var in self.__marduk.state_vars:
             output_vars[var.name] = var.ns
         
-        careset = self.__winning_region.reachableStates(init, strat, self.__winning_region.winRegion)
-        del init
+        careset = self.__strategy.care_set
         
         outputvarnames = output_vars.keys()
 
@@ -113,16 +116,23 @@ class OutputFunctions(object):
 #         random.shuffle(outputvarnames)
 #         random.shuffle(outputvarnames)
         
-        for output in outputvarnames:
-            rel_prime = strat
-
-            # quantify out all other output variables
-            for other_output in outputvarnames:
-                if output != other_output:
-                    var = output_vars[other_output]
-                    rel_prime = rel_prime.exists(var)
-                
-            
+        outputs = self.__order_outputs(strat, [(output, output_vars[output]) for output in outputvarnames], careset)
+        report = []
+        # Number of (exists, exists, and) steps of the simplification for
+        # blocks and for single inputs, and the number of inputs tried by the
+        # loop over all inputs.
+        simplify_steps = [0, 0, 0]
+        import dc_minimizers
+        dc_minimizer = self.__marduk.dc_minimizer
+        # Maps the name of the minimizer to the number of output functions
+        # for which it was used (None: not minimized, with auto only).
+        dc_minimizer_wins = {}
+
+        # rel_prime is the projection of strat onto output, in which all
+        # outputs before output are replaced by their functions and all
+        # others are quantified out (see output_projection).
+        def construct(output, rel_prime):
+            begin = output_order.cpu_time()
             var = output_vars[output]
             positive_cofactor = rel_prime / var
             negative_cofactor = rel_prime / ~var
@@ -130,18 +140,26 @@ class OutputFunctions(object):
             n = negative_cofactor * ~positive_cofactor
             
             if simplify :
-                for input in input_vars:
-                    p_prime = p.exists(input)
-                    n_prime = n.exists(input)
-                    if (p_prime * n_prime) == BDD.ZERO(marduk_mgr):
-                        p = p_prime 
-                        n = n_prime
+                (p, n, block_steps, single_steps) = self.__simplify(p, n, input_vars)
+                simplify_steps[0] += block_steps
+                simplify_steps[1] += single_steps
+                simplify_steps[2] += len(input_vars)
 
             xor = p + n 
             del n
-            func = p // (xor * careset) 
+            care = xor * careset
+            if dc_minimizer == dc_minimizers.AUTO:
+                (func, winner, trials) = dc_minimizers.minimize_best(p, care, dc_minimizers.ALL,
+                                                                     self.__marduk.dc_minimizer_budget)
+                if self.__marduk.verbose > 0:
+                    print "Output %s: %s" % (output, ", ".join(["%s %d nodes (%.2f seconds)" % trial for trial in trials]))
+                del trials
+            else:
+                func = dc_minimizers.minimize(dc_minimizer, p, care)
+                winner = dc_minimizer
+            dc_minimizer_wins[winner] = dc_minimizer_wins.get(winner, 0) + 1
             func.name = "func_" + output
-            del p, xor
+            del p, xor, care
 
             if self.__marduk.verbose > 1:
                 print "-----------------------"
@@ -149,16 +167,100 @@ class OutputFunctions(object):
                 func.print_minterm()
             
             self.__functions[output] = func
-            strat = strat.compose(var, func)
+            report.append((output, rel_prime.size, func.size, output_order.cpu_time() - begin))
+            return func
             
-        # end for each output
+        # end of construct
+
+        import output_projection
+        output_projection.project_outputs(strat, outputs, construct)
+        self.__print_report(report)
+        if dc_minimizer == dc_minimizers.AUTO:
+            wins = ["%s %d" % (name, dc_minimizer_wins[name]) for name in dc_minimizers.ALL if dc_minimizer_wins.has_key(name)]
+            if dc_minimizer_wins.has_key(None):
+                wins.append("none %d" % dc_minimizer_wins[None])
+            print "DC minimizer (auto), output functions per minimizer: %s" % ", ".join(wins)
+        if simplify:
+            print "Simplification: %d steps for blocks of inputs, %d steps for single inputs (loop over all inputs: %d steps)" % \
+                  tuple(simplify_steps)
         
         return 
 
 
-    def constructFunctionsUsingGenerator(self, strat_dc=None):
+    def __simplify(self, p, n, input_vars):
+        """
+        Quantifies inputs from the disjoint sets p and n, as long as they
+        stay disjoint. Only inputs in the joint support of p and n are
+        tried. They are tried in blocks of SIMPLIFY_BLOCK_SIZE, and the
+        inputs of a block which can not be quantified at once are tried one
+        by one. This gives the same result as trying every input in the
+        order of input_vars, since quantifying a subset of a block gives
+        subsets of the sets for the whole block.
+
+        Returns the tuple (p, n, block steps, single steps), where every
+        step is two exists and one and.
+        """
+        from bddwrap import BDD
+        support = set(p.support_indices()) | set(n.support_indices())
+        candidates = [input for input in input_vars if input.support_indices()[0] in support]
+
+        block_steps = 0
+        single_steps = 0
+        size = OutputFunctions.SIMPLIFY_BLOCK_SIZE
+        for start in range(0, len(candidates), size):
+            block = candidates[start:start + size]
+            if len(block) > 1:
+                cube = BDD.conjoin_all(block, p.mgr)
+                p_prime = p.exists(cube)
+                n_prime = n.exists(cube)
+                block_steps += 1
+                if (p_prime * n_prime).isZero():
+                    p = p_prime
+                    n = n_prime
+                    continue
+                del p_prime, n_prime
+            for input in block:
+                p_prime = p.exists(input)
+                n_prime = n.exists(input)
+                single_steps += 1
+                if (p_prime * n_prime).isZero():
+                    p = p_prime
+                    n = n_prime
+        return (p, n, block_steps, single_steps)
+
+
+    def __order_outputs(self, strat, outputs, careset=None):
+        """
+        Returns the outputs (list of tuples (name, BDD)) in the order of the
+        heuristic selected by --output-order. 'careset' is only needed for
+        auto (default: the care set of the strategy).
+        """
+        import output_order
+        heuristic = self.__marduk.output_order
+        if heuristic == output_order.DEFAULT:
+            return outputs
+        if heuristic == output_order.AUTO and careset == None:
+            careset = self.__strategy.care_set
+        (outputs, lines) = output_order.choose(heuristic, strat, outputs, careset, self.__marduk.output_order_budget)
+        for line in lines:
+            print line
+        return outputs
+
+
+    def __print_report(self, report):
+        import output_order
+        print "Output functions (order: %s):" % self.__marduk.output_order
+        for line in output_order.format_report(report):
+            print line
+
+
+    def constructFunctionsUsingGenerator(self, strat_dc=None, analysis=None):
         """
         Computes output functions by using the IrrSOP Generator
+
+        'analysis' is an optional RelationAnalysis of the strategy. Its
+        quantifications and bounds are reused where the projections do not
+        depend on functions chosen before. It is released at the end.
         """
         from nusmv import dd
         import marduk_utils
@@ -168,6 +270,7 @@ class OutputFunctions(object):
         from code_generator import HifGenerator
         from code_generator import BlifFromGatesGenerator
         from bddwrap import BDD
+        import output_order
         marduk_mgr = self.__marduk.dd_mgr
         if self.__marduk.language == marduk_utils.Languages.BLIF:
             code_generator = BlifFromGatesGenerator(self.__marduk.output_file)
@@ -195,8 +298,6 @@ class OutputFunctions(object):
             output_vars[var.name] = var.ns
         for var in self.__marduk.state_vars:
             output_vars[var.name] = var.ns
-        
-        careset = self.__winning_region.reachableStates(self.__winning_region.init12 * self.__winning_region.initjx, strat, self.__winning_region.winRegion)
     
         wires = self.__createSignalsForFunctionGenerator(code_generator)
 
@@ -223,25 +324,25 @@ class OutputFunctions(object):
 
         
         outputvarnames = output_vars.keys()
-        num = 0
-        for output in outputvarnames:
-            num += 1
-            rel_prime = strat
-
-            # quantify out all other output variables
-            for other_output in outputvarnames:
-                if output != other_output:
-                    var = output_vars[other_output]
-                    rel_prime = rel_prime.exists(var)
-                
+        if analysis != None and self.__marduk.output_order == output_order.DEFAULT:
+            # Use the order of the analysis, such that the projections
+            # which do not depend on chosen functions are shared.
+            outputvarnames.sort(key=lambda name: analysis.position(output_vars[name]))
+        outputs = self.__order_outputs(strat, [(output, output_vars[output]) for output in outputvarnames])
+        report = []
+
+        # rel_prime is the projection of strat onto output, in which all
+        # outputs before output are replaced by their functions and all
+        # others are quantified out (see output_projection).
+        def construct(output, rel_prime):
+            begin = output_order.cpu_time()
+            projection_size = rel_prime.size
             var = output_vars[output]
-            positive_cofactor = rel_prime / var
-            negative_cofactor = rel_prime / ~var
+            if analysis != None:
+                (lower, upper) = analysis.get_projection_bounds(var, rel_prime)
+            else:
+                (lower, upper) = marduk_utils.get_projection_lower_upper(var, rel_prime)
             del rel_prime
-            
-            lower = positive_cofactor * ~negative_cofactor
-            upper = ~negative_cofactor + positive_cofactor
-            del positive_cofactor, negative_cofactor
 
             if self.__marduk.mode == marduk_utils.Modes.IRRSOP:
                 (function, signal) = function_gen.irrsop(lower, upper, literal_list=literal_list)
@@ -266,16 +367,25 @@ class OutputFunctions(object):
 #                 print "MISMATCH for function %s" % output
 #                 raise Exception
 
-            strat = strat.compose(var, function)
-            del function
             #new_rel *= ((~var + function) * (var + ~function)) #=($var <-> $function)
 
             code_generator.add_output(output, signal)
             #print "Size of circuit for %s:%d" %(output,code_generator.circuit_size(signal))
             code_generator.change_flipflop_input(output + "_ps", signal)
             #self.__functions[output] = function
+            report.append((output, projection_size, function.size, output_order.cpu_time() - begin))
             if self.__marduk.verbose > 0:
                 print "Done with output '%s'." % output        
+            return function
+
+        if analysis != None:
+            analysis.project_outputs(strat, outputs, construct)
+            analysis.release()
+        else:
+            import output_projection
+            output_projection.project_outputs(strat, outputs, construct)
+        del outputs
+        self.__print_report(report)
         function_gen.functionCache.print_stats()
 
         if self.__marduk.mode == marduk_utils.Modes.FACTOR:
@@ -291,15 +401,15 @@ class OutputFunctions(object):
         for var in self.__marduk.input_vars:
             code_generator.add_input(var.name)
             negation = code_generator.add_not(var.name)
-            wires[str(var.ns)] = var.name
-            wires[str(~var.ns)] = negation
+            wires[var.ns] = var.name
+            wires[~var.ns] = negation
             
 
             initial = marduk_utils.get_init_value_from_bdd(var, self.__marduk.winning_region.init12 * self.__marduk.winning_region.initjx)
             code_generator.add_flipflop(var.name + "_ps", var.name, initial)
             negation = code_generator.add_not(var.name + "_ps")
-            wires[str(var.ps)] = var.name + "_ps"
-            wires[str(~var.ps)] = negation
+            wires[var.ps] = var.name + "_ps"
+            wires[~var.ps] = negation
 
         for var in self.__marduk.vars:
             if var.type == marduk_utils.VariableType.INPUT:
@@ -307,8 +417,8 @@ class OutputFunctions(object):
             initial = marduk_utils.get_init_value_from_bdd(var, self.__marduk.winning_region.init12 * self.__marduk.winning_region.initjx)
             code_generator.add_flipflop(var.name + "_ps", None, initial)
             negation = code_generator.add_not(var.name + "_ps")
-            wires[str(var.ps)] = var.name + "_ps"
-            wires[str(~var.ps)] = negation
+            wires[var.ps] = var.name + "_ps"
+            wires[~var.ps] = negation
             
         return wires
 
@@ -334,7 +444,7 @@ class OutputFunctions(object):
         # then start the recursive algorithm.
         from bddwrap import BDD
         strat = self.__strategy.strategy_bdd
-        reachable_states =  self.__winning_region.reachableStates(self.__winning_region.init, self.__winning_region.trans12, BDD.ONE(self.__marduk.dd_mgr))
+        reachable_states =  self.__winning_region.reachableStates(self.__winning_region.init, self.__winning_region.relation12, BDD.ONE(self.__marduk.dd_mgr))
         strat //= reachable_states
 
         #print "Constructing functions according to DAC'04.\nStrategy is:"
@@ -531,11 +641,11 @@ class OutputFunctions(object):
 
     def _to_relation(self, functions, output_vars):
         from bddwrap import BDD
-        relation = BDD.ONE(self.__marduk.dd_mgr)
+        equivalences = []
         for outputname in output_vars.keys():
             output = output_vars[outputname]
-            relation *= ((output * functions[outputname]) + ((~output)*(~functions[outputname])))
-        return relation
+            equivalences.append((output * functions[outputname]) + ((~output)*(~functions[outputname])))
+        return BDD.conjoin_all(equivalences, self.__marduk.dd_mgr)
 
 
     def _to_functions(self, relation, input_vars, output_vars):
@@ -0,0 +1,208 @@
+##  ===========================================================================
+##  Author: Georg Hofferek <georg.hofferek@iaik.tugraz.at>
+##
+##  Copyright (c) 2009, 2010 by Graz University of Technology
+##
+##  This is free software; you can redistribute it and/or
+##  modify it under the terms of the GNU Lesser General Public
+##  License as published by the Free Software Foundation; either
+##  version 2 of the License, or (at your option) any later version.
+##
+##  This software is distributed in the hope that it will be useful,
+##  but WITHOUT ANY WARRANTY; without even the implied warranty of
+##  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+##  Lesser General Public License for more details.
+##
+##  You should have received a copy of the GNU Lesser General Public
+##  License along with this library; if not, write to the Free Software
+##  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307  USA.
+##
+##  For more information about this software see <http://rat.fbk.eu/ratsy>
+##  or email to the RATSY Team <ratsy@list.fbk.eu>.
+##  Please report bugs to <ratsy@list.fbk.eu>.
+##
+##  ===========================================================================
+
+
+
+"""
+This module contains the heuristics for the order in which the output
+functions are extracted from a strategy.
+"""
+
+import resource
+
+from bddwrap import BDD
+import output_projection
+
+
+DEFAULT = "default"
+SUPPORT = "support"
+DEPENDENCY = "dependency"
+PROBE = "probe"
+AUTO = "auto"
+
+# All heuristics, which auto tries (in this order).
+CANDIDATES = [DEFAULT, SUPPORT, DEPENDENCY, PROBE]
+ALL = CANDIDATES + [AUTO]
+
+# Default time budget (in seconds) of auto.
+DEFAULT_BUDGET = 60.0
+
+
+def cpu_time():
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+
+def check(name):
+    """
+    Raises a MardukException if the given heuristic is unknown, and returns
+    it otherwise.
+    """
+    from marduk_utils import MardukException
+    if not name in ALL:
+        raise MardukException("Unknown output order '%s'. Allowed values: %s" % (name, ", ".join(ALL)))
+    return name
+
+
+def _sorted_by(outputs, scores):
+    # Stable, such that ties keep the given order.
+    positions = range(0, len(outputs))
+    positions.sort(key=lambda position: scores[position])
+    return [outputs[position] for position in positions]
+
+
+def _projections(relation, outputs):
+    projections = []
+    def collect(name, projection):
+        projections.append(projection)
+        return None
+    output_projection.project_outputs(relation, outputs, collect)
+    return projections
+
+
+def support_order(relation, outputs):
+    """
+    Orders the outputs by the number of variables their projection depends
+    on (smallest first). 'outputs' is a list of tuples (name, variable BDD).
+    """
+    scores = [len(projection.support_indices()) for projection in _projections(relation, outputs)]
+    return _sorted_by(outputs, scores)
+
+
+def dependency_order(relation, outputs):
+    """
+    Orders the outputs by the number of other outputs which the choice of
+    their value interacts with (fewest first). These are the outputs in the
+    support of (relation / y) ^ (relation / ~y).
+    """
+    output_indices = set()
+    for (name, var) in outputs:
+        output_indices |= set(var.support_indices())
+    scores = []
+    for (name, var) in outputs:
+        interaction = (relation / var) ^ (relation / ~var)
+        others = (set(interaction.support_indices()) & output_indices) - set(var.support_indices())
+        scores.append(len(others))
+        del interaction
+    return _sorted_by(outputs, scores)
+
+
+def probe_order(relation, outputs):
+    """
+    Orders the outputs by the sizes of their lower and upper bounds in the
+    projection of the relation (smallest first).
+    """
+    import marduk_utils
+    scores = []
+    for ((name, var), projection) in zip(outputs, _projections(relation, outputs)):
+        (lower, upper) = marduk_utils.get_projection_lower_upper(var, projection)
+        scores.append(lower.size + upper.size)
+        del lower, upper
+    return _sorted_by(outputs, scores)
+
+
+def order(name, relation, outputs):
+    """
+    Returns the outputs (list of tuples (name, variable BDD)) in the order
+    of the given heuristic (not auto).
+    """
+    if name == SUPPORT:
+        return support_order(relation, outputs)
+    if name == DEPENDENCY:
+        return dependency_order(relation, outputs)
+    if name == PROBE:
+        return probe_order(relation, outputs)
+    return outputs[:]
+
+
+def extract(relation, outputs, careset):
+    """
+    Extracts the output functions in the given order with the cofactor
+    method (without further simplification): func = p // ((p + n) * careset).
+    Returns the tuple (functions, report), where functions maps the names to
+    the functions, and report is a list of tuples (name, size of the
+    projection, size of the function, seconds) in the order of extraction.
+    """
+    functions = {}
+    report = []
+    variables = dict(outputs)
+    def construct(name, projection):
+        begin = cpu_time()
+        var = variables[name]
+        positive_cofactor = projection / var
+        negative_cofactor = projection / ~var
+        p = positive_cofactor * ~negative_cofactor
+        n = negative_cofactor * ~positive_cofactor
+        func = p // ((p + n) * careset)
+        functions[name] = func
+        report.append((name, projection.size, func.size, cpu_time() - begin))
+        return func
+    output_projection.project_outputs(relation, outputs, construct)
+    return (functions, report)
+
+
+def choose(name, relation, outputs, careset, budget=DEFAULT_BUDGET):
+    """
+    Returns the outputs in the order of the given heuristic. For auto, the
+    orders of all other heuristics are tried (as long as the CPU time is
+    within the budget) by extracting the functions with extract(), and the
+    order with the smallest sum of function sizes is returned. Returns the
+    tuple (ordered outputs, list of lines which report the trials).
+    """
+    if name != AUTO:
+        return (order(name, relation, outputs), [])
+
+    start = cpu_time()
+    best = None
+    best_size = None
+    lines = []
+    for candidate in CANDIDATES:
+        if best != None and cpu_time() - start > budget:
+            lines.append("Output order %s: skipped (budget of %.2f seconds exceeded)" % (candidate, budget))
+            continue
+        begin = cpu_time()
+        candidate_outputs = order(candidate, relation, outputs)
+        (functions, report) = extract(relation, candidate_outputs, careset)
+        size = 0
+        for (output, projection_size, function_size, seconds) in report:
+            size += function_size
+        del functions, report
+        lines.append("Output order %s: %d nodes in output functions (%.2f seconds)" % \
+                     (candidate, size, cpu_time() - begin))
+        if best_size == None or size < best_size:
+            best = candidate_outputs
+            best_size = size
+    return (best, lines)
+
+
+def format_report(report):
+    """
+    Returns a list of lines for the report of an extraction (see extract).
+    """
+    lines = []
+    for (name, projection_size, function_size, seconds) in report:
+        lines.append("   %-24s projection %9d nodes, function %9d nodes, %7.2f seconds" % \
+                     (name, projection_size, function_size, seconds))
+    return lines
@@ -0,0 +1,98 @@
+##  ===========================================================================
+##  Author: Georg Hofferek <georg.hofferek@iaik.tugraz.at>
+##
+##  Copyright (c) 2009, 2010 by Graz University of Technology
+##
+##  This is free software; you can redistribute it and/or
+##  modify it under the terms of the GNU Lesser General Public
+##  License as published by the Free Software Foundation; either
+##  version 2 of the License, or (at your option) any later version.
+##
+##  This software is distributed in the hope that it will be useful,
+##  but WITHOUT ANY WARRANTY; without even the implied warranty of
+##  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+##  Lesser General Public License for more details.
+##
+##  You should have received a copy of the GNU Lesser General Public
+##  License along with this library; if not, write to the Free Software
+##  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307  USA.
+##
+##  For more information about this software see <http://rat.fbk.eu/ratsy>
+##  or email to the RATSY Team <ratsy@list.fbk.eu>.
+##  Please report bugs to <ratsy@list.fbk.eu>.
+##
+##  ===========================================================================
+
+
+
+"""
+This module contains the projection of a relation onto its single
+outputs by divide and conquer.
+"""
+
+from bddwrap import BDD
+
+
+def project_outputs(relation, outputs, solve, memo=None):
+    """
+    Projects the relation onto every single output, in the given order.
+    'outputs' is a list of tuples (name, variable BDD). For the k-th output,
+    solve(name, projection) is called, where projection is the relation in
+    which all outputs after the k-th one are existentially quantified, and
+    every output before it is replaced by the function which solve returned
+    for it (or existentially quantified, if solve returned None).
+
+    Thus with functions, this is the same as the usual sequential
+    extraction, which quantifies all other outputs one by one from the
+    relation and composes every function into the relation before the next
+    output. With None, the projections are the independent projections of
+    the relation.
+
+    Instead of O(n^2) quantifications for n outputs, the outputs are split
+    into halves: The second half is quantified once (as a cube), the first
+    half is solved recursively on the result, and the second half is solved
+    recursively on the relation with the functions (or quantification) of
+    the first half substituted. Every output is quantified O(log n) times.
+
+    If 'memo' is a dictionary, the quantifications of the second halves are
+    looked up in and stored to it, such that another projection of the same
+    relation (e.g. with functions instead of None) can reuse them. Every
+    entry keeps its operands alive, such that their nodes can not be reused
+    for other BDDs meanwhile.
+
+    Returns the list of the results of solve.
+    """
+    if len(outputs) == 0:
+        return []
+    if len(outputs) == 1:
+        return [solve(outputs[0][0], relation)]
+
+    half = len(outputs) / 2
+    left = outputs[:half]
+    right = outputs[half:]
+
+    right_cube = BDD.conjoin_all([var for (name, var) in right], relation.mgr)
+    if memo == None:
+        left_relation = relation.exists(right_cube)
+    else:
+        key = (relation.key, right_cube.key)
+        if not memo.has_key(key):
+            memo[key] = (relation, right_cube, relation.exists(right_cube))
+        left_relation = memo[key][2]
+    del right_cube
+    functions = project_outputs(left_relation, left, solve, memo)
+    del left_relation
+
+    right_relation = relation
+    quantified = []
+    for position in range(0, len(left)):
+        (name, var) = left[position]
+        if functions[position] == None:
+            quantified.append(var)
+        else:
+            right_relation = right_relation.compose(var, functions[position])
+    if len(quantified) > 0:
+        right_relation = right_relation.exists(BDD.conjoin_all(quantified, relation.mgr))
+
+    return functions + project_outputs(right_relation, right, solve, memo)
+
@@ -0,0 +1,236 @@
+##  ===========================================================================
+##  Author: Georg Hofferek <georg.hofferek@iaik.tugraz.at>
+##
+##  Copyright (c) 2009, 2010 by Graz University of Technology
+##
+##  This is free software; you can redistribute it and/or
+##  modify it under the terms of the GNU Lesser General Public
+##  License as published by the Free Software Foundation; either
+##  version 2 of the License, or (at your option) any later version.
+##
+##  This software is distributed in the hope that it will be useful,
+##  but WITHOUT ANY WARRANTY; without even the implied warranty of
+##  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+##  Lesser General Public License for more details.
+##
+##  You should have received a copy of the GNU Lesser General Public
+##  License along with this library; if not, write to the Free Software
+##  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307  USA.
+##
+##  For more information about this software see <http://rat.fbk.eu/ratsy>
+##  or email to the RATSY Team <ratsy@list.fbk.eu>.
+##  Please report bugs to <ratsy@list.fbk.eu>.
+##
+##  ===========================================================================
+
+
+"""
+This module contains conjunctively partitioned transition relations, and
+the image/preimage computation with early quantification on them.
+"""
+
+from bddwrap import BDD
+
+
+class PartitionedRelation(object):
+    """
+    A relation which is stored as a list of clusters, whose conjunction is
+    the relation. The monolithic relation is never built, unless
+    monolithic() is called.
+
+    The clusters are built from a list of parts by conjoining neighbouring
+    parts as long as the size of a cluster does not exceed the threshold.
+    With method IWLS95, the parts are ordered according to the heuristic of
+    Ranjan et al. (IWLS'95) first, such that the variables of the given cube
+    can be quantified as early as possible. With method THRESHOLD, the parts
+    are clustered in the given order. With method MONOLITHIC, there is only
+    one cluster.
+
+    and_exists computes (exists cube: bdd * relation). For every cube, a
+    schedule is computed once and stored: The clusters are conjoined in the
+    IWLS'95 order, and every variable of the cube is quantified directly
+    after the last cluster which depends on it.
+    """
+
+    MONOLITHIC = "Monolithic"
+    THRESHOLD = "Threshold"
+    IWLS95 = "Iwls95CP"
+
+    def __init__(self, parts, manager, method=IWLS95, threshold=1000, quantify_cube=None):
+        """
+        'parts' is a list of BDDs, whose conjunction is the relation.
+        'quantify_cube' is the cube of the variables which are usually
+        quantified, e.g. the next state variables for preimages. It is used
+        to order the parts before clustering (only for method IWLS95).
+        """
+        self.__manager = manager
+        self.__method = method
+        self.__threshold = threshold
+
+        # Maps the key of a cube to a tuple (cube, schedule), where the
+        # schedule is a list of tuples (cluster, cube of the variables
+        # quantified after the cluster). The cube is stored to keep its node
+        # alive, such that its key cannot be reused for another cube.
+        self.__schedules = {}
+
+        parts = [part for part in parts if not part.isOne()]
+        if method == PartitionedRelation.MONOLITHIC or len(parts) < 2:
+            self.__clusters = [BDD.conjoin_all(parts, manager)]
+        else:
+            if method == PartitionedRelation.IWLS95 and quantify_cube != None:
+                supports = [set(part.support_indices()) for part in parts]
+                order = PartitionedRelation.iwls95_order(supports, set(quantify_cube.support_indices()),
+                                                         [part.size for part in parts])
+                parts = [parts[i] for i in order]
+            self.__clusters = self.__cluster(parts)
+
+        self.__clusters = [cluster for cluster in self.__clusters if not cluster.isOne()]
+        self.__supports = [set(cluster.support_indices()) for cluster in self.__clusters]
+
+
+    def iwls95_order(supports, quantify, sizes):
+        """
+        Orders parts with the given supports (sets of variable indices) for
+        early quantification of the given variables (set of indices), and
+        returns the list of positions in this order.
+
+        This is a simplified version of the cost function of IWLS'95: The
+        part which allows to quantify the largest share of its quantifiable
+        variables comes first. Ties are broken in favour of parts which
+        introduce fewer new variables, and then of smaller parts.
+        """
+        remaining = range(0, len(supports))
+        introduced = set()
+        order = []
+        while len(remaining) > 0:
+            best = None
+            best_score = None
+            for i in remaining:
+                others = set()
+                for k in remaining:
+                    if k != i:
+                        others |= supports[k]
+                quantifiable = supports[i] & quantify
+                if len(quantifiable) > 0:
+                    benefit = float(len(quantifiable - others)) / len(quantifiable)
+                else:
+                    benefit = 0.0
+                new_vars = len(supports[i] - quantify - introduced)
+                score = (benefit, -new_vars, -sizes[i])
+                if best_score == None or score > best_score:
+                    best = i
+                    best_score = score
+            order.append(best)
+            remaining.remove(best)
+            introduced |= supports[best]
+        return order
+    iwls95_order = staticmethod(iwls95_order)
+
+
+    def __cluster(self, parts):
+        clusters = []
+        current = parts[0]
+        for part in parts[1:]:
+            candidate = current * part
+            if candidate.size <= self.__threshold:
+                current = candidate
+            else:
+                clusters.append(current)
+                current = part
+        clusters.append(current)
+        return clusters
+
+
+    def get_clusters(self):
+        return self.__clusters[:]
+    clusters = property(get_clusters)
+
+    def get_method(self):
+        return self.__method
+    method = property(get_method)
+
+    def get_threshold(self):
+        return self.__threshold
+    threshold = property(get_threshold)
+
+    def get_size(self):
+        """
+        Returns the sum of the sizes of all clusters.
+        """
+        result = 0
+        for cluster in self.__clusters:
+            result += cluster.size
+        return result
+    size = property(get_size)
+
+
+    def combine(self, other, quantify_cube=None):
+        """
+        Returns a new relation which is the conjunction of self and other.
+        The clusters of both relations are clustered again.
+        """
+        return PartitionedRelation(self.__clusters + other.clusters, self.__manager,
+                                   self.__method, self.__threshold, quantify_cube)
+
+
+    def monolithic(self):
+        """
+        Returns the monolithic relation, i.e., the conjunction of all
+        clusters.
+        """
+        return BDD.conjoin_all(self.__clusters, self.__manager)
+
+
+    def conjoin(self, bdd):
+        """
+        Returns bdd * relation. The clusters are conjoined one after the
+        other, starting with bdd.
+        """
+        result = bdd
+        for cluster in self.__clusters:
+            if result.isZero():
+                break
+            result = result * cluster
+        return result
+
+
+    def __get_schedule(self, cube):
+        key = cube.key
+        entry = self.__schedules.get(key)
+        if entry != None and entry[0] == cube:
+            return entry[1]
+
+        quantify = set(cube.support_indices())
+        sizes = [cluster.size for cluster in self.__clusters]
+        order = PartitionedRelation.iwls95_order(self.__supports, quantify, sizes)
+
+        # Every variable is quantified after the last cluster depending on
+        # it. Variables which do not occur in any cluster are quantified
+        # together with the first one.
+        last = {}
+        for position in range(0, len(order)):
+            for index in self.__supports[order[position]] & quantify:
+                last[index] = position
+        schedule = []
+        for position in range(0, len(order)):
+            step_vars = [index for index in quantify if last.get(index, 0) == position]
+            step_cube = BDD.conjoin_all([BDD.ith_var(self.__manager, index) for index in step_vars],
+                                        self.__manager)
+            schedule.append((self.__clusters[order[position]], step_cube))
+
+        self.__schedules[key] = (cube, schedule)
+        return schedule
+
+
+    def and_exists(self, bdd, cube):
+        """
+        Returns (exists cube: bdd * relation), with early quantification.
+        """
+        if len(self.__clusters) == 0:
+            return bdd.exists(cube)
+        result = bdd
+        for (cluster, step_cube) in self.__get_schedule(cube):
+            result = result.andExists(cluster, step_cube)
+            if result.isZero():
+                break
+        return result
@@ -0,0 +1,218 @@
+##  ===========================================================================
+##  Author: Georg Hofferek <georg.hofferek@iaik.tugraz.at>
+##
+##  Copyright (c) 2009, 2010 by Graz University of Technology
+##
+##  This is free software; you can redistribute it and/or
+##  modify it under the terms of the GNU Lesser General Public
+##  License as published by the Free Software Foundation; either
+##  version 2 of the License, or (at your option) any later version.
+##
+##  This software is distributed in the hope that it will be useful,
+##  but WITHOUT ANY WARRANTY; without even the implied warranty of
+##  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+##  Lesser General Public License for more details.
+##
+##  You should have received a copy of the GNU Lesser General Public
+##  License along with this library; if not, write to the Free Software
+##  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307  USA.
+##
+##  For more information about this software see <http://rat.fbk.eu/ratsy>
+##  or email to the RATSY Team <ratsy@list.fbk.eu>.
+##  Please report bugs to <ratsy@list.fbk.eu>.
+##
+##  ===========================================================================
+
+
+
+"""
+This module contains the analysis of relations between combinational
+inputs and outputs (e.g. of a strategy).
+"""
+
+from bddwrap import BDD
+import output_projection
+
+
+class RelationAnalysis(object):
+    """
+    Computes the lower and upper bounds of every output of a relation once,
+    and derives the sets of defined, fixed, DC and non-DC input vertices
+    from them (see characterize).
+
+    The projections onto the single outputs are computed with
+    output_projection.project_outputs. The quantifications and the bounds
+    are memoized by the nodes of their operands, such that the output
+    function generator can reuse them via project_outputs and
+    get_projection_bounds: All projections which do not depend on a
+    function chosen before (at least the first output and the
+    quantifications of the whole relation) are taken from the analysis.
+    Call release() when they are not needed any more.
+    """
+
+    def __init__(self, relation, input_vars, output_vars):
+        """
+        'input_vars' and 'output_vars' are lists of the BDDs of the
+        combinational inputs and outputs of the relation.
+        """
+        self.__relation = relation
+        self.__input_vars = input_vars[:]
+        self.__output_vars = output_vars[:]
+        self.__output_cube = BDD.conjoin_all(output_vars, relation.mgr)
+        self.__quantifications = {}
+        # Maps (output key, projection key) to (output, projection, bounds).
+        self.__bounds = {}
+        self.__output_bounds = None
+        self.__defined = None
+        self.__fixed = None
+        self.__non_dc = None
+        self.__dc = None
+
+
+    def get_relation(self):
+        return self.__relation
+    relation = property(get_relation)
+
+    def get_output_vars(self):
+        return self.__output_vars[:]
+    output_vars = property(get_output_vars)
+
+
+    def position(self, output):
+        """
+        Returns the position of the given output (BDD) in the list of
+        outputs, or None if it is not an output of the relation.
+        """
+        for position in range(0, len(self.__output_vars)):
+            if self.__output_vars[position] == output:
+                return position
+        return None
+
+
+    def project_outputs(self, relation, outputs, solve):
+        """
+        Like output_projection.project_outputs, but shares the
+        quantifications with the analysis.
+        """
+        return output_projection.project_outputs(relation, outputs, solve, self.__quantifications)
+
+
+    def get_projection_bounds(self, output, projection):
+        """
+        Returns the tuple (lower, upper) of the bounds for output in the
+        given projection (see marduk_utils.get_projection_lower_upper).
+        """
+        import marduk_utils
+        key = (output.key, projection.key)
+        if not self.__bounds.has_key(key):
+            bounds = marduk_utils.get_projection_lower_upper(output, projection)
+            self.__bounds[key] = (output, projection, bounds)
+        return self.__bounds[key][2]
+
+
+    def get_output_bounds(self):
+        """
+        Returns the list of the bounds (lower, upper) of all outputs of the
+        relation, in the order of output_vars.
+        """
+        if self.__output_bounds == None:
+            bounds = []
+            def collect(output, projection):
+                bounds.append(self.get_projection_bounds(output, projection))
+                return None
+            self.project_outputs(self.__relation, [(output, output) for output in self.__output_vars], collect)
+            self.__output_bounds = bounds
+        return self.__output_bounds[:]
+    output_bounds = property(get_output_bounds)
+
+
+    def get_defined(self):
+        """
+        Returns the set of input vertices for which the relation is defined.
+        """
+        if self.__defined == None:
+            self.__defined = self.__relation.exists(self.__output_cube)
+        return self.__defined
+    defined = property(get_defined)
+
+
+    def get_fixed(self):
+        """
+        Returns the set of input vertices for which all outputs are fixed.
+        """
+        if self.__fixed == None:
+            fixed_per_output = [~(lower ^ upper) for (lower, upper) in self.output_bounds]
+            self.__fixed = BDD.conjoin_all(fixed_per_output, self.__relation.mgr)
+        return self.__fixed
+    fixed = property(get_fixed)
+
+
+    def get_non_dc(self):
+        """
+        Returns the set of input vertices for which some output is not fixed
+        and can not be written as a DC term, i.e., setting the output to its
+        lower or upper bound leaves the relation for some other outputs.
+        """
+        if self.__non_dc == None:
+            bounds = self.output_bounds
+            non_dc_per_output = []
+            for position in range(0, len(self.__output_vars)):
+                output = self.__output_vars[position]
+                (lower, upper) = bounds[position]
+                tmp_rel = self.__relation * (lower ^ upper)   # Cut off constant vertices
+
+                rel_lower = tmp_rel.compose(output, lower)
+                rel_upper = tmp_rel.compose(output, upper)
+
+                tmp_non_dc = ((~rel_lower) * tmp_rel).exists(self.__output_cube)
+                tmp_non_dc += ((~rel_upper) * tmp_rel).exists(self.__output_cube)
+
+                non_dc_per_output.append(tmp_non_dc)
+                del tmp_non_dc, tmp_rel, rel_lower, rel_upper, lower, upper
+            del bounds
+            self.__non_dc = BDD.disjoin_all(non_dc_per_output, self.__relation.mgr)
+        return self.__non_dc
+    non_dc = property(get_non_dc)
+
+
+    def get_dc(self):
+        """
+        Returns the set of defined input vertices which are neither fixed
+        nor non-DC.
+        """
+        if self.__dc == None:
+            self.__dc = self.defined * ~(self.fixed + self.non_dc)
+        return self.__dc
+    dc = property(get_dc)
+
+
+    def characterize(self, return_bdds=False):
+        """
+        Returns the dictionary of marduk_utils.characterize_relation.
+        """
+        num_inputs = len(self.__input_vars)
+        result = {}
+        result['num_inputs'] = num_inputs
+        result['num_outputs'] = len(self.__output_vars)
+        result['num_defined'] = self.defined.count_minterm(num_inputs)
+        result['num_fixed'] = self.fixed.count_minterm(num_inputs)
+        result['num_non_dc'] = self.non_dc.count_minterm(num_inputs)
+        result['num_dc'] = (2 ** num_inputs) - (result['num_fixed'] + result['num_non_dc'])
+        if return_bdds:
+            result['fixed_bdd'] = self.fixed
+            result['non_dc_bdd'] = self.non_dc
+            result['dc_bdd'] = self.dc
+        return result
+
+
+    def release(self):
+        """
+        Drops all memoized projections, bounds and sets of vertices.
+        """
+        self.__quantifications = {}
+        self.__bounds = {}
+        self.__output_bounds = None
+        self.__defined = None
+        self.__fixed = None
+        self.__non_dc = None
+        self.__dc = None
@@ -32,6 +32,8 @@ import math
 from nusmv import dd
 from marduk_utils import Variable
 from marduk_utils import VariableType
+from marduk_utils import group_variables
+from cpre import CPreEngine
 
 class CounterstrategyComputer(object):
     """
@@ -63,6 +65,11 @@ class CounterstrategyComputer(object):
         #: @type: L{SpecDebugUtils}
         self.__utils = utils
 
+        #: The engine computing (and memoizing) the mixed preimages.
+        #: @type: L{CPreEngine}
+        self.__cpre = CPreEngine(None, None, None, None,
+                                 utils.swap_present_next)
+
 
     def winm_env(self, early_abort = False):
         """
@@ -135,6 +142,7 @@ class CounterstrategyComputer(object):
         x_array = [] # 4 dimensional array in [a][j][i][c]
         m = len(assumptions)
         n = len(guarantees)
+        tracer = self.__utils.fixpoint_tracer
 
         Z = BDD.ZERO(self.__utils.dd_mgr)
         Z_old = BDD.ONE(self.__utils.dd_mgr)
@@ -152,8 +160,10 @@ class CounterstrategyComputer(object):
 
                 const_for_y_loop = (~guarantees[j]) + coax_env_Z
 
+                b = 0 # counts the iterations in Y (for tracing only)
                 while Y != Y_old:
                     Y_old = Y
+                    b += 1
                     interX = BDD.ONE(self.__utils.dd_mgr)
 
                     const_for_i_loop = const_for_y_loop * self._coax_env(Y)
@@ -172,15 +182,18 @@ class CounterstrategyComputer(object):
                                 (assumptions[i] + self._coax_env(X))
                             # x_array[a][j][i][c] = X:
                             self.__utils.set_element_4d(x_array, a, j, i, c, X)
+                            tracer.event("winm_env", "X", c, X, a=a, j=j, i=i)
                             c += 1
                         interX *= X
                     Y = interX
+                    tracer.event("winm_env", "Y", b, Y, a=a, j=j)
                 #y_array[a][j] = Y:
                 self.__utils.set_element_2d(y_array, a, j, Y)
                 unionY += Y
             Z = unionY
             #z_array[a] = Z:
             self.__utils.set_element_1d(z_array, a, Z)
+            tracer.event("winm_env", "Z", a, Z)
             if early_abort and self.__utils.init <= Z:
                 return (Z, z_array, y_array, x_array)
             a += 1
@@ -633,17 +646,8 @@ class CounterstrategyComputer(object):
                  force a play into 'states' in one step.
         @rtype: L{BDD}
         """
-        env_transitions = self.__utils.env_trans
-        sys_transitions = self.__utils.sys_trans
-        output_product = self.__utils.next_out_var_cube
-        input_product = self.__utils.next_in_var_cube
-
-        swapped_states = self.__utils.swap_present_next(states)
-        target_or_forbidden = (~sys_transitions) + swapped_states
-        env_moves_to_target = (target_or_forbidden).forall(output_product)
-        mixed_preimage = env_moves_to_target.andExists(env_transitions, \
-                                                       input_product)
-        return mixed_preimage
+        self._update_cpre()
+        return self.__cpre.environment(states)
 
     def _coax_env_input(self, states):
         """
@@ -661,15 +665,31 @@ class CounterstrategyComputer(object):
                  next_input.
         @rtype: L{BDD}
         """
-        env_transitions = self.__utils.env_trans
-        sys_transitions = self.__utils.sys_trans
-        output_product = self.__utils.next_out_var_cube
+        self._update_cpre()
+        return self.__cpre.environment_moves(states)
+
+    def _update_cpre(self):
+        """
+        Passes the current transition relations and cubes to the engine.
+
+        The engine drops its memoized results only if any of them changed.
+        """
+        self.__cpre.update(self.__utils.env_trans, self.__utils.sys_trans,
+                           self.__utils.next_in_var_cube,
+                           self.__utils.next_out_var_cube)
 
-        swapped_states = self.__utils.swap_present_next(states)
-        target_or_forbidden = (~sys_transitions) + swapped_states
-        env_moves_to_target = (target_or_forbidden).forall(output_product)
-        allowed_env_moves_to_target = env_moves_to_target * env_transitions
-        return allowed_env_moves_to_target
+    def get_cpre(self):
+        """
+        Returns the engine computing the mixed preimages.
+
+        @return: The engine computing the mixed preimages.
+        @rtype: L{CPreEngine}
+        """
+        return self.__cpre
+
+    #: The engine computing the mixed preimages (e.g. for its statistics).
+    #: @type: L{CPreEngine}
+    cpre = property(get_cpre)
 
 
 
@@ -704,6 +724,12 @@ class CounterstrategyComputer(object):
             var = Variable(var_name, VariableType.STATE, present, next)
             all_vars.append(var)
 
+        # Group every ps/ns pair, and the whole counter.
+        if self.__utils.var_groups:
+            for i in range(0,n):
+                group_variables([present_bdds[i], next_bdds[i]])
+            group_variables(present_bdds + next_bdds)
+
         return(present_bdds, next_bdds, all_vars)
 
 
@@ -33,6 +33,7 @@ from nusmv.parser import symbols
 from xml.dom.minidom import parse, parseString
 import time
 from bddwrap import BDD
+from cpre import CPreEngine
 from nusmv import game
 from nusmv import cmd
 from nusmv import prop
@@ -298,6 +299,11 @@ class GR1MinTarget(MinTarget):
         #: @type: L{SpecDebugUtils}
         self.__utils = utils
 
+        #: The engine computing (and memoizing) the mixed preimages.
+        #: @type: L{CPreEngine}
+        self.__cpre = CPreEngine(None, None, None, None,
+                                 utils.swap_present_next)
+
         #: A dictionary that tells us, which sections should be minimized.
         #:
         #: A dictionary that maps constants for sections as defined in
@@ -688,10 +694,11 @@ class GR1MinTarget(MinTarget):
             for j in range(0, n):
                 old_y = BDD.ONE(self.__utils.dd_mgr)
                 y = BDD.ZERO(self.__utils.dd_mgr)
+                # z does not change within the y loop:
+                guarantee_and_coax_z = guarantees[j] * self._coax_fast(z)
                 while y != old_y:  # LeastFixpoint(y)
                     old_y = y
-                    start = (guarantees[j] * self._coax_fast(z)) + \
-                            self._coax_fast(y)
+                    start = guarantee_and_coax_z + self._coax_fast(y)
                     y = BDD.ZERO(self.__utils.dd_mgr)
                     for i in range(0, m):
                         old_x = BDD.ZERO(self.__utils.dd_mgr)
@@ -731,17 +738,11 @@ class GR1MinTarget(MinTarget):
                  system in one step.
         @rtype: L{BDD}
         """
-        env_transitions = self.__current[GR1Sect.ENV_TRANS]
-        sys_transitions = self.__current[GR1Sect.SYS_TRANS]
-        output_product = self.__utils.next_out_var_cube
-        input_product = self.__utils.next_in_var_cube
-
-        swapped_states = self.__utils.swap_present_next(states)
-        sys_moves_to_target = swapped_states.andExists(sys_transitions, \
-                                                       output_product)
-        target_or_forbidden = sys_moves_to_target + (~env_transitions)
-        mixed_preimage = target_or_forbidden.forall(input_product)
-        return mixed_preimage
+        self.__cpre.update(self.__current[GR1Sect.ENV_TRANS],
+                           self.__current[GR1Sect.SYS_TRANS],
+                           self.__utils.next_in_var_cube,
+                           self.__utils.next_out_var_cube)
+        return self.__cpre.system(states)
 
 
     def _get_vars_to_remove(self, subset):
@@ -1036,6 +1037,8 @@ class GR1MinTarget(MinTarget):
         msg += "already realizable\n  -> only "
         msg += str(self.__realizability_checks - self.__checks_covered_by_supersets)
         msg += "  checks were actually carried out\n"
+        for line in self.__cpre.format_stats():
+            msg += "  " + line + "\n"
 
         self._log(msg)
         PLog.log(msg)
@@ -33,6 +33,7 @@ from nusmv.parser import symbols
 from xml.dom.minidom import parse, parseString
 import time
 from bddwrap import BDD
+from cpre import CPreEngine
 from nusmv import game
 from nusmv import cmd
 from nusmv import prop
@@ -413,6 +414,11 @@ class RatMinTarget(MinTarget):
         #: @type: L{SpecDebugUtils}
         self._utils = utils
 
+        #: The engine computing (and memoizing) the mixed preimages.
+        #: @type: L{CPreEngine}
+        self._cpre = CPreEngine(None, None, None, None,
+                                utils.swap_present_next)
+
         #: A dictionary that tells us, which sections should be minimized.
         #:
         #: A dictionary that maps constants for sections as
@@ -730,6 +736,8 @@ class RatMinTarget(MinTarget):
         done -= self._checks_covered_by_supersets
         done -= self._checks_covered_by_subsets
         msg += "%d checks were actually carried out\n" % done
+        for line in self._cpre.format_stats():
+            msg += "  %s\n" % line
         return msg
 
     def _compute_indices_of_things_to_minimize(self):
@@ -911,10 +919,11 @@ class RatMinTarget(MinTarget):
             for j in range(0, n):
                 old_y = BDD.ONE(self._utils.dd_mgr)
                 y = BDD.ZERO(self._utils.dd_mgr)
+                # z does not change within the y loop:
+                guarantee_and_coax_z = guarantees[j] * self._coax_fast(z)
                 while y != old_y:  # LeastFixpoint(y)
                     old_y = y
-                    start = (guarantees[j] * self._coax_fast(z)) + \
-                            self._coax_fast(y)
+                    start = guarantee_and_coax_z + self._coax_fast(y)
                     y = BDD.ZERO(self._utils.dd_mgr)
                     for i in range(0, m):
                         old_x = BDD.ZERO(self._utils.dd_mgr)
@@ -955,17 +964,20 @@ class RatMinTarget(MinTarget):
         @rtype: L{BDD}
         """
 
-        env_transitions = self._current[GR1Sect.ENV_TRANS]
-        sys_transitions = self._current[GR1Sect.SYS_TRANS]
-        output_product = self._utils.next_out_var_cube
-        input_product = self._utils.next_in_var_cube
+        self._update_cpre()
+        return self._cpre.system(states)
 
-        swapped_states = self._utils.swap_present_next(states)
-        sys_moves_to_target = swapped_states.andExists(sys_transitions, \
-                                                       output_product)
-        target_or_forbidden = sys_moves_to_target + (~env_transitions)
-        mixed_preimage = target_or_forbidden.forall(input_product)
-        return mixed_preimage
+    def _update_cpre(self):
+        """
+        Passes the current transition relations and cubes to the engine.
+
+        The engine drops its memoized results only if any of them changed,
+        e.g. because the current specification was modified.
+        """
+        self._cpre.update(self._current[GR1Sect.ENV_TRANS],
+                          self._current[GR1Sect.SYS_TRANS],
+                          self._utils.next_in_var_cube,
+                          self._utils.next_out_var_cube)
 
 
     def _can_win_system(self, winning_region_system):
@@ -1941,10 +1953,11 @@ class RatMinTargetOverApprox(RatMinTarget):
             for j in range(0, n):
                 old_y = BDD.ONE(self._utils.dd_mgr)
                 y = BDD.ZERO(self._utils.dd_mgr)
+                # z does not change within the y loop:
+                guarantee_and_coax_z = guarantees[j] * self._coax_fast(z)
                 while y != old_y:  # LeastFixpoint(y)
                     old_y = y
-                    start = (guarantees[j] * self._coax_fast(z)) + \
-                            self._coax_fast(y)
+                    start = guarantee_and_coax_z + self._coax_fast(y)
                     y = BDD.ZERO(self._utils.dd_mgr)
                     for i in range(0, m):
                         old_x = BDD.ZERO(self._utils.dd_mgr)
@@ -2070,10 +2083,11 @@ class RatMinTargetOverApprox(RatMinTarget):
             for j in range(0, n):
                 old_y = BDD.ONE(self._utils.dd_mgr)
                 y = BDD.ZERO(self._utils.dd_mgr)
+                # z does not change within the y loop:
+                guarantee_and_coax_z = guarantees[j] * self._coax_fast(z)
                 while y != old_y:  # LeastFixpoint(y)
                     old_y = y
-                    start = (guarantees[j] * self._coax_fast(z)) + \
-                            self._coax_fast(y)
+                    start = guarantee_and_coax_z + self._coax_fast(y)
                     y = BDD.ZERO(self._utils.dd_mgr)
                     for i in range(0, m):
                         old_x = BDD.ZERO(self._utils.dd_mgr)
@@ -2119,17 +2133,8 @@ class RatMinTargetOverApprox(RatMinTarget):
         @rtype: L{BDD}
         """
 
-        env_transitions = self._current[GR1Sect.ENV_TRANS]
-        sys_transitions = self._current[GR1Sect.SYS_TRANS]
-        output_product = self._utils.next_out_var_cube
-        input_product = self._utils.next_in_var_cube
-
-        swapped_states = self._utils.swap_present_next(states)
-        target_or_forbidden = (~sys_transitions) + swapped_states
-        env_moves_to_target = (target_or_forbidden).forall(output_product)
-        mixed_preimage = env_moves_to_target.andExists(env_transitions, \
-                                                       input_product)
-        return mixed_preimage
+        self._update_cpre()
+        return self._cpre.environment(states)
 
 
     def _superset_already_realizable_over_approx(self, subset):
@@ -120,32 +120,42 @@ class SatSolver(object):
         """
 
         n = len(self.__utils.guarantees)
+        tracer = self.__utils.fixpoint_tracer
         # First of all we compute the cooperative winning region of a
         # generalized buechi game. This is basically equal to the computation
         # of the winning region of a buechi game, only the operator EX is
         # used instead of MX (instead of coax).
         Y = BDD.ONE(self.__utils.dd_mgr)
         Y_old = BDD.ZERO(self.__utils.dd_mgr)
+        a = 0 # counts the iterations in Y (for tracing only)
         while Y != Y_old:
             Y_old = Y
+            a += 1
             tmp = BDD.ONE(self.__utils.dd_mgr)
             for j in range(0, n):
                 Z = BDD.ZERO(self.__utils.dd_mgr)
                 Z_old = BDD.ONE(self.__utils.dd_mgr)
+                c = 0 # counts the iterations in Z (for tracing only)
                 while Z != Z_old:
                     Z_old = Z
+                    c += 1
                     Z = Y * (self.__utils.guarantees[j] + self._ex(Z))
+                    tracer.event("sat_all_sys_fair", "Z", c, Z, a=a, j=j)
                 tmp *= self._ex(Z)
             Y = tmp
+            tracer.event("sat_all_sys_fair", "Y", a, Y)
         # The result is now in Y.
 
         # Finally we compute all states from which one of the previously
         # computed states Y can be reached:
         R = BDD.ZERO(self.__utils.dd_mgr)
         R_old = BDD.ONE(self.__utils.dd_mgr)
+        c = 0
         while R != R_old:
             R_old = R
+            c += 1
             R = Y + self._ex(R)
+            tracer.event("sat_all_sys_fair", "R", c, R)
         
         # The result is in R.
         return R
@@ -167,6 +177,7 @@ class SatSolver(object):
         @rtype: L{BDD}
         """
         m = len(self.__utils.assumptions)
+        tracer = self.__utils.fixpoint_tracer
 
         # First of all we compute a region, in which one of the
         # env_fairness[i] is never fulfilled while there exist a sequence of
@@ -175,9 +186,12 @@ class SatSolver(object):
         for i in range(0, m):
             Y = BDD.ONE(self.__utils.dd_mgr)
             Y_old = BDD.ZERO(self.__utils.dd_mgr)
+            c = 0 # counts the iterations in Y (for tracing only)
             while Y != Y_old:
                 Y_old = Y
+                c += 1
                 Y = (~self.__utils.assumptions[i]) * self._ex(Y)
+                tracer.event("sat_not_env_fair", "Y", c, Y, i=i)
             globally_not_env_fair += Y
         # The result is now in globally_not_env_fair.
 
@@ -185,9 +199,12 @@ class SatSolver(object):
         # computed states globally_not_env_fair can be reached:
         R = BDD.ZERO(self.__utils.dd_mgr)
         R_old = BDD.ONE(self.__utils.dd_mgr)
+        c = 0
         while R != R_old:
             R_old = R
+            c += 1
             R = globally_not_env_fair + self._ex(R)
+            tracer.event("sat_not_env_fair", "R", c, R)
 
         # The result is now in R.
         return R
@@ -32,6 +32,7 @@ from nusmv import prop
 from nusmv.game import bddfsm
 from nusmv import dd
 from bddwrap import BDD
+from variable_registry import VariableRegistry
 import sys
 
 class SpecDebugUtils(object): 
@@ -49,6 +50,14 @@ class SpecDebugUtils(object):
     @author: Robert Koenighofer <robert.koenighofer@student.tugraz.at>
     @version: 1.0.0
     """
+
+    #: The names of the variable groups in the L{VariableRegistry}, which are
+    #: used for debugging.
+    INPUT_GROUP = "debug_input"
+    OUTPUT_GROUP = "debug_output"
+    IX_GROUP = "debug_ix"
+    JX_GROUP = "debug_jx"
+
     def __init__(self, marduk):
         """
         Constructor.
@@ -167,15 +176,10 @@ class SpecDebugUtils(object):
         #: @type: list<L{BDD}>
         self.__assumptions = None
 
-        #: A list of bdds, each representing the present state of a certain
-        #: variable.
-        #: @type: list<L{BDD}>
-        self.__present_var_bdds = []
-
-        #: A list of bdds, each representing the next state of a certain
-        #: variable.
-        #: @type: list<L{BDD}>
-        self.__next_var_bdds = []
+        #: The registry of variable cubes of the dd manager. It also holds
+        #: the permutation which swaps present and next variables.
+        #: @type: L{VariableRegistry}
+        self.__registry = VariableRegistry.get(self.__dd_mgr)
 
         #: A cube of all present input variables.
         #: @type: L{BDD}
@@ -225,48 +229,45 @@ class SpecDebugUtils(object):
         #: @type: int
         self.__reorder_method = marduk.reorder_method
 
+        #: If True, the present and next state of new variables are grouped
+        #: for reordering.
+        #: @type: bool
+        self.__var_groups = marduk.var_groups
+
+        #: The tracer for the iterations of fixpoint computations.
+        #: @type: L{FixpointTracer}
+        self.__fixpoint_tracer = marduk.fixpoint_tracer
+
         self._init_cubes()
 
     def _init_cubes(self):
         """
         Initializes all cubes.
-        """
-        self.__present_input_cube = BDD.ONE(self.__dd_mgr)
-        self.__next_input_cube = BDD.ONE(self.__dd_mgr)
-        for in_var in self.__input_vars:
-            self.__present_input_cube *= in_var.ps
-            self.__next_input_cube *= in_var.ns
-            self.__present_var_bdds.append(in_var.ps)
-            self.__next_var_bdds.append(in_var.ns)
-        self.__present_output_cube = BDD.ONE(self.__dd_mgr)
-        self.__next_output_cube = BDD.ONE(self.__dd_mgr)
-        for out_var in self.__output_vars:
-            self.__present_output_cube *= out_var.ps
-            self.__next_output_cube *= out_var.ns
-            self.__present_var_bdds.append(out_var.ps)
-            self.__next_var_bdds.append(out_var.ns)
-        self.__present_ix_cube = BDD.ONE(self.__dd_mgr)
-        self.__next_ix_cube = BDD.ONE(self.__dd_mgr)
-        for ix_var in self.__ix_vars:
-            self.__present_ix_cube *= ix_var.ps
-            self.__next_ix_cube *= ix_var.ns
-            self.__present_var_bdds.append(ix_var.ps)
-            self.__next_var_bdds.append(ix_var.ns)
-        self.__present_jx_cube = BDD.ONE(self.__dd_mgr)
-        self.__next_jx_cube = BDD.ONE(self.__dd_mgr)
-        for jx_var in self.__jx_vars:
-            self.__present_jx_cube *= jx_var.ps
-            self.__next_jx_cube *= jx_var.ns
-            self.__present_var_bdds.append(jx_var.ps)
-            self.__next_var_bdds.append(jx_var.ns)
-        self.__present_cube = self.__present_input_cube *\
-                              self.__present_output_cube *\
-                              self.__present_ix_cube *\
-                              self.__present_jx_cube
-        self.__next_cube = self.__next_input_cube *\
-                           self.__next_output_cube *\
-                           self.__next_ix_cube *\
-                           self.__next_jx_cube
+
+        The cubes are taken from the registry of the dd manager, which
+        builds them only once for every set of variables.
+        """
+        registry = self.__registry
+        registry.set_variables(self.INPUT_GROUP, self.__input_vars)
+        registry.set_variables(self.OUTPUT_GROUP, self.__output_vars)
+        registry.set_variables(self.IX_GROUP, self.__ix_vars)
+        registry.set_variables(self.JX_GROUP, self.__jx_vars)
+        self.__present_input_cube = registry.present_cube(self.INPUT_GROUP)
+        self.__next_input_cube = registry.next_cube(self.INPUT_GROUP)
+        self.__present_output_cube = registry.present_cube(self.OUTPUT_GROUP)
+        self.__next_output_cube = registry.next_cube(self.OUTPUT_GROUP)
+        self.__present_ix_cube = registry.present_cube(self.IX_GROUP)
+        self.__next_ix_cube = registry.next_cube(self.IX_GROUP)
+        self.__present_jx_cube = registry.present_cube(self.JX_GROUP)
+        self.__next_jx_cube = registry.next_cube(self.JX_GROUP)
+        self.__present_cube = registry.present_cube(self.INPUT_GROUP,
+                                                    self.OUTPUT_GROUP,
+                                                    self.IX_GROUP,
+                                                    self.JX_GROUP)
+        self.__next_cube = registry.next_cube(self.INPUT_GROUP,
+                                              self.OUTPUT_GROUP,
+                                              self.IX_GROUP,
+                                              self.JX_GROUP)
 
 
     def get_spec(self):
@@ -876,7 +877,7 @@ class SpecDebugUtils(object):
         @return: A bdd where the state variables are swapped.
         @rtype: L{BDD}
         """
-        return bdd.swapVariables(self.__present_var_bdds, self.__next_var_bdds)
+        return self.__registry.swap(bdd)
 
     def choose_val(self, bdd, var, current_next):
         """
@@ -1304,6 +1305,34 @@ class SpecDebugUtils(object):
         """
         dd.dd_autodyn_enable(self.__dd_mgr, self.__dyn_reorder_method)
 
+    def get_var_groups(self):
+        """
+        Returns True if the present and next state of new variables should
+        be grouped for reordering.
+
+        @return: True if variables should be grouped.
+        @rtype: bool
+        """
+        return self.__var_groups
+
+    #: True if the present and next state of new variables should be grouped
+    #: for reordering.
+    #: @type: bool
+    var_groups = property(get_var_groups)
+
+    def get_fixpoint_tracer(self):
+        """
+        Returns the tracer for the iterations of fixpoint computations.
+
+        @return: The tracer for the iterations of fixpoint computations.
+        @rtype: L{FixpointTracer}
+        """
+        return self.__fixpoint_tracer
+
+    #: The tracer for the iterations of fixpoint computations.
+    #: @type: L{FixpointTracer}
+    fixpoint_tracer = property(get_fixpoint_tracer)
+
     def disable_dyn_reordering(self):
         """
         Disables the dynamic reordering of bdds.
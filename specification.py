@@ -37,6 +37,8 @@ class Specification(object):
         self.__trans1 = None
         self.__trans2 = None
         self.__trans12 = None
+        self.__trans1_parts = None
+        self.__trans2_parts = None
         self.__assumptions = []
         self.__guarantees = []
 
@@ -47,6 +49,8 @@ class Specification(object):
         self.__trans1 = None
         self.__trans2 = None
         self.__trans12 = None
+        self.__trans1_parts = None
+        self.__trans2_parts = None
         self.__assumptions = []
         self.__guarantees = []
 
@@ -184,6 +188,13 @@ class Specification(object):
                     var.ps.print_minterm()
                     var.ns.print_minterm()
                     print "#####################"
+
+        # Keep present and next state of every variable together when
+        # reordering, such that swapping them stays cheap.
+        if self.__marduk.var_groups:
+            for var in list:
+                if not marduk_utils.group_variables([var.ps, var.ns]) and self.__marduk.verbose > 0:
+                    print "Could not group present and next state of variable", var.name
         return list
                 
 
@@ -220,6 +231,9 @@ class Specification(object):
             opt.set_monolithic(opt.OptsHandler_get_instance())
         elif self.__marduk.partition == "Iwls95CP":
             opt.set_iwls95cp_partitioning(opt.OptsHandler_get_instance())
+        set_threshold = getattr(opt, "set_conj_part_threshold", None)
+        if self.__marduk.partition in ("Threshold", "Iwls95CP") and set_threshold != None:
+            set_threshold(opt.OptsHandler_get_instance(), self.__marduk.cluster_threshold)
 
         # Command 'go' comprises the following commands :
         # 1) read_model
@@ -288,22 +302,28 @@ class Specification(object):
         invars_2_ptr = bddfsm.get_invars_2(fsm)
         init_1_ptr = bddfsm.get_init_1(fsm)
         init_2_ptr =  bddfsm.get_init_2(fsm)
-        trans_1_ptr = bddfsm.get_monolitic_trans_1(fsm)
-        trans_2_ptr = bddfsm.get_monolitic_trans_2(fsm)
 
         invars_1 = BDD(invars_1_ptr, nusmv_mgr, "invars_1")
         invars_2 = BDD(invars_2_ptr, nusmv_mgr, "invars_2")
         init_1 = BDD(init_1_ptr, nusmv_mgr, "init_1")
         init_2 = BDD(init_2_ptr, nusmv_mgr, "init_2")
-        trans_1 = BDD(trans_1_ptr, nusmv_mgr, "trans_1")
-        trans_2 = BDD(trans_2_ptr, nusmv_mgr, "trans_2")
 
         dd.bdd_free(nusmv_mgr, invars_1_ptr)
         dd.bdd_free(nusmv_mgr, invars_2_ptr)
         dd.bdd_free(nusmv_mgr, init_1_ptr)
         dd.bdd_free(nusmv_mgr, init_2_ptr)
-        dd.bdd_free(nusmv_mgr, trans_1_ptr)
-        dd.bdd_free(nusmv_mgr, trans_2_ptr)
+
+        # With a partition method, the clusters built by NuSMV are kept,
+        # and the monolithic relations are not built at all.
+        clusters_1 = None
+        clusters_2 = None
+        if self.__marduk.partition in ("Threshold", "Iwls95CP"):
+            clusters_1 = self._get_trans_clusters(fsm, 1)
+            clusters_2 = self._get_trans_clusters(fsm, 2)
+            if clusters_1 == None or clusters_2 == None:
+                print "WARNING: The NuSMV wrapper does not provide the clusters of the transition relations. Using the monolithic relations."
+                clusters_1 = None
+                clusters_2 = None
 
         self.__init1 = (init_1 * invars_1)
         self.__init1.name = "init1"
@@ -312,20 +332,32 @@ class Specification(object):
         self.__init12 = self.__init1 * self.__init2
         self.__init12.name = "init12"
 
-        self.__trans1 = (trans_1 * invars_1)
-        self.__trans1.name = "trans1"
-        self.__trans2 = (trans_2 * invars_2)
-        self.__trans2.name = "trans2"
-        self.__trans12 = self.__trans1 * self.__trans2
-        self.__trans12.name = "trans12"
+        if clusters_1 != None:
+            self.__trans1_parts = clusters_1 + [invars_1]
+            self.__trans2_parts = clusters_2 + [invars_2]
+            del clusters_1, clusters_2
+        else:
+            trans_1_ptr = bddfsm.get_monolitic_trans_1(fsm)
+            trans_2_ptr = bddfsm.get_monolitic_trans_2(fsm)
+            trans_1 = BDD(trans_1_ptr, nusmv_mgr, "trans_1")
+            trans_2 = BDD(trans_2_ptr, nusmv_mgr, "trans_2")
+            dd.bdd_free(nusmv_mgr, trans_1_ptr)
+            dd.bdd_free(nusmv_mgr, trans_2_ptr)
+
+            self.__trans1 = (trans_1 * invars_1)
+            self.__trans1.name = "trans1"
+            self.__trans2 = (trans_2 * invars_2)
+            self.__trans2.name = "trans2"
+            self.__trans12 = self.__trans1 * self.__trans2
+            self.__trans12.name = "trans12"
+            trans_1 = None
+            trans_2 = None
 
         invars = (invars_1 * invars_2)
         invars_1 = None
         invars_2 = None
         init_1 = None
         init_2 = None
-        trans_1 = None
-        trans_2 = None
 
         assume_exp = node.car(spec_exp)
         guaran_exp = node.cdr(spec_exp)
@@ -361,17 +393,102 @@ class Specification(object):
             return self.__init12.transfer(dest_mgr)
         return self.__init12.copy()
 
+    def _get_trans_clusters(self, fsm, player):
+        """
+        Returns the list of clusters of the transition relation of the given
+        player (1 or 2), as NuSMV built them for the partition method, or
+        None if the NuSMV wrapper does not export the needed functions. The
+        clusters are read from the backward cluster list of the BddTrans of
+        the game FSM (see BddTrans and ClusterList of NuSMV).
+        """
+        from nusmv.game import bddfsm
+        from nusmv import dd
+        from bddwrap import BDD
+        try:
+            from nusmv.trans import bdd as trans_bdd
+        except ImportError:
+            return None
+
+        get_trans = getattr(bddfsm, "get_trans_%d" % player, None)
+        functions = ["BddTrans_get_backward", "ClusterList_begin", "ClusterListIterator_is_end",
+                     "ClusterListIterator_next", "ClusterList_get_cluster", "Cluster_get_trans"]
+        if get_trans == None or len([name for name in functions if not hasattr(trans_bdd, name)]) > 0:
+            return None
+
+        nusmv_mgr = BDD.dd_mgr
+        cluster_list = trans_bdd.BddTrans_get_backward(get_trans(fsm))
+        clusters = []
+        iter = trans_bdd.ClusterList_begin(cluster_list)
+        while not trans_bdd.ClusterListIterator_is_end(iter):
+            cluster = trans_bdd.ClusterList_get_cluster(cluster_list, iter)
+            ptr = trans_bdd.Cluster_get_trans(cluster)
+            clusters.append(BDD(ptr, nusmv_mgr, "trans_%d cluster" % player))
+            dd.bdd_free(nusmv_mgr, ptr)
+            iter = trans_bdd.ClusterListIterator_next(iter)
+        return clusters
+
+    def get_trans_partitioned(self):
+        """
+        Returns True iff the transition relations are kept as the clusters
+        of NuSMV (see get_trans1_parts and get_trans2_parts), i.e., the
+        monolithic relations were not built.
+        """
+        return self.__trans1_parts != None
+    trans_partitioned = property(get_trans_partitioned)
+
+    def _get_bdds(self, bdds, dest_mgr):
+        if dest_mgr:
+            return [bdd.transfer(dest_mgr) for bdd in bdds]
+        return [bdd.copy() for bdd in bdds]
+
+    def get_trans1_parts(self, dest_mgr = None):
+        """
+        Returns a list of BDDs whose conjunction is trans1.
+        """
+        if self.__trans1_parts == None:
+            return self._get_bdds([self.__trans1], dest_mgr)
+        return self._get_bdds(self.__trans1_parts, dest_mgr)
+
+    def get_trans2_parts(self, dest_mgr = None):
+        """
+        Returns a list of BDDs whose conjunction is trans2.
+        """
+        if self.__trans2_parts == None:
+            return self._get_bdds([self.__trans2], dest_mgr)
+        return self._get_bdds(self.__trans2_parts, dest_mgr)
+
     def get_trans1(self, dest_mgr = None):
+        """
+        Returns the monolithic trans1. With partitioned relations, it is
+        built on demand (and not stored).
+        """
+        from bddwrap import BDD
+        if self.__trans1 == None:
+            return BDD.conjoin_all(self.get_trans1_parts(dest_mgr))
         if dest_mgr:
             return self.__trans1.transfer(dest_mgr)
         return self.__trans1.copy()
 
     def get_trans2(self, dest_mgr = None):
+        """
+        Returns the monolithic trans2. With partitioned relations, it is
+        built on demand (and not stored).
+        """
+        from bddwrap import BDD
+        if self.__trans2 == None:
+            return BDD.conjoin_all(self.get_trans2_parts(dest_mgr))
         if dest_mgr:
             return self.__trans2.transfer(dest_mgr)
         return self.__trans2.copy()
 
     def get_trans12(self, dest_mgr = None):
+        """
+        Returns the monolithic trans12. With partitioned relations, it is
+        built on demand (and not stored).
+        """
+        from bddwrap import BDD
+        if self.__trans12 == None:
+            return BDD.conjoin_all(self.get_trans1_parts(dest_mgr) + self.get_trans2_parts(dest_mgr))
         if dest_mgr:
             return self.__trans12.transfer(dest_mgr)
         return self.__trans12.copy()
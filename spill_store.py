@@ -0,0 +1,132 @@
+##  ===========================================================================
+##  Author: Georg Hofferek <georg.hofferek@iaik.tugraz.at>
+##
+##  Copyright (c) 2009, 2010 by Graz University of Technology
+##
+##  This is free software; you can redistribute it and/or
+##  modify it under the terms of the GNU Lesser General Public
+##  License as published by the Free Software Foundation; either
+##  version 2 of the License, or (at your option) any later version.
+##
+##  This software is distributed in the hope that it will be useful,
+##  but WITHOUT ANY WARRANTY; without even the implied warranty of
+##  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+##  Lesser General Public License for more details.
+##
+##  You should have received a copy of the GNU Lesser General Public
+##  License along with this library; if not, write to the Free Software
+##  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307  USA.
+##
+##  For more information about this software see <http://rat.fbk.eu/ratsy>
+##  or email to the RATSY Team <ratsy@list.fbk.eu>.
+##  Please report bugs to <ratsy@list.fbk.eu>.
+##
+##  ===========================================================================
+
+
+
+"""
+This module contains a store, which keeps BDDs on disk instead of in the
+DD manager.
+"""
+
+import os
+
+
+class SpillStore(object):
+    """
+    Stores BDDs under string keys in files in DDDMP format (see dddmp),
+    such that their nodes can be freed in the DD manager. The files are
+    written to a temporary directory (or to the given one), which is
+    removed by close().
+    """
+
+    SUFFIX = ".dddmp"
+
+    def __init__(self, manager, var_names, directory=None):
+        """
+        'var_names' maps variable indices to names (for the DDDMP files).
+        """
+        import tempfile
+
+        self.__manager = manager
+        self.__var_names = var_names
+        if directory == None:
+            self.__directory = tempfile.mkdtemp(prefix="marduk_spill_")
+        else:
+            if not os.path.isdir(directory):
+                os.makedirs(directory)
+            self.__directory = tempfile.mkdtemp(prefix="marduk_spill_", dir=directory)
+        self.__keys = set()
+        self.__writes = 0
+        self.__reads = 0
+        self.__bytes_written = 0
+
+
+    def get_directory(self):
+        return self.__directory
+    directory = property(get_directory)
+
+
+    def __path(self, key):
+        return os.path.join(self.__directory, key + SpillStore.SUFFIX)
+
+
+    def put(self, key, bdd):
+        """
+        Stores the given BDD under the given key (replacing a BDD stored
+        under this key before), and returns the key.
+        """
+        import dddmp
+        path = self.__path(key)
+        dddmp.store_bdd(path, bdd, self.__var_names, key)
+        self.__keys.add(key)
+        self.__writes += 1
+        self.__bytes_written += os.path.getsize(path)
+        return key
+
+
+    def get(self, key):
+        """
+        Loads the BDD stored under the given key.
+        """
+        import dddmp
+        from marduk_utils import MardukException
+        if not key in self.__keys:
+            raise MardukException("No BDD stored under the key '%s'" % key)
+        self.__reads += 1
+        return dddmp.load_bdd(self.__path(key), self.__manager)
+
+
+    def has_key(self, key):
+        return key in self.__keys
+
+
+    def remove(self, key):
+        """
+        Removes the BDD stored under the given key (if any).
+        """
+        if key in self.__keys:
+            self.__keys.remove(key)
+            os.remove(self.__path(key))
+
+
+    def close(self):
+        """
+        Removes all stored BDDs and the directory.
+        """
+        import shutil
+        self.__keys = set()
+        shutil.rmtree(self.__directory, True)
+
+
+    def get_stats(self):
+        """
+        Returns a dictionary with the number of 'writes', 'reads', the
+        number of currently 'stored' BDDs, and the 'bytes_written'.
+        """
+        return {'writes': self.__writes,
+                'reads': self.__reads,
+                'stored': len(self.__keys),
+                'bytes_written': self.__bytes_written}
+    stats = property(get_stats)
@@ -36,6 +36,7 @@ class Strategy(object):
         self.__rho1_bdd = None
         self.__rho2_bdd = None
         self.__rho3_bdd = None
+        self.__care_set = None
         self.__keep_rhos = keep_rhos
 
 
@@ -43,14 +44,14 @@ class Strategy(object):
         marduk_mgr = self.__marduk.dd_mgr
         
         init = self.__marduk.winning_region.init12 
-        transitions = self.__marduk.winning_region.trans12
+        transitions = self.__marduk.winning_region.relation12
         reachable_states =  self.__marduk.winning_region.reachableStates(init, transitions, BDD.ONE(marduk_mgr))
         reachable_states.name = "reachable_states"
         del init, transitions
         
         n = len(self.__marduk.winning_region.guarantees)
         
-        strategy = BDD.ZERO(marduk_mgr)
+        strategy = BDD.ZERO(marduk_mgr).copy()
         strategy.name = "strategy"
 
         # Build strategy rho3
@@ -74,10 +75,49 @@ class Strategy(object):
         self.__marduk.winning_region.killAssumptionsAndGuarantees() 
         self.__strategy_bdd //= reachable_states
 
+        minimizers = self.__marduk.compact_strategy
+        if len(minimizers) > 0:
+            self._compact(minimizers)
+
         if False:
             self._dump_strategy()
 
 
+    def _compact(self, minimizers):
+        """
+        Compacts the strategy: The given don't care minimizers (see
+        dc_minimizers) are tried on the strategy with respect to its care
+        set, and the smallest result is kept. As the strategy does not
+        change on the care set, the care set stays valid.
+        Choices which leave the winning region need not be removed here:
+        rho1, rho2 and rho3 already restrict the next state to it.
+        """
+        import resource
+        import dc_minimizers
+
+        def cpu_time():
+            return resource.getrusage(resource.RUSAGE_SELF).ru_utime + resource.getrusage(resource.RUSAGE_SELF).ru_stime
+
+        size_before = self.__strategy_bdd.size
+
+        before = cpu_time()
+        care = self.care_set
+        self.__marduk.println("   Strategy compaction: care set (%d nodes) within \t %7.2f seconds" % \
+                              (care.size, cpu_time() - before))
+
+        (strategy, name, report) = dc_minimizers.minimize_best(self.__strategy_bdd, care, minimizers)
+        for (minimizer, size, time) in report:
+            self.__marduk.println("   Strategy compaction: %-12s %10d nodes %7.2f seconds" % (minimizer, size, time))
+
+        if name != None:
+            strategy.name = "strategy"
+            self.__strategy_bdd = strategy
+        else:
+            name = "none"
+        self.__marduk.println("   Strategy compaction: %d -> %d nodes (%s)" % \
+                              (size_before, self.__strategy_bdd.size, name))
+
+
     def _dump_strategy(self):
 
         from marduk_utils import comp_name_bdd_tuples
@@ -139,17 +179,13 @@ class Strategy(object):
     def _calc_rho1(self, marduk_mgr, n):
         mod_trans = self.__marduk.winning_region.transjx
         start_state = self.__marduk.winning_region.initjx
-        jx_present_vars = self.__marduk.winning_region.jx_ps_vars
-        jx_next_vars = self.__marduk.winning_region.jx_ns_vars
         winRegion = self.__marduk.winning_region.winRegion
-        rho1 = BDD.ZERO(marduk_mgr)
+        rho1 = BDD.ZERO(marduk_mgr).copy()
         rho1.name = "rho_1"
         jp1 = start_state
         guarantees = self.__marduk.winning_region.guarantees
-        transitions = self.__marduk.winning_region.trans12
-        from marduk_utils import VariableType
-        present_vars = [var.ps for var in self.__marduk.vars if var.type != VariableType.STATE]
-        next_vars = [var.ns for var in self.__marduk.vars if var.type != VariableType.STATE]
+        transitions = self.__marduk.winning_region.relation12
+        registry = self.__marduk.var_registry
 
         jx_equal_j = "" # just initialize variable jx_equal_j, so that it can also be deleted even if (n == 0).
         
@@ -157,55 +193,90 @@ class Strategy(object):
             jx_equal_j = jp1
             jp1 = mod_trans / jp1
             rho1 += jx_equal_j * guarantees[j] * jp1
-            jp1 = jp1.swapVariables(jx_present_vars, jx_next_vars) 
+            jp1 = registry.swap(jp1) 
         del jx_equal_j, jp1
         
-        next_winRegion = winRegion.swapVariables(present_vars, next_vars)
+        next_winRegion = registry.swap(winRegion)
 
-        rho1 *=  winRegion * transitions * next_winRegion
+        rho1 = transitions.conjoin(rho1 * winRegion * next_winRegion)
+        rho1.name = "rho_1"
         if self.__keep_rhos: self.__rho1_bdd = rho1
         self.__rho1_size = rho1.size
 
         return rho1
         
     
-    def _calc_rho2(self, marduk_mgr, n, reachable_states):
+    def _jx_encodings(self, n):
+        """
+        Returns a list, which contains for every guarantee j a tuple
+        (jx == j, jx' == j) of BDDs.
+        """
         mod_trans = self.__marduk.winning_region.transjx
-        start_state = self.__marduk.winning_region.initjx
-        jx_present_vars = self.__marduk.winning_region.jx_ps_vars
-        jx_next_vars = self.__marduk.winning_region.jx_ns_vars
-        transitions = self.__marduk.winning_region.trans12
-        rho2 = BDD.ZERO(marduk_mgr)
-        rho2.name = "rho_2"
-        jp1 = start_state
-        yArray = self.__marduk.winning_region.Y
-        from marduk_utils import VariableType
-        present_vars = [var.ps for var in self.__marduk.vars if var.type != VariableType.STATE]
-        next_vars = [var.ns for var in self.__marduk.vars if var.type != VariableType.STATE]
+        registry = self.__marduk.var_registry
+        jx_equal_j = self.__marduk.winning_region.initjx
+        encodings = []
+        for j in range(0,n):
+            encodings.append((jx_equal_j, registry.swap(jx_equal_j)))
+            jx_equal_j = registry.swap(mod_trans / jx_equal_j)
+        return encodings
 
-        jx_equal_j = "" # just initialize variable jx_equal_j, so that it can also be deleted even if (n == 0).
-        
-        for j in range(0,n):            
-            low = yArray[j][0]
-            next_low = ""  # just initialize variable next_low, so that it can also be deleted even if (maxr == 1).
-            rho2_tmp = BDD.ZERO(marduk_mgr)
+
+    def _per_guarantee(self, marduk_mgr, n, part):
+        """
+        Computes part(j) for all guarantees j and returns the disjunction.
+
+        The parts are independent of each other. With more than one job
+        (--jobs), they are computed concurrently in worker processes. Every
+        worker has its own copy of the DD manager (and thus of the x/y
+        slices, the transition relation, the reachable states and the jx
+        encoding), and sends its part back as a serialized BDD.
+        """
+        import worker_pool
+
+        jobs = self.__marduk.jobs
+        if jobs <= 1 or n <= 1:
+            result = BDD.ZERO(marduk_mgr)
+            for j in range(0,n):
+                result += part(j)
+            return result
+
+        # Bind j now: The tasks are run after the loop.
+        tasks = [lambda j=j: part(j).serialize() for j in range(0,n)]
+        parts = [BDD.deserialize(data, marduk_mgr) for data in worker_pool.run_tasks(tasks, jobs, [marduk_mgr])]
+        return BDD.disjoin_all(parts, marduk_mgr)
+
+    
+    def _calc_rho2(self, marduk_mgr, n, reachable_states):
+        transitions = self.__marduk.winning_region.relation12
+        winning_region = self.__marduk.winning_region
+        yArray = winning_region.Y
+        registry = self.__marduk.var_registry
+        jx_encodings = self._jx_encodings(n)
+
+        def rho2_part(j):
+            # The elements of yArray are fetched one by one, such that
+            # spilled arrays are streamed from disk.
+            low = winning_region.getYElement(j, 0)
+            rho2_terms = []
 
             maxr = len(yArray[j])
             for r in range(1,maxr):
-                next_low = low.swapVariables(present_vars, next_vars)
-                rho2_tmp += (yArray[j][r]//reachable_states) * ((~low)//reachable_states) * next_low
-                low += yArray[j][r]
-            del low, next_low
-            
-            jx_equal_j = jp1
-            jp1 = jp1.swapVariables(jx_present_vars, jx_next_vars)
-            rho2 += rho2_tmp * jx_equal_j * jp1
-            del rho2_tmp
-            jp1 = mod_trans / jx_equal_j 
-            jp1 = jp1.swapVariables(jx_present_vars, jx_next_vars)
-        del jp1, jx_equal_j
+                y = winning_region.getYElement(j, r)
+                next_low = registry.swap(low)
+                rho2_terms.append((y//reachable_states) * ((~low)//reachable_states) * next_low)
+                low += y
+                del y, next_low
+            del low
+            rho2_tmp = BDD.disjoin_all(rho2_terms, marduk_mgr)
+            del rho2_terms
+
+            (jx_equal_j, next_jx_equal_j) = jx_encodings[j]
+            return rho2_tmp * jx_equal_j * next_jx_equal_j
+
+        rho2 = self._per_guarantee(marduk_mgr, n, rho2_part)
         
-        rho2 *= transitions
+        rho2 = transitions.conjoin(rho2)
+        rho2.name = "rho_2"
         if self.__keep_rhos: self.__rho2_bdd = rho2
         self.__rho2_size = rho2.size
 
@@ -213,45 +284,40 @@ class Strategy(object):
 
     
     def _calc_rho3(self, marduk_mgr, n, reachable_states):
-        mod_trans = self.__marduk.winning_region.transjx
-        start_state = self.__marduk.winning_region.initjx
-        jx_present_vars = self.__marduk.winning_region.jx_ps_vars
-        jx_next_vars = self.__marduk.winning_region.jx_ns_vars
         assumptions = self.__marduk.winning_region.assumptions
-        transitions = self.__marduk.winning_region.trans12
-        rho3 = BDD.ZERO(marduk_mgr)
-        rho3.name = "rho_3"
-        jp1 = start_state
-        xArray = self.__marduk.winning_region.X
-        from marduk_utils import VariableType
-        present_vars = [var.ps for var in self.__marduk.vars if var.type != VariableType.STATE]
-        next_vars = [var.ns for var in self.__marduk.vars if var.type != VariableType.STATE]
+        transitions = self.__marduk.winning_region.relation12
+        winning_region = self.__marduk.winning_region
+        xArray = winning_region.X
+        registry = self.__marduk.var_registry
+        jx_encodings = self._jx_encodings(n)
 
-        jx_equal_j = "" # just initialize variable jx_equal_j, so that it can also be deleted even if (n == 0).
-        
-        for j in range(0,n):   
+        def rho3_part(j):
             low = BDD.ZERO(marduk_mgr)
-            rho3_tmp = BDD.ZERO(marduk_mgr)
+            rho3_terms = []
             
             maxr = len(xArray[j])
             for r in range(0,maxr):
                 
-                m = len(xArray[j][r])
+                # One slice (j, r) at a time, such that spilled arrays are
+                # streamed from disk.
+                x_slice = winning_region.getXSlice(j, r)
+                m = len(x_slice)
                 for i in range(0,m):
-                    next_x = xArray[j][r][i].swapVariables(present_vars, next_vars)
-                    rho3_tmp += (xArray[j][r][i]//reachable_states) * ((~low)//reachable_states) * (~assumptions[i]) * next_x
+                    next_x = registry.swap(x_slice[i])
+                    rho3_terms.append((x_slice[i]//reachable_states) * ((~low)//reachable_states) * (~assumptions[i]) * next_x)
                     del next_x
-                    low += xArray[j][r][i]
+                    low += x_slice[i]
+                del x_slice
+            rho3_tmp = BDD.disjoin_all(rho3_terms, marduk_mgr)
+            del rho3_terms
 
-            jx_equal_j = jp1
-            jp1 = jp1.swapVariables(jx_next_vars, jx_present_vars)
-            rho3 += rho3_tmp * jx_equal_j * jp1
-            del rho3_tmp
-            jp1 = mod_trans / jx_equal_j 
-            jp1 = jp1.swapVariables(jx_present_vars, jx_next_vars)
-        del jx_equal_j, jp1
+            (jx_equal_j, next_jx_equal_j) = jx_encodings[j]
+            return rho3_tmp * jx_equal_j * next_jx_equal_j
+
+        rho3 = self._per_guarantee(marduk_mgr, n, rho3_part)
 
-        rho3 *= transitions
+        rho3 = transitions.conjoin(rho3)
+        rho3.name = "rho_3"
         if self.__keep_rhos: self.__rho3_bdd = rho3
         self.__rho3_size = rho3.size
 
@@ -267,6 +333,7 @@ class Strategy(object):
         self.__rho1_bdd = None
         self.__rho2_bdd = None
         self.__rho3_bdd = None
+        self.__care_set = None
         self.__marduk.winning_region.killArrays()
         self.__marduk.winning_region.killAssumptionsAndGuarantees()
         self.__marduk.winning_region.killWinReg()
@@ -284,6 +351,21 @@ class Strategy(object):
 
     strategy_bdd = property(get_strategy_bdd)
 
+    def get_care_set(self):
+        """
+        Returns the states which are reachable from the initial states
+        (including the jx counter) via the strategy, within the winning
+        region. It is computed on the first call only, and shared by all
+        modes of output function computation.
+        """
+        if self.__care_set == None:
+            winning_region = self.__marduk.winning_region
+            init = winning_region.init12 * winning_region.initjx
+            self.__care_set = winning_region.reachableStates(init, self.__strategy_bdd, winning_region.winRegion)
+            self.__care_set.name = "careset"
+        return self.__care_set
+    care_set = property(get_care_set)
+
     def get_rho1_bdd(self):
         if self.__rho1_bdd == None:
             raise Exception("rho1 BDD not initialized or killed!")
@@ -56,6 +56,112 @@ if ! grep -qF "FINISHED synthesis" ./check_out.txt; then
 fi
 
 
+# The following runs check the options of marduk on amba_2.xml. They use no
+# dynamic reordering, such that the BDD sizes are comparable: Options which
+# must not change the results are compared against a reference run.
+
+# Runs amba_2.xml with the given options and checks that synthesis completes.
+# The sizes of the winning region and of the strategies are written to
+# ./check_sizes.txt, the sizes of the output functions to ./check_functions.txt.
+run_amba_2() {
+    python ${pgmdir}/marduk.py -i ../specs/unrealizable/xml/amba_2.xml "$@" 1>./check_out.txt
+    if ! grep -qF "FINISHED synthesis" ./check_out.txt; then
+        echo "FAIL: amba_2.xml $*: could not complete synthesis!"
+        exit -1
+    fi
+    grep -E "Size of (Winning Region|rho[123])" ./check_out.txt > ./check_sizes.txt
+    grep -E "projection +[0-9]+ nodes, function" ./check_out.txt | sed -e 's/, *[0-9.]* seconds//' > ./check_functions.txt
+}
+
+# Checks that the last run has the same winning region and strategies as the
+# reference run.
+check_same_strategy() {
+    if ! cmp -s ./check_sizes.txt ./check_sizes_ref.txt; then
+        echo "FAIL: amba_2.xml $*: the sizes of the winning region or strategy differ from the default run!"
+        exit -1
+    fi
+}
+
+# Checks that the last run has the same winning region, strategies and
+# output functions as the reference run.
+check_same_results() {
+    check_same_strategy "$@"
+    if ! cmp -s ./check_functions.txt ./check_functions_ref.txt; then
+        echo "FAIL: amba_2.xml $*: the sizes of the output functions differ from the default run!"
+        exit -1
+    fi
+}
+
+run_amba_2
+cp ./check_sizes.txt ./check_sizes_ref.txt
+cp ./check_functions.txt ./check_functions_ref.txt
+if [ ! -s ./check_sizes_ref.txt ] || [ ! -s ./check_functions_ref.txt ]; then
+    echo 'FAIL: amba_2.xml: no sizes of the winning region, strategy or output functions printed!'
+    exit -1
+fi
+
+for options in "--warm-start" "--jobs 2" "--warm-start --jobs 4" "--partition Threshold" \
+               "--partition Iwls95CP" "--partition Iwls95CP --cluster-threshold 100" "--spill-arrays"; do
+    run_amba_2 $options
+    check_same_results $options
+done
+
+for options in "--compact-strategy all" "--dc-minimizer constrain" "--dc-minimizer squeeze" \
+               "--dc-minimizer auto" "--output-order support" "--output-order dependency" \
+               "--output-order probe" "--output-order auto"; do
+    run_amba_2 $options
+    check_same_strategy $options
+done
+
+run_amba_2 --trace-fixpoints ./check_trace.jsonl
+check_same_results --trace-fixpoints
+if [ ! -s ./check_trace.jsonl ]; then
+    echo 'FAIL: amba_2.xml --trace-fixpoints: no trace written!'
+    exit -1
+fi
+if ! python ${pgmdir}/fixpoint_trace.py ./check_trace.jsonl 1>/dev/null; then
+    echo 'FAIL: amba_2.xml --trace-fixpoints: could not summarize the trace!'
+    exit -1
+fi
+rm -f ./check_trace.jsonl
+
+rm -rf ./check_checkpoints
+run_amba_2 --checkpoint-dir ./check_checkpoints --checkpoint-iterations 1
+check_same_results --checkpoint-dir
+if ! grep -qF "Wrote checkpoint after" ./check_out.txt; then
+    echo 'FAIL: amba_2.xml --checkpoint-dir: no checkpoint written!'
+    exit -1
+fi
+run_amba_2 --resume ./check_checkpoints
+check_same_results --resume
+if ! grep -qF "Resumed from checkpoint after" ./check_out.txt; then
+    echo 'FAIL: amba_2.xml --resume: did not resume from the checkpoint!'
+    exit -1
+fi
+rm -rf ./check_checkpoints
+
+python ${pgmdir}/marduk.py -i ../specs/unrealizable/xml/amba_2.xml --check-realizability 1>./check_out.txt
+exit_code=$?
+if [ $exit_code -ne 10 ] || [ "`tail -n 1 ./check_out.txt`" != "REALIZABLE" ]; then
+    echo "FAIL: amba_2.xml --check-realizability: not reported as REALIZABLE with exit code 10 (got $exit_code)!"
+    exit -1
+fi
+python ${pgmdir}/marduk.py -i ../specs/unrealizable/xml/amba_2.xml --check-realizability --jobs 2 --warm-start 1>./check_out.txt
+exit_code=$?
+if [ $exit_code -ne 10 ] || [ "`tail -n 1 ./check_out.txt`" != "REALIZABLE" ]; then
+    echo "FAIL: amba_2.xml --check-realizability --jobs 2 --warm-start: not reported as REALIZABLE with exit code 10 (got $exit_code)!"
+    exit -1
+fi
+python ${pgmdir}/marduk.py -i ../specs/unrealizable/xml/amba_2_woef_a.xml --check-realizability 1>./check_out.txt
+exit_code=$?
+if [ $exit_code -ne 20 ] || [ "`tail -n 1 ./check_out.txt`" != "UNREALIZABLE" ]; then
+    echo "FAIL: amba_2_woef_a.xml --check-realizability: not reported as UNREALIZABLE with exit code 20 (got $exit_code)!"
+    exit -1
+fi
+
+rm -f ./check_sizes.txt ./check_sizes_ref.txt ./check_functions.txt ./check_functions_ref.txt
+
+
 #echo "Testing with ../specs/unrealizable/xml/amba_2_woef_a.xml ..."
 python ${pgmdir}/marduk.py -d --r1 --r2 -i ../specs/unrealizable/xml/amba_2_woef_a.xml --dm SMuvTuG 1>./check_out.txt
 
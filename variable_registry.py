@@ -0,0 +1,205 @@
+##  ===========================================================================
+##  Author: Georg Hofferek <georg.hofferek@iaik.tugraz.at>
+##
+##  Copyright (c) 2009, 2010 by Graz University of Technology
+##
+##  This is free software; you can redistribute it and/or
+##  modify it under the terms of the GNU Lesser General Public
+##  License as published by the Free Software Foundation; either
+##  version 2 of the License, or (at your option) any later version.
+##
+##  This software is distributed in the hope that it will be useful,
+##  but WITHOUT ANY WARRANTY; without even the implied warranty of
+##  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+##  Lesser General Public License for more details.
+##
+##  You should have received a copy of the GNU Lesser General Public
+##  License along with this library; if not, write to the Free Software
+##  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307  USA.
+##
+##  For more information about this software see <http://rat.fbk.eu/ratsy>
+##  or email to the RATSY Team <ratsy@list.fbk.eu>.
+##  Please report bugs to <ratsy@list.fbk.eu>.
+##
+##  ===========================================================================
+
+
+"""
+This module contains the registry of variable cubes and of the
+present/next state permutation of a DD manager.
+"""
+
+from nusmv import dd
+from bddwrap import BDD
+
+
+class VariableRegistry(object):
+    """
+    Stores the variables known to a DD manager in named groups, together
+    with the cubes of their present and next state instances, and the
+    permutation which swaps all present and next state variables.
+
+    Cubes and the permutation are built on first use and are rebuilt only
+    after the variables of a group have changed (e.g. if jx variables are
+    added). Thus the callers do not need to iterate over their variables
+    anymore for every quantification or swap.
+
+    There is one registry per DD manager. Use VariableRegistry.get(manager)
+    to obtain it. Synthesis uses the variable types (VariableType.INPUT,
+    ...) as group names. Specification debugging uses its own groups
+    (see SpecDebugUtils).
+    """
+
+    # Maps the address of a DD manager to its registry.
+    registries = {}
+
+    def get_registry(manager):
+        """
+        Returns the registry of the given DD manager. The registry is
+        created, if it does not exist yet.
+        """
+        key = int(manager)
+        if not VariableRegistry.registries.has_key(key):
+            VariableRegistry.registries[key] = VariableRegistry(manager)
+        return VariableRegistry.registries[key]
+    get = staticmethod(get_registry)
+
+
+    def __init__(self, manager):
+        self.__manager = manager
+
+        # Maps the name of a group to the list of its Variables.
+        self.__groups = {}
+
+        # Maps (present, group names) to the corresponding cube.
+        self.__cubes = {}
+
+        # Lists of all present and all next state variables (BDD objects)
+        self.__present_vars = None
+        self.__next_vars = None
+
+        # Permutation which swaps all present and next state variables.
+        self.__permutation = None
+
+
+    def __invalidate(self):
+        self.__cubes = {}
+        self.__present_vars = None
+        self.__next_vars = None
+        self.__permutation = None
+
+
+    def get_manager(self):
+        return self.__manager
+    mgr = property(get_manager)
+
+
+    def set_variables(self, group, variables):
+        """
+        Sets the list of variables (Variable objects) of the given group.
+        """
+        self.__groups[group] = variables[:]
+        self.__invalidate()
+
+
+    def add_variable(self, group, var):
+        """
+        Adds the given variable (Variable object) to the given group.
+        """
+        self.__groups.setdefault(group, []).append(var)
+        self.__invalidate()
+
+
+    def variables(self, *groups):
+        """
+        Returns the list of variables of the given groups. If no group is
+        given, all variables of the registry are returned.
+        """
+        if len(groups) == 0:
+            groups = self.__groups.keys()
+        result = []
+        for group in groups:
+            result.extend(self.__groups.get(group, []))
+        return result
+
+
+    def present_vars(self, *groups):
+        """
+        Returns a list of the present state BDDs of the given groups (or of
+        all groups, if no group is given).
+        """
+        return [var.ps for var in self.variables(*groups)]
+
+    def next_vars(self, *groups):
+        """
+        Returns a list of the next state BDDs of the given groups (or of
+        all groups, if no group is given).
+        """
+        return [var.ns for var in self.variables(*groups)]
+
+
+    def __get_cube(self, present, groups):
+        key = (present, tuple(groups))
+        if not self.__cubes.has_key(key):
+            if present:
+                vars = self.present_vars(*groups)
+            else:
+                vars = self.next_vars(*groups)
+            self.__cubes[key] = BDD.conjoin_all(vars, self.__manager)
+        return self.__cubes[key]
+
+    def present_cube(self, *groups):
+        """
+        Returns the cube of the present state variables of the given
+        groups (or of all groups, if no group is given).
+        """
+        return self.__get_cube(True, groups)
+
+    def next_cube(self, *groups):
+        """
+        Returns the cube of the next state variables of the given groups
+        (or of all groups, if no group is given).
+        """
+        return self.__get_cube(False, groups)
+
+
+    def __build_permutation(self):
+        self.__present_vars = []
+        self.__next_vars = []
+        self.__permutation = range(0, dd.dd_get_size(self.__manager))
+        for var in self.variables():
+            present = var.ps.index
+            next = var.ns.index
+            if self.__permutation[present] != present:
+                # The variable is also contained in another group.
+                continue
+            self.__permutation[present] = next
+            self.__permutation[next] = present
+            self.__present_vars.append(var.ps)
+            self.__next_vars.append(var.ns)
+
+    def get_permutation(self):
+        """
+        Returns the permutation (a list of variable indices) which swaps
+        all present and next state variables of the registry.
+        """
+        if self.__permutation == None or \
+           len(self.__permutation) != dd.dd_get_size(self.__manager):
+            self.__build_permutation()
+        return self.__permutation
+    permutation = property(get_permutation)
+
+
+    def swap(self, bdd):
+        """
+        Swaps all present and next state variables in the given BDD and
+        returns the result.
+
+        If the NuSMV wrapper provides bdd_permute, this is a single call with
+        the precomputed permutation. Otherwise the precomputed variable lists
+        are passed to bdd_swap_variables.
+        """
+        permutation = self.get_permutation()
+        if hasattr(dd, "bdd_permute"):
+            return bdd.permute(permutation)
+        return bdd.swapVariables(self.__present_vars, self.__next_vars)
@@ -36,6 +36,7 @@ class WinningRegion(object):
         self.__winningRegion = None
         self.__xArray = {} 
         self.__yArray = {}
+        self.__spill_store = None
         self.__numOfGuarantees = 0
         self.__numOfAssumptions = 0
         self.__guarantees = []
@@ -44,6 +45,12 @@ class WinningRegion(object):
         self.__transition2 = None
         self.__transition12 = None
         self.__transitionjx = None
+        self.__relation1 = None
+        self.__relation2 = None
+        self.__relation12 = None
+        self.__cpre = None
+        self.__iterations = {}
+        self.__worker_times = {'cpu': 0.0, 'wall': 0.0}
         self.__init1 = None
         self.__init2 = None
         self.__init12 = None
@@ -67,12 +74,49 @@ class WinningRegion(object):
         values by this function
         """
         
-        from marduk_utils import MardukException
+        self._prepare(True)
+        z = self._compute_fixpoint(True, False)
+
+        z.name = "WinReg"
+        self.__winningRegion = z
+
+        # Dynamic reordering might have found a better ordering meanwhile.
+        if self.__marduk.dyn_reorder:
+            self.__marduk.store_order()
+        return
+
+
+    def checkRealizability(self):
+        """
+        Checks realizability only. This computes the same fixpoint as
+        calcWinningRegion, but neither xArray nor yArray are stored, and no
+        jx variables are created. As z is a greatest fixpoint, every
+        intermediate z contains the final one. Thus the computation is
+        aborted as soon as an intermediate z does not allow the system to
+        start in a winning state anymore.
+
+        Returns True iff the specification is realizable. If so, the
+        winning region is stored.
+        """
+        self._prepare(False)
+        z = self._compute_fixpoint(False, True)
+        if z == None:
+            return False
+        z.name = "WinReg"
+        self.__winningRegion = z
+        return self._initial_states_winnable(z)
+
+
+    def _prepare(self, with_jx):
+        """
+        Gets all BDDs from the specification, builds the transition relations
+        and the CPre engine, and applies the first reordering. The jx counter
+        is only created if with_jx is True.
+        """
         from bddwrap import BDD
         from nusmv import dd
 
         marduk_mgr = self.__marduk.dd_mgr
-        nusmv_mgr = BDD.dd_mgr
         spec = self.__marduk.specification
         
 
@@ -80,102 +124,426 @@ class WinningRegion(object):
         self.__init2 = spec.get_init2(marduk_mgr)
         self.__init12 = spec.get_init12(marduk_mgr)
         
-        self.__transition1 = spec.get_trans1(marduk_mgr)
-        self.__transition2 = spec.get_trans2(marduk_mgr)
-        self.__transition12 = spec.get_trans12(marduk_mgr)
+        if not spec.trans_partitioned:
+            self.__transition1 = spec.get_trans1(marduk_mgr)
+            self.__transition2 = spec.get_trans2(marduk_mgr)
+            self.__transition12 = spec.get_trans12(marduk_mgr)
                 
         self.__assumptions = spec.get_assumptions(marduk_mgr)
         self.__guarantees = spec.get_guarantees(marduk_mgr)
         
-        self._moduloInc(len(self.__guarantees))
-
-        # Built all BDDs from specification. Now perform first reordering, if requested.
+        if with_jx:
+            self._moduloInc(len(self.__guarantees))
+        self._build_relations()
+        self._create_cpre_engine()
+
+        # Built all BDDs from specification. Now apply a cached ordering and
+        # perform first reordering, if requested. The reordering is skipped
+        # if an ordering for exactly the same variables was cached.
         import resource
         before_reorder1_time = resource.getrusage(resource.RUSAGE_SELF).ru_utime + resource.getrusage(resource.RUSAGE_SELF).ru_stime
-        if self.__marduk.reorder1:
+        cached_order = self.__marduk.apply_cached_order()
+        if self.__marduk.reorder1 and not cached_order:
             result = dd.dd_reorder(marduk_mgr, self.__marduk.dyn_reorder_method,0)
+            self.__marduk.store_order()
         self.__marduk._reorder1time = resource.getrusage(resource.RUSAGE_SELF).ru_utime + resource.getrusage(resource.RUSAGE_SELF).ru_stime 
         self.__marduk.println("   First reordering of bdd takes \t\t %7.2f seconds" %(self.__marduk._reorder1time - before_reorder1_time))
-        
-        
+
+
+    def _compute_fixpoint(self, record, early_abort):
+        """
+        Computes the triple fixpoint of the winning region and returns z.
+        If record is True, the intermediate results are stored in xArray
+        and yArray. If early_abort is True, None is returned as soon as an
+        intermediate z is not winnable from the initial states.
+        """
+        from bddwrap import BDD
+
+        marduk_mgr = self.__marduk.dd_mgr
+        # With warm start, the x fixpoints are seeded with the result for
+        # the same (j, r, i) from the previous z iteration instead of z:
+        # z only shrinks, so do all y[j][r] and x[j][r][i]. Thus the previous
+        # x is a fixpoint above the new one, and the iteration from there
+        # ends in the same x. The y fixpoints are least fixpoints. The
+        # previous results are above them, so they still start from ZERO.
+        warm_start = self.__marduk.warm_start
+        # Without recording, x is only kept for a warm start, and y is not
+        # kept at all.
+        keep_x = record or warm_start
+        x_array = {}
+        y_array = {}
+        if record:
+            x_array = self.__xArray
+            y_array = self.__yArray
+        self.__iterations = {'z': 0, 'y': 0, 'x': 0}
+        self.__worker_times = {'cpu': 0.0, 'wall': 0.0}
+        tracer = self.__marduk.fixpoint_tracer
+
+        # With --spill-arrays, the stored x and y are written to disk as
+        # soon as they are computed. The arrays then contain the keys of
+        # the spill store instead of BDDs (see _keep and _bdd).
+        self._close_spill_store()
+        if self.__marduk.spill_arrays:
+            from spill_store import SpillStore
+            self.__spill_store = SpillStore(marduk_mgr, self._var_names(), self.__marduk.spill_dir)
+
         n = len(self.__guarantees)
         m = len(self.__assumptions)
         old_z = BDD.ZERO(marduk_mgr)
         z = BDD.ONE(marduk_mgr)
-        while(z != old_z): # GreatestFixpoint(z)
-            old_z = z
+
+        # After resuming from a checkpoint, which was written in the middle
+        # of a z iteration, this iteration is continued with guarantee
+        # resume_j (even if z did not change so far).
+        checkpoint = self.__marduk.checkpoint
+        resume_j = None
+        if self.__marduk.resume:
+            resumed = self._load_checkpoint(checkpoint, x_array, y_array)
+            if resumed != None:
+                (z, old_z, next_j) = resumed
+                if next_j < n:
+                    resume_j = next_j
+
+        while(resume_j != None or z != old_z): # GreatestFixpoint(z)
+            first_j = 0
+            if resume_j != None:
+                first_j = resume_j
+                resume_j = None
+            else:
+                old_z = z
+                self.__iterations['z'] += 1
     
-            for j in range(0,n):            
+            for j in range(first_j,n):            
                 r = 0
                 old_y = BDD.ONE(marduk_mgr)
                 y = BDD.ZERO(marduk_mgr)
 
-                # Free previously remembered results:
-                self.__yArray[j] = {}
-                self.__xArray[j] = {}
+                # z is fixed for the whole y loop.
+                guarantee_and_coax_z = self.__guarantees[j] * self.coax(z)
+
+                # Free previously remembered results (or keep them until the
+                # new ones are known, if they are used for a warm start):
+                previous_x = {}
+                if warm_start:
+                    previous_x = x_array.get(j, {})
+                replaced = (x_array.get(j), y_array.get(j))
+                y_array[j] = {}
+                x_array[j] = {}
                 
                 while(y != old_y): # LeastFixpoint(y)
-                    self.__xArray[j][r] = {}                   
+                    if keep_x:
+                        x_array[j][r] = {}                   
                     old_y = y
-                    start = (self.__guarantees[j] * self.coax(z)) + self.coax(y)
+                    self.__iterations['y'] += 1
+                    start = guarantee_and_coax_z + self.coax(y)
                     y = BDD.ZERO(marduk_mgr)
+                    if len(previous_x) > 0:
+                        # After the y fixpoint converged, x does not change anymore.
+                        seeds = previous_x[min(r, len(previous_x) - 1)]
+                        seeds = [self._bdd(seeds[i]) for i in range(0,m)]
+                    else:
+                        seeds = [z] * m
+                    xs = self._x_fixpoints(start, seeds, j, r)
                     for i in range(0,m):
-                        # RB: it would seem to me that we can add x[j][r][i-1] to start here,
-                        # which would make the fixpoint larger.
-                        old_x = BDD.ZERO(marduk_mgr)
-                        x = z
-                        while (x != old_x): # GreatestFixpoint(x)
-                            old_x = x
-                            x = start + ((~(self.__assumptions[i])) * self.coax(x))
-                            x.name = "x_elem"
-                        # End -- GreatestFixpoint(x)
-                        self.__xArray[j][r][i] = x
+                        x = xs[i]
+                        if keep_x:
+                            x_array[j][r][i] = self._keep(x, "x_%d_%d_%d_%d" % (self.__iterations['z'], j, r, i))
                         y = y + x
                         y.name = "y_elem"
                     # End - For (i in 1...m)
-                    self.__yArray[j][r] = y
+                    if record:
+                        y_array[j][r] = self._keep(y, "y_%d_%d_%d" % (self.__iterations['z'], j, r))
+                    tracer.event("winning_region", "y", r + 1, y, j=j)
                     r += 1
                 # End -- LeastFixpoint(y)
-                self.__yArray[j].pop(r-1)
-                self.__xArray[j].pop(r-1)
+                if record:
+                    self._discard(y_array[j].pop(r-1))
+                if keep_x:
+                    self._discard(x_array[j].pop(r-1))
+                self._discard(replaced)
                 z = y
+                tracer.event("winning_region", "z", self.__iterations['z'], z, j=j)
+                del guarantee_and_coax_z, previous_x, replaced
+                # z is in a greatest fixpoint, so z can only get smaller.
+                if early_abort and not self._initial_states_winnable(z):
+                    self.__marduk.println("   Initial states not winning after %d z iterations, aborting" % \
+                                          self.__iterations['z'])
+                    self.__cpre.clear()
+                    return None
+                if checkpoint != None and checkpoint.due():
+                    self._save_checkpoint(checkpoint, z, old_z, j + 1, x_array, y_array)
             # End -- For (j in 1...n)
         # End -- GreatestFixpoint(z)
 
-        z.name = "WinReg"
-        self.__winningRegion = z
-        return
+        self.__marduk.println("   Fixpoint iterations (warm start: %s): z %d, y %d, x %d" % \
+                              (warm_start, self.__iterations['z'], self.__iterations['y'], self.__iterations['x']))
+        for line in self.__cpre.format_stats():
+            self.__marduk.println("   CPre " + line)
+        self.__cpre.clear()
+        if self.__spill_store != None:
+            stats = self.__spill_store.stats
+            self.__marduk.println("   Spilled x/y arrays: %d BDDs written (%d bytes), %d kept in '%s'" % \
+                                  (stats['writes'], stats['bytes_written'], stats['stored'],
+                                   self.__spill_store.directory))
+        return z
+
+
+    def _keep(self, bdd, key):
+        """
+        Returns what is stored in xArray or yArray for the given BDD: The
+        BDD itself, or, with a spill store, the key under which it was
+        written to disk.
+        """
+        if self.__spill_store == None:
+            return bdd
+        return self.__spill_store.put(key, bdd)
+
+
+    def _bdd(self, entry):
+        """
+        Returns the BDD for an entry of xArray or yArray (see _keep).
+        """
+        if isinstance(entry, str):
+            return self.__spill_store.get(entry)
+        return entry
+
+
+    def _discard(self, entries):
+        """
+        Removes the spilled BDDs of the given entry of xArray or yArray
+        (which may also be a dictionary or tuple of entries) from disk.
+        """
+        if self.__spill_store == None or entries == None:
+            return
+        if isinstance(entries, str):
+            self.__spill_store.remove(entries)
+        elif isinstance(entries, dict):
+            for entry in entries.values():
+                self._discard(entry)
+        elif isinstance(entries, tuple):
+            for entry in entries:
+                self._discard(entry)
+
+
+    def _close_spill_store(self):
+        if self.__spill_store != None:
+            self.__spill_store.close()
+            self.__spill_store = None
        
 
         
-    def coax(self, states):
-        from bddwrap import BDD
-        import marduk_utils
-        marduk_mgr = self.__marduk.dd_mgr
-        input_product = BDD.ONE(marduk_mgr)
-        output_product = BDD.ONE(marduk_mgr)
-        present = []
-        next = []
+    def _var_names(self):
+        """
+        Returns a dictionary, which maps the indices of all variables to
+        their names (e.g. for storing BDDs in DDDMP format).
+        """
+        names = {}
         for var in self.__marduk.vars:
-            if var.type == marduk_utils.VariableType.INPUT:
-                input_product *=  var.ns
-            elif var.type == marduk_utils.VariableType.OUTPUT:
-                output_product *= var.ns
-            present.append(var.ps)
-            next.append(var.ns)
-        
-        swapped_states = states.swapVariables(present, next)
+            names[var.ps.index] = var.name + "_ps"
+            names[var.ns.index] = var.name + "_ns"
+        return names
 
-        result = self.__transition2.andExists(swapped_states, output_product)
-        result += (~ self.__transition1)
- 
-        result = result.forall(input_product)
- 
+
+    def _save_checkpoint(self, checkpoint, z, old_z, next_j, x_array, y_array):
+        """
+        Writes a checkpoint of the winning region computation, which is
+        continued with guarantee next_j.
+        """
+        import marduk_utils
+
+        bdds = {'z': z, 'old_z': old_z}
+        for (j, y_j) in y_array.items():
+            for (r, y) in y_j.items():
+                bdds["y_%d_%d" % (j, r)] = self._bdd(y)
+        for (j, x_j) in x_array.items():
+            for (r, x_jr) in x_j.items():
+                for (i, x) in x_jr.items():
+                    bdds["x_%d_%d_%d" % (j, r, i)] = self._bdd(x)
+        state = {'next_j': next_j,
+                 'iterations': self.__iterations,
+                 'guarantees': len(self.__guarantees),
+                 'assumptions': len(self.__assumptions)}
+        try:
+            checkpoint.save(state, bdds, marduk_utils.print_variable_ordering(self.__marduk.vars), self._var_names())
+        except (IOError, OSError), error:
+            self.__marduk.println("WARNING: Could not write checkpoint to '%s': %s" % (checkpoint.directory, error))
+            return
+        self.__marduk.println("   Wrote checkpoint after %d z iterations (next guarantee %d)" % \
+                              (self.__iterations['z'], next_j))
+
+
+    def _load_checkpoint(self, checkpoint, x_array, y_array):
+        """
+        Loads the latest checkpoint and applies its variable ordering. The
+        stored entries of the x and y arrays are put into x_array and
+        y_array. Returns a tuple (z, old_z, next_j), or None if there is no
+        checkpoint.
+        """
+        import marduk_utils
+        from marduk_utils import MardukException
+
+        ordering = checkpoint.load_ordering()
+        if ordering == None:
+            self.__marduk.println("   No checkpoint found in '%s', starting from scratch" % checkpoint.directory)
+            return None
+        marduk_utils.set_variable_ordering(ordering, self.__marduk.vars, self.__marduk.dd_mgr)
+        (state, bdds) = checkpoint.load(self.__marduk.dd_mgr, self._var_names())
+        if state['guarantees'] != len(self.__guarantees) or state['assumptions'] != len(self.__assumptions):
+            raise MardukException("Checkpoint in '%s' does not belong to this specification" % checkpoint.directory)
+
+        for (name, bdd) in bdds.items():
+            fields = name.split("_")
+            if fields[0] == "y":
+                (j, r) = [int(field) for field in fields[1:]]
+                y_array.setdefault(j, {})[r] = bdd
+            elif fields[0] == "x":
+                (j, r, i) = [int(field) for field in fields[1:]]
+                x_array.setdefault(j, {}).setdefault(r, {})[i] = bdd
+        for (loop, count) in state['iterations'].items():
+            self.__iterations[str(loop)] = count
+        self.__marduk.println("   Resumed from checkpoint after %d z iterations (next guarantee %d)" % \
+                              (self.__iterations['z'], state['next_j']))
+        return (bdds['z'], bdds['old_z'], state['next_j'])
+
+
+    def _x_fixpoint(self, start, i, x, j, r):
+        """
+        Computes the greatest fixpoint for assumption i, starting from x.
+        Returns a tuple (fixpoint, number of iterations). j and r are only
+        used for tracing.
+        """
+        from bddwrap import BDD
+
+        tracer = self.__marduk.fixpoint_tracer
+        # RB: it would seem to me that we can add x[j][r][i-1] to start here,
+        # which would make the fixpoint larger.
+        iterations = 0
+        old_x = BDD.ZERO(self.__marduk.dd_mgr)
+        while (x != old_x): # GreatestFixpoint(x)
+            old_x = x
+            iterations += 1
+            x = start + ((~(self.__assumptions[i])) * self.coax(x))
+            x.name = "x_elem"
+            tracer.event("winning_region", "x", iterations, x, j=j, r=r, i=i)
+        # End -- GreatestFixpoint(x)
+        return (x, iterations)
+
+
+    def _x_fixpoints(self, start, seeds, j, r):
+        """
+        Computes the greatest fixpoints for all assumptions, where the
+        fixpoint for assumption i starts from seeds[i]. Returns the list of
+        fixpoints. j and r are only used for tracing.
+
+        The fixpoints are independent of each other. With more than one job
+        (--jobs), they are computed concurrently in worker processes. Every
+        worker has its own copy of the DD manager (and of start, the seeds,
+        the assumptions and the transition relations), and sends its result
+        back as a serialized BDD. The CPU time of the workers is not part of
+        the CPU time of this process; it is accumulated in worker_times,
+        together with the wall clock time of the parallel computations.
+        """
+        from bddwrap import BDD
+        import worker_pool
+        import resource
+        import time
+
+        m = len(self.__assumptions)
+        jobs = self.__marduk.jobs
+        if jobs <= 1 or m <= 1:
+            xs = []
+            for i in range(0,m):
+                (x, iterations) = self._x_fixpoint(start, i, seeds[i], j, r)
+                self.__iterations['x'] += iterations
+                xs.append(x)
+            return xs
+
+        def task(i):
+            (x, iterations) = self._x_fixpoint(start, i, seeds[i], j, r)
+            return (x.serialize(), iterations)
+
+        # Bind i now: The tasks are run after the loop.
+        tasks = [lambda i=i: task(i) for i in range(0,m)]
+        usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+        before_cpu = usage.ru_utime + usage.ru_stime
+        before_wall = time.time()
+        results = worker_pool.run_tasks(tasks, jobs, [self.__marduk.dd_mgr])
+        usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+        self.__worker_times['cpu'] += usage.ru_utime + usage.ru_stime - before_cpu
+        self.__worker_times['wall'] += time.time() - before_wall
+        xs = []
+        for (data, iterations) in results:
+            self.__iterations['x'] += iterations
+            x = BDD.deserialize(data, self.__marduk.dd_mgr)
+            x.name = "x_elem"
+            xs.append(x)
+        return xs
+
+
+    def coax(self, states):
+        """
+        Returns all states from which the system can force the play into
+        'states' in one step (see CPreEngine.system).
+        """
 #        result = Forall $input_product ((!@$env_transitions[0]) + 
 #                                      Cudd::BDD::AndExists($output_product, @$sys_transitions[0], $swapped_states));     
-        return result
+        return self.__cpre.system(states)
 
 
+    def _create_cpre_engine(self):
+        import marduk_utils
+        from cpre import CPreEngine
+        registry = self.__marduk.var_registry
+        input_product = registry.next_cube(marduk_utils.VariableType.INPUT)
+        output_product = registry.next_cube(marduk_utils.VariableType.OUTPUT)
+        self.__cpre = CPreEngine(self.__relation1, self.__relation2, input_product, output_product, registry.swap)
+
+
+    def _build_relations(self):
+        """
+        Builds the (partitioned) transition relations of the environment,
+        the system, and of both. If the specification keeps the clusters of
+        NuSMV (--partition Threshold or Iwls95CP, see
+        Specification.trans_partitioned), they are clustered again in the
+        DD manager of marduk, and the monolithic relations are never built.
+        They are rebuilt on demand by the properties trans1, trans2 and
+        trans12. Otherwise every relation is a single cluster.
+        """
+        import marduk_utils
+        from partitioned_relation import PartitionedRelation
+
+        marduk_mgr = self.__marduk.dd_mgr
+        spec = self.__marduk.specification
+
+        if not spec.trans_partitioned:
+            self.__relation1 = PartitionedRelation([self.__transition1], marduk_mgr, PartitionedRelation.MONOLITHIC)
+            self.__relation2 = PartitionedRelation([self.__transition2], marduk_mgr, PartitionedRelation.MONOLITHIC)
+            self.__relation12 = PartitionedRelation([self.__transition12], marduk_mgr, PartitionedRelation.MONOLITHIC)
+            return
+
+        registry = self.__marduk.var_registry
+        method = self.__marduk.partition
+        threshold = self.__marduk.cluster_threshold
+        input_cube = registry.next_cube(marduk_utils.VariableType.INPUT)
+        output_cube = registry.next_cube(marduk_utils.VariableType.OUTPUT)
+        present_cube = registry.present_cube(marduk_utils.VariableType.INPUT,
+                                             marduk_utils.VariableType.OUTPUT,
+                                             marduk_utils.VariableType.STATE)
+
+        parts1 = spec.get_trans1_parts(marduk_mgr)
+        parts2 = spec.get_trans2_parts(marduk_mgr)
+        self.__marduk.println("   Partitioned transition relations (%s, threshold %d):" % (method, threshold))
+        self.__marduk.println("     env: %d parts from NuSMV with %d nodes" % (len(parts1), sum([part.size for part in parts1])))
+        self.__marduk.println("     sys: %d parts from NuSMV with %d nodes" % (len(parts2), sum([part.size for part in parts2])))
+
+        self.__relation1 = PartitionedRelation(parts1, marduk_mgr, method, threshold, input_cube)
+        self.__relation2 = PartitionedRelation(parts2, marduk_mgr, method, threshold, output_cube)
+        self.__relation12 = PartitionedRelation(parts1 + parts2, marduk_mgr, method, threshold, present_cube)
+        del parts1, parts2
+
+        self.__marduk.println("     env: %d clusters with %d nodes" % (len(self.__relation1.clusters), self.__relation1.size))
+        self.__marduk.println("     sys: %d clusters with %d nodes" % (len(self.__relation2.clusters), self.__relation2.size))
+
         
 
     def _convert_y_array(self,CyArray):
@@ -330,19 +698,7 @@ class WinningRegion(object):
         thereby formed initial state is contained in the winning region.
         """
 
-        from bddwrap import BDD
-        import marduk_utils
-        in_product = BDD.ONE(self.__marduk.dd_mgr)
-        out_product = BDD.ONE(self.__marduk.dd_mgr)
-        for var in self.__marduk.vars:
-            if var.type == marduk_utils.VariableType.INPUT:
-                in_product *=  var.ps
-            elif var.type == marduk_utils.VariableType.OUTPUT:
-                out_product *= var.ps
-
-        win_and_sys_initial = self.__winningRegion * self.__init2
-        can_find_initial_output = win_and_sys_initial.exists(out_product)
-        realizable = ((~self.__init1) + can_find_initial_output).isOne()
+        realizable = self._initial_states_winnable(self.__winningRegion)
 
         if realizable and not self.__init12 <= self.__winningRegion:
         # if some but not all initial states are contained in the winning 
@@ -356,10 +712,34 @@ class WinningRegion(object):
 
         return realizable
 
-    def reachableStates(self,init,trans,invar):
+    def _initial_states_winnable(self, states):
+        """
+        Returns True if for all initial configurations of the inputs there
+        exists an initial configuration of the outputs such that the
+        thereby formed initial state is contained in 'states'.
+        """
+        import marduk_utils
+        registry = self.__marduk.var_registry
+        out_product = registry.present_cube(marduk_utils.VariableType.OUTPUT)
+
+        sys_initial = states * self.__init2
+        can_find_initial_output = sys_initial.exists(out_product)
+        return ((~self.__init1) + can_find_initial_output).isOne()
+
+    def reachableStates(self,init,trans,invar,return_layers=False):
         """
         returns the set of states which are reachable from init via trans
-        never leaving invar
+        never leaving invar. trans is either a BDD or a PartitionedRelation
+        (e.g. relation12).
+
+        Only the frontier, i.e. the states which were discovered in the
+        previous step, is imaged. As the image of all states known before is
+        already contained in reach, any set between the frontier and reach
+        can be imaged instead. The smallest such BDD is chosen by between.
+
+        If return_layers is True, a tuple (reach, layers) is returned, where
+        layers[k] contains the states which are reached in k steps, but not
+        in less (the BFS layers).
 
         Notice that NuSMV sets the next states for system transitions 
         of the form G(pure_propositional) whereas Anzu sets the present 
@@ -370,22 +750,42 @@ class WinningRegion(object):
         """
 
         from bddwrap import BDD
+        from partitioned_relation import PartitionedRelation
+        import marduk_utils
 
-        present_vars = [var.ps for var in self.__marduk.vars]
-        
-        present_vars_cube  = BDD.ONE(self.__marduk.dd_mgr)
-        for var in present_vars:
-            present_vars_cube *= var
+        registry = self.__marduk.var_registry
+        present_vars_cube = registry.present_cube(marduk_utils.VariableType.INPUT,
+                                                  marduk_utils.VariableType.OUTPUT,
+                                                  marduk_utils.VariableType.STATE)
 
-        next_vars = [var.ns for var in self.__marduk.vars]
+        # Only states within invar are imaged. Their successors are added to
+        # reach, even if they are outside of invar.
+        tracer = self.__marduk.fixpoint_tracer
         reach = init * invar
-        old_reach = BDD.ZERO(self.__marduk.dd_mgr)
-        while not(old_reach == reach):
-            old_reach = reach.copy()
-            reach *= invar
-            tmp = reach.andExists(trans, present_vars_cube)
-            reach += tmp.swapVariables(present_vars,next_vars)
-
+        reach_in_invar = reach
+        frontier = reach
+        layers = [frontier]
+        step = 0
+        while not frontier.isZero():
+            todo = BDD.between(frontier * invar, reach_in_invar)
+            if isinstance(trans, PartitionedRelation):
+                tmp = trans.and_exists(todo, present_vars_cube)
+            else:
+                tmp = todo.andExists(trans, present_vars_cube)
+            del todo
+            frontier = registry.swap(tmp) * ~reach
+            del tmp
+            reach += frontier
+            reach_in_invar += frontier * invar
+            if return_layers and not frontier.isZero():
+                layers.append(frontier)
+            step += 1
+            if tracer.enabled:
+                tracer.event("reachable_states", "frontier", step, reach, frontier_size=frontier.size)
+
+        reach.name = "reachable states"
+        if return_layers:
+            return (reach, layers)
         return reach
 
 
@@ -409,27 +809,28 @@ class WinningRegion(object):
         ########################################################             
         if self.__marduk.one_hot:
             (present_vars, next_vars) = self.generate_JX_vars(n)
-            trans_relation = BDD.ZERO(marduk_mgr)
             present_states = []
             next_states = []
             
             for i in range(0,n):
-                present_state = BDD.ONE(marduk_mgr)
-                next_state = BDD.ONE(marduk_mgr)
+                present_literals = []
+                next_literals = []
                 for j in range(0,n):
                     if (i == j):
-                        present_state *= present_vars[j]
-                        next_state *= next_vars[j]
+                        present_literals.append(present_vars[j])
+                        next_literals.append(next_vars[j])
                     else:
-                        present_state *= ~present_vars[j]
-                        next_state *= ~next_vars[j]
-                present_states.append(present_state)
-                next_states.append(next_state)
+                        present_literals.append(~present_vars[j])
+                        next_literals.append(~next_vars[j])
+                present_states.append(BDD.conjoin_all(present_literals, marduk_mgr))
+                next_states.append(BDD.conjoin_all(next_literals, marduk_mgr))
 
+            transitions = []
             for i in range(0,n-1):
-                trans_relation += present_states[i] * next_states[i+1]
+                transitions.append(present_states[i] * next_states[i+1])
                 
-            trans_relation += present_states[n-1] * next_states[0]
+            transitions.append(present_states[n-1] * next_states[0])
+            trans_relation = BDD.disjoin_all(transitions, marduk_mgr)
             trans_relation.name = "trans_jx"
             start_state = present_states[0]
             start_state.name = "init_jx"
@@ -452,27 +853,27 @@ class WinningRegion(object):
                 num_of_bits = 1
 
             (present_vars, next_vars) = self.generate_JX_vars(num_of_bits)
-            trans_relation = BDD.ONE(marduk_mgr)
+            bit_transitions = []
             carry = BDD.ONE(marduk_mgr)
 
             for i in range(0,num_of_bits):
-                trans_relation *= (~next_vars[i] + (carry ^ present_vars[i])) * (~(carry ^ present_vars[i]) + next_vars[i]);
+                bit_transitions.append((~next_vars[i] + (carry ^ present_vars[i])) * (~(carry ^ present_vars[i]) + next_vars[i]))
                 
                 carry *= present_vars[i]
+            trans_relation = BDD.conjoin_all(bit_transitions, marduk_mgr)
             
-            reset_condition = BDD.ONE(marduk_mgr)
-            reset_state = BDD.ONE(marduk_mgr)
-            start_state = BDD.ONE(marduk_mgr)
+            reset_literals = []
             bit_selector = n-1
             for i in range(0,num_of_bits):
                 if ((bit_selector & 0x1) == 1):
-                    reset_condition *= present_vars[i]
+                    reset_literals.append(present_vars[i])
                 else:
-                    reset_condition *= ~present_vars[i]
+                    reset_literals.append(~present_vars[i])
 
                 bit_selector = bit_selector >> 1
-                reset_state *= ~next_vars[i]
-                start_state *= ~present_vars[i]
+            reset_condition = BDD.conjoin_all(reset_literals, marduk_mgr)
+            reset_state = BDD.conjoin_all([~var for var in next_vars], marduk_mgr)
+            start_state = BDD.conjoin_all([~var for var in present_vars], marduk_mgr)
 
             case_increase = reset_condition + trans_relation
             case_reset = ~reset_condition + reset_state
@@ -516,6 +917,12 @@ class WinningRegion(object):
             var = marduk_utils.Variable('jx_%s' % i, marduk_utils.VariableType.STATE, present, next)
             self.__marduk.add_variable(var)
 
+        # Group every ps/ns pair, and the whole counter.
+        if self.__marduk.var_groups:
+            for i in range(0,n):
+                marduk_utils.group_variables([present_vars[i], next_vars[i]])
+            marduk_utils.group_variables(present_vars + next_vars)
+
         return(present_vars,next_vars)
 
 
@@ -526,13 +933,17 @@ class WinningRegion(object):
         """
         self.__xArray = None
         self.__yArray = None
+        self._close_spill_store()
 
     def killXArrays(self):
         """
         Kills the x array which store the intermediate results of the fixpoints
         from the computation of the winning region.
         """
+        self._discard(self.__xArray)
         self.__xArray = None
+        if self.__yArray == None:
+            self._close_spill_store()
     
         
     def killYArrays(self):
@@ -540,7 +951,10 @@ class WinningRegion(object):
         Kills the y array which store the intermediate results of the fixpoints
         from the computation of the winning region.
         """
+        self._discard(self.__yArray)
         self.__yArray = None
+        if self.__xArray == None:
+            self._close_spill_store()
 
         
     def killTransitions(self):
@@ -548,6 +962,10 @@ class WinningRegion(object):
         self.__transition2 = None
         self.__transition12 = None
         self.__transitionjx = None
+        self.__relation1 = None
+        self.__relation2 = None
+        self.__relation12 = None
+        self.__cpre = None
 
     def killWinReg(self):
         """
@@ -568,6 +986,24 @@ class WinningRegion(object):
         return self.__winningRegion.copy()
     winRegion = property(getWinningRegion)
 
+    def getIterationCounts(self):
+        """
+        Returns a dictionary with the number of iterations of the z, y and x
+        fixpoints of the last computation of the winning region.
+        """
+        return self.__iterations.copy()
+    iteration_counts = property(getIterationCounts)
+
+    def getWorkerTimes(self):
+        """
+        Returns a dictionary with the CPU time ('cpu') of the worker
+        processes for the x fixpoints (--jobs), and the wall clock time
+        ('wall') during which they ran, in seconds. Both are 0 without
+        workers.
+        """
+        return self.__worker_times.copy()
+    worker_times = property(getWorkerTimes)
+
     def getyArray(self):
         if self.__yArray == None:
             raise Exception("yArray BDD not initialized or killed!")
@@ -580,6 +1016,21 @@ class WinningRegion(object):
         return self.__xArray
     X = property(getxArray)
 
+    def getYElement(self, j, r):
+        """
+        Returns the BDD yArray[j][r] (which is loaded from disk, if the
+        arrays are spilled).
+        """
+        return self._bdd(self.Y[j][r])
+
+    def getXSlice(self, j, r):
+        """
+        Returns the list of the BDDs xArray[j][r][i] for all i (which are
+        loaded from disk, if the arrays are spilled).
+        """
+        x_jr = self.X[j][r]
+        return [self._bdd(x_jr[i]) for i in range(0, len(x_jr))]
+
     def getGuarantees(self):
         if self.__guarantees:
             return self.__guarantees
@@ -597,6 +1048,8 @@ class WinningRegion(object):
     def getTransition1(self):
         if self.__transition1:
             return self.__transition1.copy()
+        elif self.__relation1:
+            return self.__relation1.monolithic()
         else:
             raise MardukException("Transition1 not initialized or killed.")
     trans1 = property(getTransition1)
@@ -604,6 +1057,8 @@ class WinningRegion(object):
     def getTransition2(self):
         if self.__transition2:
             return self.__transition2.copy()
+        elif self.__relation2:
+            return self.__relation2.monolithic()
         else:
             raise MardukException("Transition2 not initialized or killed.")
     trans2 = property(getTransition2)
@@ -611,10 +1066,33 @@ class WinningRegion(object):
     def getTransition12(self):
         if self.__transition12:
             return self.__transition12.copy()
+        elif self.__relation12:
+            return self.__relation12.monolithic()
         else:
             raise MardukException("Transition12 not initialized or killed.")
     trans12 = property(getTransition12)
 
+    def getRelation1(self):
+        if self.__relation1:
+            return self.__relation1
+        else:
+            raise MardukException("Relation1 not initialized or killed.")
+    relation1 = property(getRelation1)
+
+    def getRelation2(self):
+        if self.__relation2:
+            return self.__relation2
+        else:
+            raise MardukException("Relation2 not initialized or killed.")
+    relation2 = property(getRelation2)
+
+    def getRelation12(self):
+        if self.__relation12:
+            return self.__relation12
+        else:
+            raise MardukException("Relation12 not initialized or killed.")
+    relation12 = property(getRelation12)
+
     #def getTransition(self):
     #    return self.__transition.copy()
     #trans = property(getTransition)
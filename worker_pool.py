@@ -0,0 +1,131 @@
+##  ===========================================================================
+##  Author: Georg Hofferek <georg.hofferek@iaik.tugraz.at>
+##
+##  Copyright (c) 2009, 2010 by Graz University of Technology
+##
+##  This is free software; you can redistribute it and/or
+##  modify it under the terms of the GNU Lesser General Public
+##  License as published by the Free Software Foundation; either
+##  version 2 of the License, or (at your option) any later version.
+##
+##  This software is distributed in the hope that it will be useful,
+##  but WITHOUT ANY WARRANTY; without even the implied warranty of
+##  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+##  Lesser General Public License for more details.
+##
+##  You should have received a copy of the GNU Lesser General Public
+##  License along with this library; if not, write to the Free Software
+##  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307  USA.
+##
+##  For more information about this software see <http://rat.fbk.eu/ratsy>
+##  or email to the RATSY Team <ratsy@list.fbk.eu>.
+##  Please report bugs to <ratsy@list.fbk.eu>.
+##
+##  ===========================================================================
+
+
+"""
+This module contains a simple pool of worker processes, which are forked
+from the current process.
+"""
+
+import os
+import sys
+import cPickle
+
+
+def _start(task, managers):
+    """
+    Forks a child, which disables dynamic reordering of the given DD
+    managers, runs the given task and sends the pickled result through a
+    pipe. Returns a tuple (pid, file to read the result from).
+    """
+    sys.stdout.flush()
+    sys.stderr.flush()
+    (read_fd, write_fd) = os.pipe()
+    pid = os.fork()
+    if pid != 0:
+        os.close(write_fd)
+        return (pid, os.fdopen(read_fd, 'rb'))
+
+    os.close(read_fd)
+    exit_code = 0
+    try:
+        try:
+            from nusmv import dd
+            for manager in managers:
+                dd.dd_autodyn_disable(manager)
+            message = ('result', task())
+        except:
+            import traceback
+            message = ('error', traceback.format_exc())
+            exit_code = 1
+        out = os.fdopen(write_fd, 'wb')
+        cPickle.dump(message, out, cPickle.HIGHEST_PROTOCOL)
+        out.close()
+        sys.stdout.flush()
+    finally:
+        # Never return into the code of the parent, and do not clean up
+        # the DD managers which are shared with it (copy on write).
+        os._exit(exit_code)
+
+
+def _finish(pid, result_file):
+    """
+    Reads the result of the given child and waits for it to terminate.
+    """
+    from marduk_utils import MardukException
+    try:
+        try:
+            (kind, value) = cPickle.load(result_file)
+        except EOFError:
+            (kind, value) = ('error', "worker process %d died without a result" % pid)
+    finally:
+        result_file.close()
+        os.waitpid(pid, 0)
+    if kind == 'error':
+        raise MardukException("Error in worker process:\n" + value)
+    return value
+
+
+def run_tasks(tasks, jobs, managers=()):
+    """
+    Runs the given tasks (functions without arguments) in forked worker
+    processes, at most 'jobs' at a time, and returns the list of their
+    results in the order of the tasks.
+
+    Every worker is a copy of the whole process, including the DD managers
+    and all BDDs which exist at the time of the call. Thus the tasks can
+    use them without any transfer, but nothing a task changes is visible
+    in the parent. The results are pickled, so they must not contain BDDs
+    (see BDD.serialize and BDD.deserialize).
+
+    Every worker disables dynamic reordering of the given DD managers
+    before it runs its task: A reordering touches the whole unique table,
+    which would copy all pages shared with the parent, such that the
+    memory would grow with the number of jobs. This does not change the
+    results, as they are serialized by variable index.
+
+    With jobs <= 1 or a single task, the tasks are run in this process.
+    """
+    if jobs <= 1 or len(tasks) <= 1:
+        return [task() for task in tasks]
+
+    results = [None] * len(tasks)
+    running = []
+    next_task = 0
+    try:
+        while next_task < len(tasks) or len(running) > 0:
+            if next_task < len(tasks) and len(running) < jobs:
+                running.append((next_task, _start(tasks[next_task], managers)))
+                next_task += 1
+                continue
+            # All slots are used: Wait for the oldest worker.
+            (position, (pid, result_file)) = running.pop(0)
+            results[position] = _finish(pid, result_file)
+    finally:
+        # If a worker failed, do not leave the others behind.
+        for (position, (pid, result_file)) in running:
+            result_file.close()
+            os.waitpid(pid, 0)
+    return results